@@ -0,0 +1,98 @@
+import json
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncResponse:
+    """Status, headers and body of a finished request"""
+
+    def __init__(self, status_code, headers, text):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+
+    def json(self):
+        """Decode the body as JSON, raising ValueError if it is not JSON"""
+        return json.loads(self.text)
+
+
+class AsyncHttpClient:
+    """HTTP client for coroutines with one connection pool shared by every in-flight request
+
+    Uses aiohttp when it is installed. Without it, requests run on a pooled
+    requests.Session in a thread pool of the same size, so the caller's
+    coroutines look the same either way and at most ``limit`` connections are
+    ever open.
+    """
+
+    def __init__(self, headers=None, limit=10, timeout=30):
+        self.headers = dict(headers or {})
+        self.limit = limit
+        self.timeout = timeout
+        self.aio_session = None
+        self.session = None
+        self.executor = None
+
+    def start_aiohttp(self):
+        """Create the aiohttp session on first use, inside the running event loop"""
+        if self.aio_session is None:
+            self.aio_session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=aiohttp.TCPConnector(limit=self.limit),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self.aio_session
+
+    def start_threaded(self):
+        """Create the pooled session and its threads on first use"""
+        if self.session is None:
+            self.session = requests.Session()
+            self.session.headers.update(self.headers)
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.limit)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+            self.executor = ThreadPoolExecutor(max_workers=self.limit)
+        return self.session
+
+    async def post_json(self, url, payload, headers=None):
+        """POST a JSON payload and return an AsyncResponse"""
+        if aiohttp is not None:
+            session = self.start_aiohttp()
+            async with session.post(url, json=payload, headers=headers) as response:
+                return AsyncResponse(response.status, response.headers, await response.text())
+
+        session = self.start_threaded()
+        post = functools.partial(session.post, url, json=payload, headers=headers, timeout=self.timeout)
+        response = await asyncio.get_running_loop().run_in_executor(self.executor, post)
+        return AsyncResponse(response.status_code, response.headers, response.text)
+
+    async def get(self, url, headers=None):
+        """GET a URL and return an AsyncResponse"""
+        if aiohttp is not None:
+            session = self.start_aiohttp()
+            async with session.get(url, headers=headers) as response:
+                return AsyncResponse(response.status, response.headers, await response.text())
+
+        session = self.start_threaded()
+        get = functools.partial(session.get, url, headers=headers, timeout=self.timeout)
+        response = await asyncio.get_running_loop().run_in_executor(self.executor, get)
+        return AsyncResponse(response.status_code, response.headers, response.text)
+
+    async def close(self):
+        """Close the connection pool"""
+        if self.aio_session is not None:
+            await self.aio_session.close()
+            self.aio_session = None
+        if self.session is not None:
+            self.executor.shutdown(wait=False)
+            self.session.close()
+            self.session = None
+            self.executor = None
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+import io
+import os
+import sys
+import json
+import time
+import asyncio
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import threading
+from contextlib import redirect_stdout
+
+# Progress bars would only slow the runs down and clutter the report
+os.environ.setdefault("TQDM_DISABLE", "1")
+
+from fixture_server import SyntheticServer
+from driver_pool import process_tree_rss
+from scraper_base import RateLimiter
+from cve_scraper import CVEScraper
+from cwe_scraper import CWEScraper
+from disclosed_reports_scraper import DisclosedReportsScraper
+from undisclosed_reports_scraper import UndisclosedReportsScraper
+
+logger = logging.getLogger("Benchmark")
+
+SCRAPERS = {
+    "cve": CVEScraper,
+    "cwe": CWEScraper,
+    "disclosed": DisclosedReportsScraper,
+    "undisclosed": UndisclosedReportsScraper,
+}
+
+# The CVE/CWE tables page by clicking a button, which the synthetic HTML pages do not model
+SELENIUM_SCRAPERS = ("disclosed", "undisclosed")
+
+# Backends that drive Chrome, so they only run the scrapers above and take a browser profile
+BROWSER_BACKENDS = ("selenium", "hybrid")
+
+# Metrics compared against a baseline and whether a higher value is better
+COMPARED_METRICS = {"pages_per_sec": True, "links_per_sec": True, "peak_rss_mb": False, "page_load_ms": False}
+
+
+class PeakRSS:
+    """Sample the resident memory of this process and its children in the background"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = 0.0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def sample(self):
+        """Record the current memory use"""
+        rss = process_tree_rss(os.getpid())
+        if rss is not None:
+            self.peak = max(self.peak, rss)
+
+    def run(self):
+        """Sample until stopped"""
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self.sample()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        self.sample()
+
+
+class PhaseTimer:
+    """Add up the time spent in each phase of a run across all worker threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.seconds = {}
+        self.calls = {}
+
+    def timed(self, phase, function):
+        """Wrap a function so its calls count towards a phase"""
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.add(phase, time.perf_counter() - start)
+        return wrapper
+
+    def timed_async(self, phase, function):
+        """Wrap a coroutine function so the time until it finishes counts towards a phase"""
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                self.add(phase, time.perf_counter() - start)
+        return wrapper
+
+    def add(self, phase, seconds):
+        """Record one call of a phase"""
+        with self.lock:
+            self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+            self.calls[phase] = self.calls.get(phase, 0) + 1
+
+
+def instrument(scraper, timer):
+    """Time page fetches, link processing and saving on a scraper instance"""
+    create_backend = scraper.create_backend
+    create_pipeline = scraper.create_pipeline
+
+    def timed_backend(name=None):
+        backend = create_backend(name)
+        wrap = timer.timed_async if asyncio.iscoroutinefunction(backend.fetch_page) else timer.timed
+        backend.fetch_page = wrap("fetch", backend.fetch_page)
+        if hasattr(backend, "load"):
+            # Navigation until the listing has rendered, without the extraction that follows
+            backend.load = timer.timed("load", backend.load)
+        return backend
+
+    def timed_pipeline():
+        pipeline = create_pipeline()
+        pipeline.process = timer.timed("pipeline", pipeline.process)
+        return pipeline
+
+    scraper.create_backend = timed_backend
+    scraper.create_pipeline = timed_pipeline
+    scraper.save_links = timer.timed("save", scraper.save_links)
+    return scraper
+
+
+def run_scenario(name, backend, server, page_size=25, workers=1, rate=None, profile="full"):
+    """Run one scraper end to end against the synthetic server and return its measurements"""
+    directory = tempfile.mkdtemp(prefix="h1-benchmark-")
+    timer = PhaseTimer()
+    try:
+        start = time.perf_counter()
+        scraper = SCRAPERS[name](backend)
+        scraper.output_file = os.path.join(directory, os.path.basename(scraper.output_file))
+        scraper.graphql_url = f"{server.url}/graphql"
+        scraper.base_url = f"{server.url}/hacktivity/overview"
+        scraper.page_size = page_size
+        scraper.workers = workers
+        scraper.rate_limiter = RateLimiter(rate=rate, burst=max(1, workers))
+        scraper.response_cache = None
+        scraper.resume = False
+        scraper.browser_profile = profile
+        instrument(scraper, timer)
+        timer.add("setup", time.perf_counter() - start)
+
+        del server.requests[:]
+        with PeakRSS() as rss, redirect_stdout(io.StringIO()):
+            run_start = time.perf_counter()
+            scraper.run()
+            elapsed = time.perf_counter() - run_start
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    pages = timer.calls.get("fetch", 0)
+    links = scraper.new_link_count
+    loads = timer.calls.get("load", 0)
+    # The profile only changes how Selenium renders, so other scenarios keep their names
+    suffix = f"/{profile}" if backend in BROWSER_BACKENDS else ""
+    return {
+        "scenario": f"{name}/{backend}/w{workers}{suffix}",
+        "scraper": name,
+        "backend": backend,
+        "profile": profile,
+        "workers": workers,
+        "pages": pages,
+        "links": links,
+        "requests": len(server.requests),
+        "seconds": round(elapsed, 4),
+        "pages_per_sec": round(pages / elapsed, 2) if elapsed else None,
+        "links_per_sec": round(links / elapsed, 2) if elapsed else None,
+        "peak_rss_mb": round(rss.peak, 1),
+        "page_load_ms": round(timer.seconds["load"] / loads * 1000, 1) if loads else None,
+        # fetch is summed over all workers, so it can exceed the wall clock time
+        "phases": {phase: round(seconds, 4) for phase, seconds in timer.seconds.items()},
+        "error": None if scraper.error is None else str(scraper.error),
+    }
+
+
+def run_benchmark(scrapers, backends, pages=40, page_size=25, latency=0.0, workers=1, rate=None, profiles=("full",)):
+    """Run every scraper/backend combination, and each browser profile for Selenium, and return the report"""
+    results = []
+    with SyntheticServer(pages=pages, page_size=page_size, latency=latency) as server:
+        for backend in backends:
+            for name in scrapers:
+                if backend in BROWSER_BACKENDS and name not in SELENIUM_SCRAPERS:
+                    continue
+                for profile in profiles if backend in BROWSER_BACKENDS else ("full",):
+                    print(f"Running {name} with the {backend} backend ({profile} profile)...")
+                    results.append(run_scenario(name, backend, server, page_size, workers, rate, profile))
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"pages": pages, "page_size": page_size, "latency": latency, "workers": workers, "rate": rate,
+                   "profiles": list(profiles)},
+        "results": results,
+    }
+
+
+def compare(baseline, current, tolerance=0.1):
+    """Print the change of each metric against a baseline and return the regressions"""
+    previous = {result["scenario"]: result for result in baseline["results"]}
+    regressions = []
+    print(f"\n{'Scenario':<28}{'Metric':<16}{'Baseline':>12}{'Current':>12}{'Change':>10}")
+    for result in current["results"]:
+        old = previous.get(result["scenario"])
+        if old is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            before, after = old.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            flag = ""
+            if worse > tolerance:
+                flag = " REGRESSION"
+                regressions.append((result["scenario"], metric, before, after))
+            print(f"{result['scenario']:<28}{metric:<16}{before:>12}{after:>12}{change:>+10.1%}{flag}")
+    return regressions
+
+
+def print_report(report):
+    """Print a summary table of a benchmark report"""
+    print(f"\n{'Scenario':<28}{'Pages':>7}{'Links':>8}{'Seconds':>9}{'Pages/s':>10}{'Links/s':>10}{'Peak MB':>9}")
+    for result in report["results"]:
+        print(f"{result['scenario']:<28}{result['pages']:>7}{result['links']:>8}{result['seconds']:>9}"
+              f"{result['pages_per_sec'] or 0:>10}{result['links_per_sec'] or 0:>10}{result['peak_rss_mb']:>9}")
+        if result["error"]:
+            print(f"  failed: {result['error']}")
+
+
+def compare_profiles(report):
+    """Print page load time, Chrome memory and requests of each browser scenario per profile"""
+    by_profile = {}
+    for result in report["results"]:
+        if result["backend"] in BROWSER_BACKENDS:
+            key = (result["scraper"], result["backend"], result["workers"])
+            by_profile.setdefault(key, {})[result["profile"]] = result
+    rows = [(key, runs) for key, runs in by_profile.items() if "full" in runs and len(runs) > 1]
+    if not rows:
+        return
+    print(f"\n{'Scenario':<24}{'Profile':<9}{'Load ms':>10}{'Peak MB':>10}{'Requests':>10}{'Load change':>13}")
+    for (name, backend, workers), runs in rows:
+        full = runs["full"]
+        for profile, result in runs.items():
+            change = ""
+            if profile != "full" and full["page_load_ms"] and result["page_load_ms"] is not None:
+                change = f"{(result['page_load_ms'] - full['page_load_ms']) / full['page_load_ms']:+.1%}"
+            print(f"{name + '/' + backend:<24}{profile:<9}{result['page_load_ms'] or 0:>10}{result['peak_rss_mb']:>10}"
+                  f"{result['requests']:>10}{change:>13}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against a local HackerOne stand-in")
+    parser.add_argument("--scrapers", default=",".join(SCRAPERS),
+                        help="Comma separated scrapers to run (default: all)")
+    parser.add_argument("--backends", default="http",
+                        help="Comma separated backends to run: http, async, selenium or hybrid (both need Chrome)")
+    parser.add_argument("--pages", type=int, default=40, help="Listing pages served per scraper")
+    parser.add_argument("--page-size", type=int, default=25, help="Items per listing page")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the server waits before every response")
+    parser.add_argument("--workers", type=int, default=1, help="Pages fetched concurrently")
+    parser.add_argument("--rate", type=float, default=0, help="Requests per second (0 for unlimited)")
+    parser.add_argument("--profiles", default="full",
+                        help="Comma separated browser profiles for the Selenium backend: full, lean")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON report")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="Relative slowdown or memory growth reported as a regression")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    report = run_benchmark(args.scrapers.split(","), args.backends.split(","), args.pages, args.page_size,
+                           args.latency, args.workers, args.rate or None, args.profiles.split(","))
+    print_report(report)
+    compare_profiles(report)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved the results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(baseline, report, args.tolerance):
+            sys.exit(1)
@@ -0,0 +1,81 @@
+import os
+import json
+import time
+import logging
+
+logger = logging.getLogger("CrawlJournal")
+
+
+class CrawlJournal:
+    """Append-only record of the pages completed by an interrupted crawl
+
+    The first line describes the crawl, every following line holds one
+    completed page and the IDs found on it. Each line is flushed and synced
+    as soon as the page is done, so a crash, OOM kill or Ctrl-C loses at most
+    the page that was in flight.
+    """
+
+    def __init__(self, path, page_size):
+        self.path = path
+        self.page_size = page_size
+        self.file = None
+
+    def load(self):
+        """Return the contiguous completed pages as (page_index, ids, has_next, activity_at)"""
+        if not os.path.exists(self.path):
+            return []
+
+        pages = {}
+        with open(self.path, "r") as f:
+            header = None
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A crash can leave the last line half written
+                    continue
+                if header is None:
+                    header = entry
+                    if header.get("page_size") != self.page_size:
+                        logger.warning(f"Ignoring {self.path}: it was written with a different page size")
+                        self.discard()
+                        return []
+                    continue
+                pages[entry["page"]] = (entry["page"], entry["ids"], entry.get("has_next", True), entry.get("activity_at"))
+
+        completed = []
+        while len(completed) in pages:
+            completed.append(pages[len(completed)])
+        return completed
+
+    def open(self):
+        """Open the journal for appending, writing the header for a new crawl"""
+        if self.file is not None:
+            return
+        new = not os.path.exists(self.path)
+        self.file = open(self.path, "a")
+        if new:
+            self.write({"page_size": self.page_size, "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())})
+
+    def record(self, page_index, page):
+        """Record a completed page"""
+        self.open()
+        self.write({"page": page_index, "ids": page.ids, "has_next": page.has_next, "activity_at": page.activity_at})
+
+    def write(self, entry):
+        """Append one line and make sure it reaches the disk"""
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        """Close the journal file, keeping it for a later resume"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def discard(self):
+        """Delete the journal once its pages are safely saved"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
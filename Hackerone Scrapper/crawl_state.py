@@ -0,0 +1,38 @@
+import os
+import json
+import time
+import threading
+
+_state_lock = threading.Lock()
+
+
+def load_state(path):
+    """Load the persisted crawl state, or an empty state if there is none"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def get_high_water_mark(path, category):
+    """Return the high-water mark stored for a category"""
+    return load_state(path).get(category, {})
+
+
+def save_high_water_mark(path, category, newest_id, newest_activity_at=None):
+    """Persist the newest ID and activity timestamp seen for a category"""
+    with _state_lock:
+        state = load_state(path)
+        state[category] = {
+            "newest_id": newest_id,
+            "newest_activity_at": newest_activity_at,
+            "updated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        # Write to a temporary file first so a crash never leaves half a file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, path)
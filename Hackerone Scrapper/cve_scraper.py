@@ -1,64 +1,51 @@
-import time
-import re
 from scraper_base import BaseHackerOneScraper
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
-from tqdm import tqdm
+from fetch_backend import find_pattern_ids, find_report_counts, find_total_count
+from readiness import page_signature, wait_until_ready
+from page_parser import CVE_PATTERN, parse_cve_ids
+
+# GraphQL query issued by the CVE discovery page for its table
+CVE_DISCOVERY_QUERY = """query CveDiscoveryQuery($from: Int, $size: Int) {
+  cve_discovery(from: $from, size: $size) {
+    total_count
+    nodes { cve_id reports_count }
+  }
+}"""
 
 class CVEScraper(BaseHackerOneScraper):
     """Scraper for HackerOne CVE links"""
     
-    def __init__(self):
+    def __init__(self, backend="auto"):
         """Initialize the CVE scraper"""
-        super().__init__("output/cve_links.txt", "CVE")
+        super().__init__("output/cve_links.txt", "CVE", backend)
+        self.ready_selector = "tr td"
+        # The discovery tables change slowly, so cached pages stay fresh for a day
+        self.cache_ttl = 24 * 3600
         self.base_url = "https://hackerone.com/hacktivity/cve_discovery"
         
-    def scrape(self):
-        """Scrape CVE links from HackerOne"""
-        driver = self.setup_driver()
-        try:
-            # Navigate to the CVE discovery page
-            driver.get(self.base_url)
-            time.sleep(3)  # Wait for page to load
-            
-            # Extract all CVE IDs
-            all_cve_ids = []
-            page = 0
-            has_next_page = True
-            
-            with tqdm(desc="Scraping CVE pages", unit="page") as pbar:
-                while has_next_page:
-                    # Extract CVE IDs from the current page
-                    cve_ids = self.extract_cve_ids(driver)
-                    all_cve_ids.extend(cve_ids)
-                    
-                    pbar.set_postfix({"CVEs found": len(all_cve_ids)})
-                    pbar.update(1)
-                    
-                    # Check if there's a next page
-                    has_next_page = self.go_to_next_page(driver)
-                    page += 1
-                    
-                    # Add a small delay to avoid overloading the server
-                    time.sleep(1)
-            
-            # Generate links for all CVE IDs
-            total_cves = len(all_cve_ids)
-            print(f"Found a total of {total_cves} CVEs")
-            
-            with tqdm(total=total_cves, desc="Generating CVE links", unit="link") as pbar:
-                for i, cve_id in enumerate(all_cve_ids):
-                    link = f"https://hackerone.com/hacktivity/cve_discovery?id={cve_id}"
-                    self.links.append(link)
-                    pbar.update(1)
-                    pbar.set_postfix({"Current": cve_id})
-                
-        except Exception as e:
-            print(f"Error during CVE scraping: {e}")
-        finally:
-            driver.quit()
+    def graphql_payload(self, page_index):
+        """Return the GraphQL request for a page of the CVE discovery table"""
+        return {
+            "operationName": "CveDiscoveryQuery",
+            "query": CVE_DISCOVERY_QUERY,
+            "variables": {"from": page_index * self.page_size, "size": self.page_size},
+        }
+    
+    def parse_graphql(self, data):
+        """Extract CVE IDs, the total count and each CVE's report count from a GraphQL response"""
+        return (find_pattern_ids(data, CVE_PATTERN), find_total_count(data),
+                {"report_counts": find_report_counts(data, CVE_PATTERN)})
+    
+    def extract_page_ids(self, driver):
+        """Extract CVE IDs from the rendered page"""
+        return self.extract_cve_ids(driver)
+    
+    def build_link(self, cve_id):
+        """Build the CVE discovery link for a CVE ID"""
+        return f"https://hackerone.com/hacktivity/cve_discovery?id={cve_id}"
     
     def go_to_next_page(self, driver):
         """Click the next page button if available"""
@@ -70,8 +57,10 @@ class CVEScraper(BaseHackerOneScraper):
             
             # Check if the button is enabled
             if next_button.is_enabled() and "disabled" not in next_button.get_attribute("class"):
+                previous = page_signature(driver, self.ready_selector)
                 next_button.click()
-                time.sleep(2)  # Wait for page to load
+                # Wait until the table shows different rows
+                wait_until_ready(driver, self.ready_selector, previous)
                 return True
             else:
                 return False
@@ -94,30 +83,14 @@ class CVEScraper(BaseHackerOneScraper):
                     EC.presence_of_element_located((By.CSS_SELECTOR, "table"))
                 )
                 
-                # Find all rows in the CVE table
-                rows = driver.find_elements(By.CSS_SELECTOR, "tr")
-                
-                for row in rows:
-                    try:
-                        # Extract the CVE ID from the row
-                        cells = row.find_elements(By.CSS_SELECTOR, "td")
-                        if len(cells) >= 2:
-                            cve_text = cells[1].text.strip()
-                            # Use regex to extract CVE ID
-                            match = re.search(r'(CVE-\d{4}-\d+)', cve_text)
-                            if match:
-                                cve_id = match.group(1)
-                                cve_ids.append(cve_id)
-                    except (NoSuchElementException, StaleElementReferenceException):
-                        continue
-                
-                # If we got here without exceptions, break the retry loop
+                # Grab the rendered page once and parse the table locally
+                cve_ids = parse_cve_ids(driver.page_source)
                 break
                 
             except (TimeoutException, StaleElementReferenceException) as e:
                 retries += 1
                 print(f"Retry {retries}/{max_retries} due to: {e}")
-                time.sleep(2)
+                self.wait_before_retry(retries)
             except Exception as e:
                 print(f"Error extracting CVE IDs: {e}")
                 break
@@ -125,5 +98,7 @@ class CVEScraper(BaseHackerOneScraper):
         return cve_ids
 
 if __name__ == "__main__":
+    from log_config import configure_logging
+    configure_logging("scraper.log")
     scraper = CVEScraper()
     scraper.run()
\ No newline at end of file
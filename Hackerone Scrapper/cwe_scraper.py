@@ -1,66 +1,52 @@
-import time
-import re
 from scraper_base import BaseHackerOneScraper
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
-from tqdm import tqdm
+from fetch_backend import find_pattern_ids, find_report_counts, find_total_count
+from readiness import page_signature, wait_until_ready
+from page_parser import CWE_PATTERN, parse_cwe_ids
+
+# GraphQL query issued by the CWE discovery page for its table
+CWE_DISCOVERY_QUERY = """query CweDiscoveryQuery($from: Int, $size: Int) {
+  cwe_discovery(from: $from, size: $size) {
+    total_count
+    nodes { cwe_id name reports_count }
+  }
+}"""
 
 class CWEScraper(BaseHackerOneScraper):
     """Scraper for HackerOne CWE links"""
     
-    def __init__(self):
+    def __init__(self, backend="auto"):
         """Initialize the CWE scraper"""
-        super().__init__("output/cwe_links.txt", "CWE")
+        super().__init__("output/cwe_links.txt", "CWE", backend)
+        self.ready_selector = "tr td"
+        # The discovery tables change slowly, so cached pages stay fresh for a day
+        self.cache_ttl = 24 * 3600
         self.base_url = "https://hackerone.com/hacktivity/cwe_discovery"
         
-    def scrape(self):
-        """Scrape CWE links from HackerOne"""
-        driver = self.setup_driver()
-        try:
-            # Navigate to the CWE discovery page
-            driver.get(self.base_url)
-            time.sleep(3)  # Wait for page to load
-            
-            # Extract all CWE IDs
-            all_cwe_ids = []
-            page = 0
-            has_next_page = True
-            
-            with tqdm(desc="Scraping CWE pages", unit="page") as pbar:
-                while has_next_page:
-                    # Extract CWE IDs from the current page
-                    cwe_ids = self.extract_cwe_ids(driver)
-                    all_cwe_ids.extend(cwe_ids)
-                    
-                    pbar.set_postfix({"CWEs found": len(all_cwe_ids)})
-                    pbar.update(1)
-                    
-                    # Check if there's a next page
-                    has_next_page = self.go_to_next_page(driver)
-                    page += 1
-                    
-                    # Add a small delay to avoid overloading the server
-                    time.sleep(1)
-            
-            # Generate links for all CWE IDs
-            total_cwes = len(all_cwe_ids)
-            print(f"Found a total of {total_cwes} CWEs")
-            
-            with tqdm(total=total_cwes, desc="Generating CWE links", unit="link") as pbar:
-                for i, cwe_id in enumerate(all_cwe_ids):
-                    # Convert CWE-79 to cwe-79 (lowercase) for the URL
-                    cwe_id_lower = cwe_id.lower()
-                    link = f"https://hackerone.com/hacktivity/cwe_discovery?id={cwe_id_lower}"
-                    self.links.append(link)
-                    pbar.update(1)
-                    pbar.set_postfix({"Current": cwe_id})
-                
-        except Exception as e:
-            print(f"Error during CWE scraping: {e}")
-        finally:
-            driver.quit()
+    def graphql_payload(self, page_index):
+        """Return the GraphQL request for a page of the CWE discovery table"""
+        return {
+            "operationName": "CweDiscoveryQuery",
+            "query": CWE_DISCOVERY_QUERY,
+            "variables": {"from": page_index * self.page_size, "size": self.page_size},
+        }
+    
+    def parse_graphql(self, data):
+        """Extract CWE IDs, the total count and each CWE's report count from a GraphQL response"""
+        return (find_pattern_ids(data, CWE_PATTERN), find_total_count(data),
+                {"report_counts": find_report_counts(data, CWE_PATTERN)})
+    
+    def extract_page_ids(self, driver):
+        """Extract CWE IDs from the rendered page"""
+        return self.extract_cwe_ids(driver)
+    
+    def build_link(self, cwe_id):
+        """Build the CWE discovery link for a CWE ID"""
+        # Convert CWE-79 to cwe-79 (lowercase) for the URL
+        return f"https://hackerone.com/hacktivity/cwe_discovery?id={cwe_id.lower()}"
     
     def go_to_next_page(self, driver):
         """Click the next page button if available"""
@@ -72,8 +58,10 @@ class CWEScraper(BaseHackerOneScraper):
             
             # Check if the button is enabled
             if next_button.is_enabled() and "disabled" not in next_button.get_attribute("class"):
+                previous = page_signature(driver, self.ready_selector)
                 next_button.click()
-                time.sleep(2)  # Wait for page to load
+                # Wait until the table shows different rows
+                wait_until_ready(driver, self.ready_selector, previous)
                 return True
             else:
                 return False
@@ -96,30 +84,14 @@ class CWEScraper(BaseHackerOneScraper):
                     EC.presence_of_element_located((By.CSS_SELECTOR, "table"))
                 )
                 
-                # Find all rows in the CWE table
-                rows = driver.find_elements(By.CSS_SELECTOR, "tr")
-                
-                for row in rows:
-                    try:
-                        # Extract the CWE ID from the row
-                        cells = row.find_elements(By.CSS_SELECTOR, "td")
-                        if cells:
-                            cwe_text = cells[0].text.strip()
-                            # Use regex to extract CWE ID
-                            match = re.search(r'(CWE-\d+)', cwe_text)
-                            if match:
-                                cwe_id = match.group(1)
-                                cwe_ids.append(cwe_id)
-                    except (NoSuchElementException, StaleElementReferenceException):
-                        continue
-                
-                # If we got here without exceptions, break the retry loop
+                # Grab the rendered page once and parse the table locally
+                cwe_ids = parse_cwe_ids(driver.page_source)
                 break
                 
             except (TimeoutException, StaleElementReferenceException) as e:
                 retries += 1
                 print(f"Retry {retries}/{max_retries} due to: {e}")
-                time.sleep(2)
+                self.wait_before_retry(retries)
             except Exception as e:
                 print(f"Error extracting CWE IDs: {e}")
                 break
@@ -127,5 +99,7 @@ class CWEScraper(BaseHackerOneScraper):
         return cwe_ids
 
 if __name__ == "__main__":
+    from log_config import configure_logging
+    configure_logging("scraper.log")
     scraper = CWEScraper()
     scraper.run()
\ No newline at end of file
@@ -0,0 +1,112 @@
+import os
+import math
+import time
+import socket
+import asyncio
+import logging
+from work_queue import Heartbeat
+
+logger = logging.getLogger("Distributed")
+
+
+def default_worker_id():
+    """Name a worker after its host and process"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def plan_pages(queue, scraper_type, scraper, pages_per_lease=20):
+    """Queue the page ranges of one listing, reading its size from the first page"""
+    if hasattr(scraper, "find_page_count"):
+        # Measured once here and stored with the plan instead of by every range
+        page_count = scraper.find_page_count()
+        queue.save_page_count(scraper_type, page_count)
+        return queue.add_page_ranges(scraper_type, 0, page_count, pages_per_lease)
+
+    backend = scraper.create_backend(scraper.backend if scraper.backend in ("selenium", "hybrid") else "http")
+    try:
+        scraper.rate_limiter.acquire()
+        page = backend.fetch_page(0)
+    finally:
+        backend.close()
+    if not page.ids:
+        return 0
+
+    last_page = scraper.max_pages
+    if page.total_count is not None:
+        last_page = math.ceil(page.total_count / scraper.page_size)
+        if scraper.max_pages is not None:
+            last_page = min(last_page, scraper.max_pages)
+    elif not page.has_next:
+        last_page = 1
+    # Without a known size the listing is walked by a single worker
+    return queue.add_page_ranges(scraper_type, 0, last_page, pages_per_lease)
+
+
+def plan_reports(queue, enricher, batch_size=100, refresh=False):
+    """Queue the reports that need metadata in batches"""
+    return queue.add_batches("reports", enricher.category, enricher.pending_ids(refresh), batch_size)
+
+
+def work_on(lease, create_scraper, enricher, scrapers, queue=None):
+    """Do the work of one lease and return how many links or reports it stored"""
+    if lease.kind == "pages":
+        if lease.category not in scrapers:
+            scrapers[lease.category] = create_scraper(lease.category)
+            page_count = queue.page_count(lease.category) if queue is not None else None
+            if page_count is not None:
+                scrapers[lease.category].page_count = page_count
+        return scrapers[lease.category].scrape_range(lease.start, lease.end)
+    if lease.kind == "reports":
+        if enricher is None:
+            raise ValueError("This worker has no report enricher")
+        counts = asyncio.run(enricher.enrich_async(lease.items))
+        if counts["failed"]:
+            logger.warning(f"{counts['failed']} reports of {lease} could not be fetched")
+        return counts["updated"]
+    raise ValueError(f"Unknown lease kind: {lease.kind}")
+
+
+def run_worker(queue, worker_id, create_scraper, enricher=None, wait=True, poll_interval=5):
+    """Claim and work on leases and return how many were completed
+
+    ``create_scraper`` builds a scraper for a scraper type such as "cve". With
+    ``wait`` the worker keeps polling until the coordinator marks the queue
+    finished, so it picks up work queued later and takes over leases that
+    expire; otherwise it stops as soon as nothing is left to claim.
+    """
+    scrapers = {}
+    completed = 0
+    while True:
+        lease = queue.claim(worker_id)
+        if lease is None:
+            if not wait or queue.is_finished():
+                break
+            time.sleep(poll_interval)
+            continue
+
+        print(f"{worker_id}: working on {lease}")
+        try:
+            with Heartbeat(queue, lease) as heartbeat:
+                result = work_on(lease, create_scraper, enricher, scrapers, queue)
+        except Exception as e:
+            logger.error(f"{lease} failed: {e}")
+            queue.fail(lease, e)
+            continue
+        if heartbeat.lost:
+            # Another worker owns the lease now and will store its own result
+            logger.warning(f"Dropping the result of {lease}, its lease was lost")
+            continue
+        queue.complete(lease, result)
+        completed += 1
+        print(f"{worker_id}: finished {lease}, {result} new")
+    return completed
+
+
+def wait_for_queue(queue, poll_interval=10):
+    """Print the queue's progress until every lease is done or failed"""
+    while True:
+        counts = queue.counts()
+        print("Leases: " + ", ".join(f"{status} {count}" for status, count in sorted(counts.items())))
+        if not counts.get("pending") and not counts.get("leased"):
+            return counts
+        time.sleep(poll_interval)
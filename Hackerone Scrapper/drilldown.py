@@ -0,0 +1,114 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+from tqdm import tqdm
+from fetch_backend import (HACKTIVITY_SEARCH_QUERY, FetchError, HttpBackend, find_total_count, hacktivity_report_ids,
+                           hacktivity_variables, has_next_page, request_key)
+
+logger = logging.getLogger("Drilldown")
+
+# Hacktivity searches listing the disclosed reports filed under a CVE or CWE
+QUERY_TEMPLATES = {
+    "CVE": 'disclosed:true AND cve_ids:("{item_id}")',
+    "CWE": 'disclosed:true AND cwe:("{item_id}")',
+}
+
+
+class DrilldownCrawler:
+    """Map every stored CVE or CWE to the disclosed reports filed under it
+
+    The reports of an identifier come from the hacktivity search, paged with
+    ``page_size`` results per request. ``concurrency`` identifiers are
+    crawled at once through the scraper's HTTP backend, so the requests share
+    its rate limiter, response cache and retries. The discovery listing
+    already shows each identifier's report count; when it equals the listed
+    count stored by the last run, the identifier is skipped without any
+    request. Otherwise the first page of its search is fetched, and the
+    identifier is still skipped if the search total equals the stored one.
+    The two counts need not agree, so each is only compared with its own
+    baseline.
+    """
+
+    def __init__(self, scraper, edge_store, concurrency=8, page_size=100):
+        self.scraper = scraper
+        self.category = scraper.category_name
+        if self.category not in QUERY_TEMPLATES:
+            raise ValueError(f"Drill-down is not supported for {self.category}")
+        self.edge_store = edge_store
+        self.concurrency = concurrency
+        self.page_size = page_size
+        self.backend = HttpBackend(scraper, record_dir=scraper.record_dir)
+        # One pooled connection per concurrent identifier
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=concurrency)
+        scraper.session.mount("https://", adapter)
+        scraper.session.mount("http://", adapter)
+
+    def identifiers(self):
+        """IDs of the stored discovery links, in upper case"""
+        item_ids = (row["item_id"] for row in self.scraper.link_store.rows(self.category))
+        return list(dict.fromkeys(item_id.upper() for item_id in item_ids if item_id))
+
+    def search_payload(self, item_id, page_index):
+        """GraphQL request for one page of an identifier's reports"""
+        query_string = QUERY_TEMPLATES[self.category].format(item_id=item_id)
+        return {
+            "operationName": "HacktivitySearchQuery",
+            "query": HACKTIVITY_SEARCH_QUERY,
+            "variables": hacktivity_variables(query_string, page_index, self.page_size),
+        }
+
+    def fetch(self, item_id, page_index):
+        """Fetch one page of an identifier's reports, taking a rate limit token unless it is cached"""
+        payload = self.search_payload(item_id, page_index)
+        cache = self.scraper.response_cache
+        key = request_key("POST", self.scraper.graphql_url, payload)
+        if cache is None or not cache.contains(key, self.scraper.cache_ttl):
+            self.scraper.rate_limiter.acquire()
+        return self.backend.post_json(self.scraper.graphql_url, payload)
+
+    def crawl(self, item_id, refresh=False, listed_count=None):
+        """Store the reports of one identifier and return "updated" or "unchanged" """
+        if not refresh and listed_count is not None and \
+                listed_count == self.edge_store.listed_count(self.category, item_id):
+            self.edge_store.touch(self.category, item_id)
+            return "unchanged"
+
+        data = self.fetch(item_id, 0)
+        total_count = find_total_count(data)
+        known_count = self.edge_store.report_count(self.category, item_id)
+        if not refresh and total_count is not None and total_count == known_count:
+            # Keep the new listed count as the baseline for the next run
+            self.edge_store.touch(self.category, item_id, listed_count)
+            return "unchanged"
+
+        page_index = 0
+        page_ids = hacktivity_report_ids(data)
+        report_ids = list(page_ids)
+        while page_ids and has_next_page(page_index, self.page_size, page_ids, total_count):
+            page_index += 1
+            page_ids = hacktivity_report_ids(self.fetch(item_id, page_index))
+            report_ids.extend(page_ids)
+        self.edge_store.replace(self.category, item_id, report_ids, total_count, listed_count)
+        return "updated"
+
+    def run(self, refresh=False):
+        """Drill down into every stored identifier and return the result counts"""
+        item_ids = self.identifiers()
+        listed_counts = self.scraper.link_store.report_counts(self.category)
+        print(f"Drilling down into {len(item_ids)} {self.category} identifiers")
+        counts = {"updated": 0, "unchanged": 0, "failed": 0}
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor, \
+                tqdm(total=len(item_ids), desc=f"Drilling down {self.category}", unit="id",
+                     position=self.scraper.progress_position) as pbar:
+            futures = {executor.submit(self.crawl, item_id, refresh, listed_counts.get(item_id)): item_id
+                       for item_id in item_ids}
+            for future in as_completed(futures):
+                try:
+                    counts[future.result()] += 1
+                except FetchError as e:
+                    logger.warning(f"Could not drill down into {futures[future]}: {e}")
+                    counts["failed"] += 1
+                pbar.update(1)
+        print(f"{self.category} identifiers updated: {counts['updated']}, unchanged: {counts['unchanged']}, "
+              f"failed: {counts['failed']}")
+        return counts
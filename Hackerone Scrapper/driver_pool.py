@@ -0,0 +1,242 @@
+import os
+import time
+import atexit
+import signal
+import logging
+import threading
+
+logger = logging.getLogger("DriverPool")
+
+
+def process_tree(pid):
+    """Return the PIDs of a process and all of its descendants (Linux only)"""
+    children = {}
+    try:
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # The command name may contain spaces, so split after it
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(ppid, []).append(int(entry))
+    except OSError:
+        return [pid]
+
+    tree = [pid]
+    for current in tree:
+        tree.extend(children.get(current, []))
+    return tree
+
+
+def process_tree_rss(pid):
+    """Return the resident memory in MB of a process tree, or None if unknown"""
+    total_kb = 0
+    found = False
+    for child in process_tree(pid):
+        try:
+            with open(f"/proc/{child}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        found = True
+                        break
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024 if found else None
+
+
+def driver_pid(driver):
+    """Return the PID of the chromedriver process behind a driver, if any"""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+class PooledDriver:
+    """Bookkeeping for a browser owned by the pool"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created = time.time()
+        self.pid = driver_pid(driver)
+        self.baseline_rss = None
+
+
+class DriverPool:
+    """Pool of warm WebDrivers shared by every scraper and page worker in a run
+
+    Drivers are leased and returned instead of being created and quit for
+    every scrape. Idle drivers are health checked before they are handed out,
+    and a driver is recycled once it has served ``max_pages`` pages or its
+    process tree has grown by more than ``max_memory_growth_mb``.
+    """
+
+    def __init__(self, factory, max_size=4, max_pages=200, max_memory_growth_mb=500):
+        self.factory = factory
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.max_memory_growth_mb = max_memory_growth_mb
+        self.idle = []
+        self.leased = {}
+        self.condition = threading.Condition()
+        self.closed = False
+        atexit.register(self.close)
+
+    @property
+    def size(self):
+        """Number of drivers currently owned by the pool"""
+        return len(self.idle) + len(self.leased)
+
+    def lease(self, timeout=None):
+        """Lease a healthy driver, starting a new one if the pool has room"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            pooled = None
+            with self.condition:
+                while True:
+                    if self.closed:
+                        raise RuntimeError("Driver pool is closed")
+                    if self.idle:
+                        # Reserve the idle driver; it is checked outside the lock
+                        pooled = self.idle.pop()
+                        self.leased[id(pooled.driver)] = pooled
+                        break
+                    if self.max_size is None or self.size < self.max_size:
+                        # Reserve the slot while the browser starts outside the lock
+                        placeholder = object()
+                        self.leased[id(placeholder)] = placeholder
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("Timed out waiting for a free driver")
+                    self.condition.wait(remaining)
+            if pooled is None:
+                break
+            # A hung browser only holds up this lease, not every other lease and release
+            if self.is_healthy(pooled):
+                return pooled.driver
+            with self.condition:
+                self.leased.pop(id(pooled.driver), None)
+                self.condition.notify()
+            self.discard(pooled)
+
+        try:
+            pooled = PooledDriver(self.factory())
+        except Exception:
+            with self.condition:
+                self.leased.pop(id(placeholder), None)
+                self.condition.notify()
+            raise
+        pooled.baseline_rss = self.rss(pooled)
+        with self.condition:
+            self.leased.pop(id(placeholder), None)
+            if self.closed:
+                self.discard(pooled)
+                raise RuntimeError("Driver pool is closed")
+            self.leased[id(pooled.driver)] = pooled
+        logger.debug(f"Started driver {pooled.pid} ({self.size} in pool)")
+        return pooled.driver
+
+    def release(self, driver, healthy=True):
+        """Return a leased driver, discarding it if it is broken or due for recycling"""
+        with self.condition:
+            pooled = self.leased.get(id(driver))
+        if pooled is None:
+            return
+        # Reading the memory of the process tree can be slow, so it happens outside the lock
+        recycle = healthy and self.needs_recycle(pooled)
+        with self.condition:
+            if self.leased.pop(id(driver), None) is None:
+                # The pool was closed meanwhile and has quit the driver
+                return
+            keep = healthy and not recycle and not self.closed
+            if keep:
+                self.idle.append(pooled)
+            self.condition.notify()
+        if not keep:
+            # Quitting can take a while, so do it outside the lock
+            self.discard(pooled)
+
+    def page_done(self, driver):
+        """Count a page served by a driver and return True if it should be recycled"""
+        with self.condition:
+            pooled = self.leased.get(id(driver))
+            if pooled is None:
+                return False
+            pooled.pages += 1
+        # Reading the memory of the process tree can be slow, so it happens outside the lock
+        return self.needs_recycle(pooled)
+
+    def needs_recycle(self, pooled):
+        """Check the page count and memory growth of a driver"""
+        if self.max_pages and pooled.pages >= self.max_pages:
+            return True
+        if self.max_memory_growth_mb and pooled.baseline_rss is not None:
+            rss = self.rss(pooled)
+            if rss is not None and rss - pooled.baseline_rss > self.max_memory_growth_mb:
+                logger.info(f"Recycling driver {pooled.pid}: memory grew to {rss:.0f} MB")
+                return True
+        return False
+
+    def rss(self, pooled):
+        """Resident memory of the driver and its browser processes in MB"""
+        return process_tree_rss(pooled.pid) if pooled.pid else None
+
+    def is_healthy(self, pooled):
+        """Check that an idle driver still responds"""
+        try:
+            pooled.driver.execute_script("return 1")
+            return True
+        except Exception as e:
+            logger.warning(f"Driver {pooled.pid} failed its health check: {e}")
+            return False
+
+    def discard(self, pooled):
+        """Quit a driver and kill anything it left behind"""
+        # Collect the process tree first, quit() reaps the direct children
+        pids = process_tree(pooled.pid)[1:] if pooled.pid else []
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.debug(f"Error quitting driver {pooled.pid}: {e}")
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except (OSError, AttributeError):
+                pass
+
+    def close(self):
+        """Quit every idle and leased driver"""
+        with self.condition:
+            self.closed = True
+            pooled_drivers = self.idle + [p for p in self.leased.values() if isinstance(p, PooledDriver)]
+            self.idle = []
+            self.leased = {}
+            self.condition.notify_all()
+        for pooled in pooled_drivers:
+            self.discard(pooled)
+
+
+_shared_pools = {}
+_shared_pool_options = {}
+_shared_pool_lock = threading.Lock()
+
+
+def configure_shared_driver_pool(**kwargs):
+    """Set the DriverPool options used when the shared pools are created"""
+    _shared_pool_options.update(kwargs)
+
+
+def shared_driver_pool(factory, name="full"):
+    """Return the process-wide driver pool of a kind of browser, such as a profile, creating it on first use"""
+    with _shared_pool_lock:
+        pool = _shared_pools.get(name)
+        if pool is None or pool.closed:
+            # Browsers started with different options cannot stand in for each other, so each kind has its own pool
+            pool = _shared_pools[name] = DriverPool(factory, **_shared_pool_options)
+        return pool
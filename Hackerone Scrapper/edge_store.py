@@ -0,0 +1,145 @@
+import os
+import csv
+import sqlite3
+import threading
+from link_store import utc_now
+
+EDGE_COLUMNS = ("category", "item_id", "report_id", "first_seen")
+
+
+class EdgeStore:
+    """SQLite table mapping each CVE and CWE to the reports filed under it
+
+    Next to the edges it keeps two counts of every identifier as of its last
+    drill-down: the total of its report search and the count the discovery
+    listing showed. A later run skips an identifier when either count is the
+    same as before, each compared only with its own baseline.
+    """
+
+    def __init__(self, path, wal=True):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS edges (
+                category TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                report_id TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                PRIMARY KEY (category, item_id, report_id)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS edges_report ON edges (report_id)")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS identifiers (
+                category TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                report_count INTEGER,
+                checked_at TEXT NOT NULL,
+                listed_count INTEGER,
+                PRIMARY KEY (category, item_id)
+            )
+        """)
+        # Stores created before the listed count was kept lack its column
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(identifiers)")}
+        if "listed_count" not in columns:
+            self.conn.execute("ALTER TABLE identifiers ADD COLUMN listed_count INTEGER")
+        self.conn.commit()
+
+    def report_count(self, category, item_id):
+        """Search total of an identifier at its last drill-down, or None if it was never crawled"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT report_count FROM identifiers WHERE category = ? AND item_id = ?", (category, item_id)
+            ).fetchone()
+        return row[0] if row else None
+
+    def listed_count(self, category, item_id):
+        """Count the discovery listing showed for an identifier at its last drill-down, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT listed_count FROM identifiers WHERE category = ? AND item_id = ?", (category, item_id)
+            ).fetchone()
+        return row[0] if row else None
+
+    def touch(self, category, item_id, listed_count=None):
+        """Record that an identifier was checked and its search total has not changed"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE identifiers SET checked_at = ?, listed_count = COALESCE(?, listed_count) "
+                "WHERE category = ? AND item_id = ?",
+                (utc_now(), listed_count, category, item_id),
+            )
+
+    def replace(self, category, item_id, report_ids, report_count=None, listed_count=None):
+        """Make the stored edges of an identifier match ``report_ids`` and return how many are new"""
+        now = utc_now()
+        report_ids = [str(report_id) for report_id in report_ids]
+        with self.lock, self.conn:
+            known = {row[0] for row in self.conn.execute(
+                "SELECT report_id FROM edges WHERE category = ? AND item_id = ?", (category, item_id))}
+            current = set(report_ids)
+            self.conn.executemany(
+                "DELETE FROM edges WHERE category = ? AND item_id = ? AND report_id = ?",
+                [(category, item_id, report_id) for report_id in known - current],
+            )
+            new_ids = [report_id for report_id in dict.fromkeys(report_ids) if report_id not in known]
+            self.conn.executemany(
+                "INSERT INTO edges (category, item_id, report_id, first_seen) VALUES (?, ?, ?, ?)",
+                [(category, item_id, report_id, now) for report_id in new_ids],
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO identifiers (category, item_id, report_count, checked_at, listed_count) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (category, item_id, report_count if report_count is not None else len(current), now, listed_count),
+            )
+        return len(new_ids)
+
+    def reports_for(self, category, item_id):
+        """Report IDs filed under an identifier"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT report_id FROM edges WHERE category = ? AND item_id = ? ORDER BY rowid", (category, item_id)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self, category=None):
+        """Number of stored edges, for one category or all of them"""
+        with self.lock:
+            if category is None:
+                return self.conn.execute("SELECT COUNT(*) FROM edges").fetchone()[0]
+            return self.conn.execute("SELECT COUNT(*) FROM edges WHERE category = ?", (category,)).fetchone()[0]
+
+    def rows(self, category=None):
+        """Yield every edge as a dict"""
+        query = f"SELECT {', '.join(EDGE_COLUMNS)} FROM edges"
+        params = ()
+        if category is not None:
+            query += " WHERE category = ?"
+            params = (category,)
+        with self.lock:
+            rows = self.conn.execute(query + " ORDER BY category, item_id, rowid", params).fetchall()
+        for row in rows:
+            yield dict(zip(EDGE_COLUMNS, row))
+
+    def write_csv(self, path, category=None):
+        """Write the edges to a CSV file and return the number of rows"""
+        count = 0
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=EDGE_COLUMNS)
+            writer.writeheader()
+            for row in self.rows(category):
+                writer.writerow(row)
+                count += 1
+        os.replace(tmp_path, path)
+        return count
+
+    def close(self):
+        """Close the database connection"""
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,224 @@
+import os
+import gzip
+import json
+import time
+from datetime import datetime, timezone
+
+# Columns of every export, in order
+COLUMNS = ("category", "id", "url", "first_seen", "page_index")
+
+# Rows written per Parquet row group / Arrow record batch
+BATCH_SIZE = 50000
+
+
+class ExportError(Exception):
+    """Raised when an export format cannot be written"""
+
+
+def export_rows(link_store, category=None):
+    """Yield the stored links as export rows"""
+    for row in link_store.rows(category):
+        yield {
+            "category": row["category"],
+            "id": row["item_id"],
+            "url": row["url"],
+            "first_seen": row["first_seen"],
+            "page_index": row["page_index"],
+        }
+
+
+def batches(rows, size=BATCH_SIZE):
+    """Group rows into lists of at most ``size``"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def parse_timestamp(value):
+    """Convert a stored ISO 8601 UTC timestamp to a datetime"""
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+
+class Exporter:
+    """Write export rows to a file in one format"""
+
+    extension = ""
+
+    def write(self, rows, path):
+        """Write every row to ``path`` and return the number of rows"""
+        raise NotImplementedError("Exporters must implement write")
+
+
+class JsonLinesExporter(Exporter):
+    """One JSON object per line"""
+
+    extension = ".jsonl"
+
+    def open(self, path):
+        """Open the output file for writing text"""
+        return open(path, "w", encoding="utf-8")
+
+    def write(self, rows, path):
+        """Write every row as a line of JSON"""
+        count = 0
+        with self.open(path) as f:
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+                count += 1
+        return count
+
+
+class GzipJsonLinesExporter(JsonLinesExporter):
+    """gzip-compressed JSON Lines"""
+
+    extension = ".jsonl.gz"
+
+    def open(self, path):
+        """Open a gzip stream for writing text"""
+        return gzip.open(path, "wt", encoding="utf-8")
+
+
+class ZstdJsonLinesExporter(JsonLinesExporter):
+    """zstd-compressed JSON Lines, needs the zstandard package"""
+
+    extension = ".jsonl.zst"
+
+    def open(self, path):
+        """Open a zstd stream for writing text"""
+        try:
+            import zstandard
+        except ImportError:
+            raise ExportError("zstd export needs the zstandard package: pip install zstandard")
+        return zstandard.open(path, "wt", encoding="utf-8")
+
+
+class ArrowExporter(Exporter):
+    """Arrow IPC file with typed columns, needs the pyarrow package"""
+
+    extension = ".arrow"
+
+    def schema(self, pa):
+        """Column types of the export"""
+        return pa.schema([
+            ("category", pa.string()),
+            ("id", pa.string()),
+            ("url", pa.string()),
+            ("first_seen", pa.timestamp("s", tz="UTC")),
+            ("page_index", pa.int32()),
+        ])
+
+    def import_pyarrow(self):
+        """Import pyarrow or explain how to install it"""
+        try:
+            import pyarrow
+        except ImportError:
+            raise ExportError(f"{self.extension} export needs the pyarrow package: pip install pyarrow")
+        return pyarrow
+
+    def record_batch(self, pa, schema, batch):
+        """Convert a list of rows to an Arrow record batch"""
+        for row in batch:
+            row["first_seen"] = parse_timestamp(row["first_seen"])
+        return pa.RecordBatch.from_pylist(batch, schema=schema)
+
+    def open_writer(self, path, schema):
+        """Create the writer for the output file"""
+        import pyarrow.ipc
+        return pyarrow.ipc.new_file(path, schema)
+
+    def write(self, rows, path):
+        """Write the rows in record batches so memory use stays bounded"""
+        pa = self.import_pyarrow()
+        schema = self.schema(pa)
+        count = 0
+        writer = self.open_writer(path, schema)
+        try:
+            for batch in batches(rows):
+                writer.write_batch(self.record_batch(pa, schema, batch))
+                count += len(batch)
+        finally:
+            writer.close()
+        return count
+
+
+class ParquetExporter(ArrowExporter):
+    """zstd-compressed Parquet with typed columns, needs the pyarrow package"""
+
+    extension = ".parquet"
+
+    def open_writer(self, path, schema):
+        """Create a Parquet writer with one row group per batch"""
+        import pyarrow.parquet
+        return pyarrow.parquet.ParquetWriter(path, schema, compression="zstd")
+
+
+EXPORTERS = {
+    "jsonl": JsonLinesExporter,
+    "jsonl.gz": GzipJsonLinesExporter,
+    "jsonl.zst": ZstdJsonLinesExporter,
+    "arrow": ArrowExporter,
+    "parquet": ParquetExporter,
+}
+
+
+def metadata_path(path):
+    """Sidecar file holding the row counts of an export"""
+    return f"{path}.meta.json"
+
+
+def read_metadata(path):
+    """Return the metadata written next to an export, or None"""
+    try:
+        with open(metadata_path(path), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def count_rows(path):
+    """Number of rows in an export, read from its metadata instead of the file"""
+    metadata = read_metadata(path)
+    return metadata["rows"] if metadata else None
+
+
+def export_links(link_store, directory, fmt, name="links", category=None):
+    """Export the link store in a format from EXPORTERS and return the file written"""
+    if fmt not in EXPORTERS:
+        raise ExportError(f"Unknown export format {fmt!r}, choose from {', '.join(EXPORTERS)}")
+    exporter = EXPORTERS[fmt]()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name}{exporter.extension}")
+
+    categories = {}
+    def counted(rows):
+        for row in rows:
+            categories[row["category"]] = categories.get(row["category"], 0) + 1
+            yield row
+
+    # Write to a temporary file so readers never see a half written export
+    tmp_path = f"{path}.tmp"
+    try:
+        rows = exporter.write(counted(export_rows(link_store, category)), tmp_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    os.replace(tmp_path, path)
+
+    metadata = {
+        "format": fmt,
+        "rows": rows,
+        "categories": categories,
+        "columns": list(COLUMNS),
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    with open(metadata_path(path), "w") as f:
+        json.dump(metadata, f, indent=2)
+    return path
@@ -0,0 +1,540 @@
+import os
+import re
+import json
+import time
+import hashlib
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+from readiness import wait_until_ready
+from async_client import AsyncHttpClient
+from network_capture import NetworkCapture
+from metrics import CACHE_LOOKUPS, EXTRACT_SECONDS, FETCH_SECONDS, RENDER_WAIT_SECONDS, RETRIES, timed
+
+# GraphQL query issued by the hacktivity overview page for its report listing
+HACKTIVITY_SEARCH_QUERY = """query HacktivitySearchQuery($queryString: String!, $from: Int, $size: Int, $sort: SortInput!) {
+  search(index: CompleteHacktivityReportIndex, query_string: $queryString, from: $from, size: $size, sort: $sort) {
+    total_count
+    nodes {
+      ... on HacktivityDocument {
+        _id
+        cve_ids
+        cwe
+        severity_rating
+        latest_disclosable_activity_at
+        disclosed_at
+        team { handle }
+        report { databaseId: _id title url }
+      }
+    }
+  }
+}"""
+
+
+# Headers of every GraphQL request
+JSON_HEADERS = {"Accept": "application/json", "Content-Type": "application/json"}
+
+
+class FetchError(Exception):
+    """Raised when a backend cannot fetch or decode a listing page"""
+
+
+class PageResult:
+    """IDs found on a single listing page"""
+
+    def __init__(self, ids, total_count=None, has_next=False, activity_at=None, fingerprint=None, unchanged=False,
+                 report_counts=None, report_dates=None):
+        self.ids = ids
+        self.total_count = total_count
+        self.has_next = has_next
+        # Newest activity timestamp on the page, when the backend can see it
+        self.activity_at = activity_at
+        # Hash of the page's content, and whether it matched the one stored by the last crawl
+        self.fingerprint = fingerprint
+        self.unchanged = unchanged
+        # Number of reports the listing shows for each ID, when it shows one
+        self.report_counts = report_counts
+        # Date the listing gives for each ID, such as when a report was disclosed
+        self.report_dates = report_dates
+
+    def __repr__(self):
+        return f"PageResult(ids={len(self.ids)}, total_count={self.total_count}, has_next={self.has_next})"
+
+
+def request_key(method, url, body=None):
+    """Return a stable key for a request, including the scheme and host it was sent to"""
+    parts = urlsplit(url)
+    # Responses from a fixture or synthetic server must never be served for the real site
+    target = f"{parts.scheme}://{parts.netloc.lower()}" if parts.netloc else ""
+    path = target + parts.path + (f"?{parts.query}" if parts.query else "")
+    if body is not None and not isinstance(body, str):
+        body = json.dumps(body, sort_keys=True)
+    raw = f"{method.upper()} {path}\n{body or ''}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def payload_fingerprint(data):
+    """Hash a GraphQL response, leaving out the listing's total, which changes whenever any page does"""
+    def strip(value):
+        if isinstance(value, dict):
+            return {k: strip(v) for k, v in value.items() if k != "total_count"}
+        if isinstance(value, list):
+            return [strip(v) for v in value]
+        return value
+    return hashlib.sha1(json.dumps(strip(data), sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def ids_fingerprint(ids):
+    """Hash the ID sequence of a page"""
+    return hashlib.sha1("\n".join(ids).encode("utf-8")).hexdigest()
+
+
+def parse_retry_after(value):
+    """Convert a Retry-After header (seconds or an HTTP date) to seconds, or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def iter_json(data):
+    """Yield every (key, value) pair in a decoded JSON document, depth first"""
+    if isinstance(data, dict):
+        for key, value in data.items():
+            yield key, value
+            yield from iter_json(value)
+    elif isinstance(data, list):
+        for value in data:
+            yield from iter_json(value)
+
+
+def find_total_count(data):
+    """Return the first total_count found in a GraphQL response, if any"""
+    for key, value in iter_json(data):
+        if key == "total_count" and isinstance(value, int):
+            return value
+    return None
+
+
+def find_latest_value(data, key):
+    """Return the largest value of a key anywhere in a JSON document, if any"""
+    values = [value for k, value in iter_json(data) if k == key and value]
+    return max(values) if values else None
+
+
+def unique(ids):
+    """Remove duplicate IDs while keeping the order they were found in"""
+    seen = set()
+    return [i for i in ids if not (i in seen or seen.add(i))]
+
+
+def find_pattern_ids(data, pattern):
+    """Collect every string value in a JSON document that matches a regex"""
+    regex = re.compile(pattern, re.IGNORECASE)
+    ids = []
+    for _, value in iter_json(data):
+        if isinstance(value, str):
+            ids.extend(match.upper() for match in regex.findall(value))
+    return unique(ids)
+
+
+def find_report_counts(data, pattern):
+    """Map each ID matching a regex to the reports_count of the node it was found in"""
+    regex = re.compile(pattern, re.IGNORECASE)
+    counts = {}
+    nodes = [data]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, list):
+            nodes.extend(reversed(node))
+        elif isinstance(node, dict):
+            if isinstance(node.get("reports_count"), int):
+                for field in node.values():
+                    if isinstance(field, str) and regex.fullmatch(field):
+                        counts.setdefault(field.upper(), node["reports_count"])
+            nodes.extend(reversed(list(node.values())))
+    return counts
+
+
+def hacktivity_variables(query_string, page_index, page_size):
+    """Build the variables for a hacktivity search page"""
+    return {
+        "queryString": query_string,
+        "from": page_index * page_size,
+        "size": page_size,
+        "sort": {"field": "latest_disclosable_activity_at", "direction": "DESC"},
+    }
+
+
+def hacktivity_nodes(data):
+    """Return the result nodes of a hacktivity search response"""
+    search = (data.get("data") or {}).get("search") or {}
+    return search.get("nodes") or []
+
+
+def hacktivity_report_ids(data):
+    """Return the report IDs of a hacktivity search response, in order and without duplicates"""
+    report_ids = []
+    for node in hacktivity_nodes(data):
+        report = node.get("report") or {}
+        report_id = report.get("databaseId") or report.get("_id")
+        if report_id:
+            report_ids.append(str(report_id))
+    return unique(report_ids)
+
+
+def hacktivity_report_dates(data):
+    """Map the report IDs of a hacktivity search response to their disclosure date, or latest activity"""
+    dates = {}
+    for node in hacktivity_nodes(data):
+        report = node.get("report") or {}
+        report_id = report.get("databaseId") or report.get("_id")
+        date = node.get("disclosed_at") or node.get("latest_disclosable_activity_at")
+        if report_id and date:
+            dates.setdefault(str(report_id), date)
+    return dates
+
+
+def has_next_page(page_index, page_size, ids, total_count):
+    """Decide whether another page follows, preferring the reported total"""
+    if total_count is not None:
+        return (page_index + 1) * page_size < total_count
+    return len(ids) >= page_size
+
+
+class FetchBackend:
+    """Interface for fetching one listing page at a time"""
+
+    name = "base"
+    # Whether any page can be fetched directly by its index
+    page_addressable = True
+
+    def fetch_page(self, page_index):
+        """Fetch a listing page and return a PageResult"""
+        raise NotImplementedError("Backends must implement fetch_page")
+
+    def is_cached(self, page_index):
+        """Whether a page can be served without a request, so it needs no rate limit token"""
+        return False
+
+    def close(self):
+        """Release any resources held by the backend"""
+
+    def page_result(self, page_index, data, page_size=None):
+        """Extract the IDs and paging details from a GraphQL response, reusing the stored IDs of an unchanged page"""
+        fingerprint = payload_fingerprint(data)
+        stored = self.scraper.stored_page(page_index)
+        details = {}
+        if stored is not None and stored[0] == fingerprint:
+            ids, total_count, unchanged = stored[1], find_total_count(data), True
+        else:
+            with timed(EXTRACT_SECONDS, category=self.scraper.category_name, backend=self.name):
+                parsed = self.scraper.parse_graphql(data)
+            ids, total_count = parsed[:2]
+            if len(parsed) > 2:
+                details = parsed[2]
+            unchanged = False
+        has_next = bool(ids) and has_next_page(page_index, page_size or self.scraper.page_size, ids, total_count)
+        activity_at = find_latest_value(data, "latest_disclosable_activity_at")
+        return PageResult(ids, total_count, has_next, activity_at, fingerprint, unchanged, **details)
+
+
+class HttpBackend(FetchBackend):
+    """Fetch listing pages from the GraphQL endpoint behind the hacktivity pages"""
+
+    name = "http"
+
+    def __init__(self, scraper, record_dir=None, max_retries=3, timeout=30):
+        self.scraper = scraper
+        self.session = scraper.session
+        self.record_dir = record_dir
+        self.max_retries = max_retries
+        self.timeout = timeout
+        if record_dir:
+            os.makedirs(record_dir, exist_ok=True)
+
+    def cached_response(self, key):
+        """Return the cached response for a request key, or None"""
+        cache = self.scraper.response_cache
+        if cache is None:
+            return None
+        data = cache.get(key, self.scraper.cache_ttl)
+        CACHE_LOOKUPS.inc(category=self.scraper.category_name, result="miss" if data is None else "hit")
+        return data
+
+    def check_status(self, url, status_code, retry_after, latency):
+        """Report a response to the rate limiter and reject client errors, which retrying will not fix"""
+        self.scraper.rate_limiter.observe(latency, status_code, retry_after)
+        if 400 <= status_code < 500 and status_code != 429:
+            raise FetchError(f"Request to {url} failed with status {status_code}")
+
+    def retry_failed(self, url, retries, error):
+        """Count a failed attempt, raising FetchError once the retries are used up"""
+        if retries >= self.max_retries:
+            raise FetchError(f"Request to {url} failed after {retries} attempts: {error}")
+        self.scraper.logger.debug(f"Retry {retries}/{self.max_retries} due to: {error}")
+        RETRIES.inc(category=self.scraper.category_name, backend=self.name)
+
+    def accept_response(self, key, url, payload, data):
+        """Check a decoded response for GraphQL errors, then record and cache it"""
+        if isinstance(data, dict) and data.get("errors"):
+            raise FetchError(f"GraphQL errors from {url}: {data['errors']}")
+        if self.record_dir:
+            self.record(url, payload, data)
+        if self.scraper.response_cache is not None:
+            self.scraper.response_cache.put(key, data, url, payload, self.scraper.category_name)
+        return data
+
+    def post_json(self, url, payload):
+        """POST a JSON payload and return the decoded JSON response"""
+        key = request_key("POST", url, payload)
+        category = self.scraper.category_name
+        data = self.cached_response(key)
+        if data is not None:
+            return data
+
+        retries = 0
+        while True:
+            retry_after = None
+            try:
+                start = time.monotonic()
+                with timed(FETCH_SECONDS, category=category, backend=self.name):
+                    response = self.session.post(url, json=payload, headers=JSON_HEADERS, timeout=self.timeout)
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                self.check_status(url, response.status_code, retry_after, time.monotonic() - start)
+                response.raise_for_status()
+                data = response.json()
+                break
+            except FetchError:
+                raise
+            except ValueError as e:
+                raise FetchError(f"Invalid JSON from {url}: {e}")
+            except Exception as e:
+                retries += 1
+                self.retry_failed(url, retries, e)
+                # The rate limiter has already slowed down for throttling and server errors
+                self.scraper.rate_limiter.backoff(retries, retry_after, category=category)
+                self.scraper.rate_limiter.acquire()
+
+        return self.accept_response(key, url, payload, data)
+
+    def record(self, url, payload, data):
+        """Save a request/response pair so a fixture server can replay it"""
+        path = os.path.join(self.record_dir, f"{request_key('POST', url, payload)}.json")
+        with open(path, "w") as f:
+            json.dump({"method": "POST", "url": url, "request": payload, "response": data}, f, indent=2)
+
+    def is_cached(self, page_index):
+        """Whether the response for a page is fresh in the response cache"""
+        cache = self.scraper.response_cache
+        if cache is None:
+            return False
+        key = request_key("POST", self.scraper.graphql_url, self.scraper.graphql_payload(page_index))
+        return cache.contains(key, self.scraper.cache_ttl)
+
+    def fetch_page(self, page_index):
+        """Fetch a listing page through GraphQL"""
+        data = self.post_json(self.scraper.graphql_url, self.scraper.graphql_payload(page_index))
+        return self.page_result(page_index, data)
+
+
+class AsyncHttpBackend(HttpBackend):
+    """Fetch listing pages from GraphQL in coroutines, over a connection pool shared by every page in flight"""
+
+    name = "async"
+
+    def __init__(self, scraper, record_dir=None, max_retries=3, timeout=30, limit=None):
+        super().__init__(scraper, record_dir, max_retries, timeout)
+        self.client = AsyncHttpClient(self.session.headers, limit=limit or max(1, scraper.workers), timeout=timeout)
+
+    async def post_json(self, url, payload):
+        """POST a JSON payload without blocking the event loop and return the decoded JSON response"""
+        key = request_key("POST", url, payload)
+        category = self.scraper.category_name
+        data = self.cached_response(key)
+        if data is not None:
+            return data
+
+        retries = 0
+        while True:
+            retry_after = None
+            try:
+                start = time.monotonic()
+                with timed(FETCH_SECONDS, category=category, backend=self.name):
+                    response = await self.client.post_json(url, payload, headers=JSON_HEADERS)
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                self.check_status(url, response.status_code, retry_after, time.monotonic() - start)
+                if response.status_code >= 400:
+                    raise OSError(f"Server returned status {response.status_code}")
+                data = response.json()
+                break
+            except FetchError:
+                raise
+            except ValueError as e:
+                raise FetchError(f"Invalid JSON from {url}: {e}")
+            except Exception as e:
+                retries += 1
+                self.retry_failed(url, retries, e)
+                await self.scraper.rate_limiter.backoff_async(retries, retry_after, category=category)
+                await self.scraper.rate_limiter.acquire_async()
+
+        return self.accept_response(key, url, payload, data)
+
+    async def fetch_page(self, page_index):
+        """Fetch a listing page through GraphQL"""
+        data = await self.post_json(self.scraper.graphql_url, self.scraper.graphql_payload(page_index))
+        return self.page_result(page_index, data)
+
+    async def aclose(self):
+        """Close the connection pool"""
+        await self.client.close()
+
+
+class SeleniumBackend(FetchBackend):
+    """Fetch listing pages by rendering them in a browser leased from the driver pool"""
+
+    name = "selenium"
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+        self.pool = scraper.get_driver_pool()
+        self.driver = None
+        self.current_page = None
+        # Listings without a pageIndex URL are walked with the next button
+        self.page_addressable = scraper.page_url(0) is not None
+
+    def fetch_page(self, page_index):
+        """Render a listing page and extract its IDs"""
+        if self.driver is None:
+            self.driver = self.pool.lease()
+            self.current_page = None
+
+        try:
+            self.before_navigation()
+            url = self.scraper.page_url(page_index)
+            if url is not None:
+                self.load(url)
+            elif not self.seek(page_index):
+                return PageResult([])
+            self.current_page = page_index
+            result = self.read_page(page_index)
+        except Exception:
+            # A browser that failed mid-page may be wedged, so do not reuse it
+            self.release(healthy=False)
+            raise
+
+        # A listing walked with the next button would be clicked through from page 0 again by a new browser,
+        # so its browser is recycled when the crawl closes the backend instead of in the middle
+        if self.pool.page_done(self.driver) and self.page_addressable:
+            self.release()
+        return result
+
+    def before_navigation(self):
+        """Prepare the browser before a page is requested"""
+
+    def read_page(self, page_index):
+        """Extract the IDs of the rendered page from the DOM"""
+        with timed(EXTRACT_SECONDS, category=self.scraper.category_name, backend=self.name):
+            ids = self.scraper.extract_page_ids(self.driver)
+            has_next = bool(ids) and self.scraper.check_next_page(self.driver)
+        # The rendered markup differs on every load, so only the extracted IDs can be compared
+        fingerprint = ids_fingerprint(ids)
+        stored = self.scraper.stored_page(page_index)
+        return PageResult(ids, has_next=has_next, fingerprint=fingerprint,
+                          unchanged=stored is not None and stored[0] == fingerprint)
+
+    def load(self, url):
+        """Navigate to a URL and wait until its listing has rendered"""
+        category = self.scraper.category_name
+        start = time.monotonic()
+        with timed(FETCH_SECONDS, category=category, backend=self.name):
+            self.driver.get(url)
+        with timed(RENDER_WAIT_SECONDS, category=category, backend=self.name):
+            wait_until_ready(self.driver, self.scraper.ready_selector)
+        # Slow renders tell the rate limiter to back off
+        self.scraper.rate_limiter.observe(time.monotonic() - start)
+
+    def seek(self, page_index):
+        """Click through the pagination until the requested page is shown"""
+        if self.current_page is None or page_index < self.current_page:
+            self.load(self.scraper.base_url)
+            self.current_page = 0
+        while self.current_page < page_index:
+            if self.current_page + 1 == page_index:
+                # Only what the final click triggers belongs to the requested page
+                self.before_navigation()
+            # Clicking through includes the render wait, so it is all counted as fetching
+            with timed(FETCH_SECONDS, category=self.scraper.category_name, backend=self.name):
+                moved = self.scraper.go_to_next_page(self.driver)
+            if not moved:
+                return False
+            self.current_page += 1
+        return True
+
+    def release(self, healthy=True):
+        """Return the browser to the pool"""
+        if self.driver is not None:
+            self.pool.release(self.driver, healthy)
+            self.driver = None
+            self.current_page = None
+
+    def close(self):
+        """Return the browser to the pool"""
+        self.release()
+
+
+class HybridBackend(SeleniumBackend):
+    """Drive a real browser but read the GraphQL responses the page fetches for itself
+
+    The browser logs its network events (see ``NetworkCapture``), so the
+    listing's own query comes back as JSON instead of being scraped from the
+    DOM: there is no render wait and no stale element to retry, and the total
+    count and activity dates come along at no extra request. A page whose
+    query never shows up in the log falls back to DOM extraction.
+    """
+
+    name = "hybrid"
+
+    def __init__(self, scraper, capture_timeout=10):
+        super().__init__(scraper)
+        self.capture_timeout = capture_timeout
+        self.capture = None
+        self.started = None
+
+    def before_navigation(self):
+        """Start listening to the network before the page sends its query, forgetting earlier requests"""
+        self.capture = NetworkCapture(self.driver)
+        self.capture.start()
+        self.started = time.monotonic()
+
+    def load(self, url):
+        """Navigate to a URL without waiting for the listing to render"""
+        with timed(FETCH_SECONDS, category=self.scraper.category_name, backend=self.name):
+            self.driver.get(url)
+
+    def read_page(self, page_index):
+        """Read the IDs from the page's own GraphQL response, or from the DOM if it was not captured"""
+        operation = self.scraper.graphql_payload(page_index)["operationName"]
+
+        def is_this_page(variables):
+            # Pages may use their own page size, so check the offset against it; without an offset
+            # there is no telling which page a response belongs to
+            size = variables.get("size") or self.scraper.page_size
+            return "from" in variables and variables["from"] == page_index * size
+
+        with timed(RENDER_WAIT_SECONDS, category=self.scraper.category_name, backend=self.name):
+            data, variables = self.capture.wait_for_operation(operation, is_this_page, self.capture_timeout)
+        if data is None:
+            self.scraper.logger.warning(f"No {operation} response captured for page {page_index}, reading the DOM")
+            with timed(RENDER_WAIT_SECONDS, category=self.scraper.category_name, backend=self.name):
+                wait_until_ready(self.driver, self.scraper.ready_selector)
+            return super().read_page(page_index)
+        # Slow responses tell the rate limiter to back off
+        self.scraper.rate_limiter.observe(time.monotonic() - self.started)
+        return self.page_result(page_index, data, variables.get("size"))
@@ -0,0 +1,209 @@
+import os
+import json
+import time
+import threading
+from urllib.parse import parse_qs, urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from fetch_backend import request_key
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Serve recorded responses matched by request key"""
+
+    def do_GET(self):
+        """Replay a recorded GET request"""
+        self.replay(None)
+
+    def do_POST(self):
+        """Replay a recorded POST request"""
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8")
+        try:
+            body = json.loads(body)
+        except ValueError:
+            pass
+        self.replay(body)
+
+    def replay(self, body):
+        """Look up the recording for this request and send it back"""
+        key = request_key(self.command, self.path, body)
+        recording = self.server.recordings.get(key)
+        self.server.requests.append((self.command, self.path, body))
+        if recording is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        headers = recording.get("headers", {})
+        if recording.get("fail_first", 0) > 0:
+            # Simulate a transient server error before the recorded response
+            recording["fail_first"] -= 1
+            self.send_response(recording.get("fail_status", 503))
+            if recording.get("retry_after") is not None:
+                self.send_header("Retry-After", str(recording["retry_after"]))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if headers.get("ETag") and self.headers.get("If-None-Match") == headers["ETag"]:
+            self.send_response(304)
+            self.send_header("ETag", headers["ETag"])
+            self.end_headers()
+            return
+
+        payload = json.dumps(recording["response"]).encode("utf-8")
+        self.send_response(recording.get("status", 200))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        """Keep test output quiet"""
+
+
+class FixtureServer:
+    """Local HTTP server that replays responses recorded by HttpBackend"""
+
+    def __init__(self, record_dir=None, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), ReplayHandler)
+        self.httpd.recordings = {}
+        self.httpd.requests = []
+        self.thread = None
+        if record_dir:
+            self.load(record_dir)
+
+    @property
+    def url(self):
+        """Base URL of the running server"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self):
+        """Requests received so far as (method, path, body) tuples"""
+        return self.httpd.requests
+
+    def load(self, record_dir):
+        """Load every recording from a directory"""
+        for name in sorted(os.listdir(record_dir)):
+            if name.endswith(".json"):
+                with open(os.path.join(record_dir, name)) as f:
+                    self.add(json.load(f))
+
+    def add(self, recording):
+        """Register a single recording"""
+        # Recordings are replayed whatever host they were made against, so they are matched by path alone
+        parts = urlsplit(recording["url"])
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        key = request_key(recording["method"], path, recording.get("request"))
+        self.httpd.recordings[key] = recording
+
+    def start(self):
+        """Start serving in a background thread"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# Content type and size of the assets referenced by synthetic listing pages, by file extension
+SYNTHETIC_ASSETS = {"png": ("image/png", 20 * 1024), "css": ("text/css", 60 * 1024), "woff2": ("font/woff2", 40 * 1024)}
+
+
+class SyntheticHandler(ReplayHandler):
+    """Generate hacktivity, CVE and CWE pages on the fly instead of replaying recordings"""
+
+    def do_GET(self):
+        """Serve a rendered hacktivity listing page or one of its assets"""
+        self.server.requests.append((self.command, self.path, None))
+        self.server.delay()
+        parts = urlsplit(self.path)
+        if parts.path.startswith("/assets/"):
+            extension = parts.path.rsplit(".", 1)[-1]
+            content_type, size = SYNTHETIC_ASSETS.get(extension, ("application/octet-stream", 1024))
+            self.send_body(content_type, b"\0" * size)
+            return
+        query = parse_qs(parts.query)
+        page_index = int(query.get("pageIndex", ["0"])[0])
+        disclosed = "disclosed:true" in query.get("queryString", [""])[0]
+        links = []
+        for number in self.server.page_numbers(page_index):
+            # Every item carries an avatar, like the real listing
+            avatar = f'<img src="/assets/avatar{number}.png">'
+            if disclosed:
+                links.append(f'{avatar}<a href="https://hackerone.com/reports/{number}">Report {number}</a>')
+            else:
+                links.append(f'{avatar}<a href="https://hackerone.com/program{number}">Program {number}</a>')
+        head = '<link rel="stylesheet" href="/assets/site.css"><link rel="preload" as="font" href="/assets/site.woff2">'
+        # Like the real listing, the page also fetches its items from GraphQL
+        size = self.server.page_size
+        listing_query = {"operationName": "HacktivitySearchQuery", "variables": {
+            "queryString": query.get("queryString", [""])[0], "from": page_index * size, "size": size}}
+        script = (f"<script>fetch('/graphql', {{method: 'POST', headers: {{'Content-Type': 'application/json'}}, "
+                  f"body: JSON.stringify({json.dumps(listing_query)})}});</script>")
+        body = f"<html><head>{head}</head><body>{''.join(links)}{script}</body></html>"
+        self.send_body("text/html", body.encode("utf-8"))
+
+    def do_POST(self):
+        """Answer a GraphQL listing query"""
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length).decode("utf-8") or "{}")
+        self.server.requests.append((self.command, self.path, body))
+        self.server.delay()
+        variables = body.get("variables") or {}
+        size = variables.get("size", self.server.page_size)
+        page_index = variables.get("from", 0) // max(1, size)
+        numbers = self.server.page_numbers(page_index)
+        total = self.server.total_items
+
+        operation = body.get("operationName")
+        if operation == "CveDiscoveryQuery":
+            data = {"cve_discovery": {"total_count": total, "nodes": [
+                {"cve_id": f"CVE-2024-{number:05d}", "reports_count": number % 7} for number in numbers]}}
+        elif operation == "CweDiscoveryQuery":
+            data = {"cwe_discovery": {"total_count": total, "nodes": [
+                {"cwe_id": f"CWE-{number}", "name": f"Weakness {number}", "reports_count": number % 7}
+                for number in numbers]}}
+        else:
+            data = {"search": {"total_count": total, "nodes": [
+                {"_id": f"item-{number}", "report": {"databaseId": str(number)},
+                 "latest_disclosable_activity_at": "2024-01-01T00:00:00Z"} for number in numbers]}}
+        self.send_body("application/json", json.dumps({"data": data}).encode("utf-8"))
+
+    def send_body(self, content_type, payload):
+        """Send a 200 response"""
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class SyntheticServer(FixtureServer):
+    """Local stand-in for HackerOne serving ``pages`` listing pages of ``page_size`` items
+
+    Every request waits ``latency`` seconds before it is answered, so
+    benchmarks can model a slow upstream without touching the real site.
+    """
+
+    def __init__(self, pages=20, page_size=25, latency=0.0, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), SyntheticHandler)
+        self.httpd.requests = []
+        self.httpd.page_size = page_size
+        self.httpd.total_items = pages * page_size
+        self.httpd.delay = lambda: time.sleep(latency) if latency else None
+        self.httpd.page_numbers = lambda page_index: [
+            number + 1 for number in range(page_index * page_size, min((page_index + 1) * page_size, pages * page_size))]
+        self.thread = None
@@ -0,0 +1,170 @@
+import os
+import re
+import sqlite3
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+IDENTIFIER_PATTERN = re.compile(r'^(CVE-\d{4}-\d+|CWE-\d+)$', re.IGNORECASE)
+
+# Fields of the report metadata that can be queried as "<field>:<value>"
+REPORT_FIELDS = ("severity", "team")
+
+
+def query_database(path, sql):
+    """Run a query on a database opened read-only, so readers never change a running crawl's files"""
+    conn = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True, timeout=30)
+    try:
+        return conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+
+def normalize_date(value):
+    """Cut an ISO 8601 timestamp down to seconds so stored dates compare as strings"""
+    return value[:19] if value else None
+
+
+def parse_since(value, now=None):
+    """Convert "30d" or "2024-01-31" to the earliest timestamp a result may have"""
+    match = re.fullmatch(r'(\d+)d', value)
+    if match:
+        now = now or datetime.now(timezone.utc)
+        return (now - timedelta(days=int(match.group(1)))).strftime("%Y-%m-%dT%H:%M:%S")
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        raise ValueError(f"Expected a number of days such as 30d or a date such as 2024-01-31, got {value!r}")
+
+
+class LinkIndex:
+    """In-memory lookups across the CVE, CWE and disclosed report datasets
+
+    Every queryable term, such as "CWE-79", "CVE-2021-44228" or
+    "severity:high", maps to a frozenset of report IDs in a dict, so a
+    lookup is one hash probe. Each term also has a posting list sorted
+    newest first when the index is built, so a query walks the shortest list
+    and checks the other sets without sorting its results. Report dates are
+    kept sorted as well, so "since:30d" is a binary search. The index is
+    built in memory from the link, edge and report stores, which are only
+    read, and then answers any number of queries.
+    """
+
+    def __init__(self):
+        self.reports_by_term = {}
+        self.terms_by_report = {}
+        self.report_dates = {}
+        self.identifiers = {"CVE": set(), "CWE": set()}
+        self.sorted_dates = []
+        self.ranked_reports = []
+        self.postings = {}
+
+    @classmethod
+    def load(cls, directory="output"):
+        """Build the index from the stores in an output directory"""
+        index = cls()
+        links_path = os.path.join(directory, "links.db")
+        if os.path.exists(links_path):
+            columns = {row[1] for row in query_database(links_path, "PRAGMA table_info(links)")}
+            date_column = "listed_at" if "listed_at" in columns else "NULL"
+            for category, item_id, listed_at in query_database(
+                    links_path, f"SELECT category, item_id, {date_column} FROM links WHERE item_id IS NOT NULL"):
+                if category == "Disclosed Reports":
+                    # Dated by the listing, never by when the link was scraped; undated reports fail since:
+                    index.add_report(item_id, listed_at)
+                elif category in index.identifiers:
+                    index.identifiers[category].add(item_id.upper())
+
+        edges_path = os.path.join(directory, "edges.db")
+        if os.path.exists(edges_path):
+            for category, item_id, report_id in query_database(edges_path, "SELECT category, item_id, report_id FROM edges"):
+                index.identifiers.setdefault(category, set()).add(item_id.upper())
+                index.add_report(report_id)
+                index.add_term(item_id, report_id)
+
+        reports_path = os.path.join(directory, "reports.db")
+        if os.path.exists(reports_path):
+            for report_id, cwe, severity, team, disclosed_at in query_database(
+                    reports_path, "SELECT report_id, cwe, severity, team, disclosed_at FROM reports"):
+                # The disclosure date is more precise than when we first saw the report
+                index.add_report(report_id, disclosed_at, replace_date=True)
+                if cwe:
+                    index.add_term(cwe, report_id)
+                for field, value in zip(REPORT_FIELDS, (severity, team)):
+                    if value:
+                        index.add_term(f"{field}:{value}", report_id)
+        index.finish()
+        return index
+
+    def add_report(self, report_id, date=None, replace_date=False):
+        """Add a report and, if given, the date it is ordered by"""
+        report_id = str(report_id)
+        self.terms_by_report.setdefault(report_id, set())
+        date = normalize_date(date)
+        if date and (replace_date or not self.report_dates.get(report_id)):
+            self.report_dates[report_id] = date
+
+    def add_term(self, term, report_id):
+        """Make a report findable under a term"""
+        term = term.upper() if IDENTIFIER_PATTERN.match(term) else term.lower()
+        report_id = str(report_id)
+        self.reports_by_term.setdefault(term, set()).add(report_id)
+        self.terms_by_report.setdefault(report_id, set()).add(term)
+
+    def finish(self):
+        """Freeze the sets and sort the reports and every posting list newest first"""
+        self.ranked_reports = sorted(self.terms_by_report,
+                                     key=lambda report_id: (self.report_dates.get(report_id) or "", report_id),
+                                     reverse=True)
+        rank = {report_id: position for position, report_id in enumerate(self.ranked_reports)}
+        self.postings = {term: sorted(reports, key=rank.__getitem__) for term, reports in self.reports_by_term.items()}
+        self.reports_by_term = {term: frozenset(reports) for term, reports in self.reports_by_term.items()}
+        self.sorted_dates = sorted(self.report_dates.values())
+
+    def reports_for(self, term):
+        """Report IDs filed under a CVE, a CWE or a "<field>:<value>" term"""
+        key = term.upper() if IDENTIFIER_PATTERN.match(term) else term.lower()
+        return self.reports_by_term.get(key, frozenset())
+
+    def terms_for(self, report_id):
+        """CVEs, CWEs and report fields of a report"""
+        return frozenset(self.terms_by_report.get(str(report_id), ()))
+
+    def ranked_since(self, since):
+        """Report IDs dated at or after a timestamp, newest first"""
+        # The dated reports lead the ranking, so the ones recent enough are a prefix of it
+        return self.ranked_reports[:len(self.sorted_dates) - bisect_left(self.sorted_dates, since)]
+
+    def reports_since(self, since):
+        """Report IDs dated at or after a timestamp such as "2024-01-31T00:00:00" """
+        return frozenset(self.ranked_since(since))
+
+    def query(self, *terms, now=None):
+        """Return the reports matching every term, newest first
+
+        Terms are CVE or CWE IDs, "severity:<rating>", "team:<handle>" and
+        "since:<days>d" or "since:<YYYY-MM-DD>".
+        """
+        keys = []
+        since = None
+        for term in terms:
+            if term.lower().startswith("since:"):
+                since = max(since or "", parse_since(term.split(":", 1)[1], now))
+            elif IDENTIFIER_PATTERN.match(term) or term.split(":", 1)[0].lower() in REPORT_FIELDS:
+                keys.append(term.upper() if IDENTIFIER_PATTERN.match(term) else term.lower())
+            else:
+                raise ValueError(f"Unknown query term {term!r}: use a CVE or CWE ID, "
+                                 f"{', '.join(f'{field}:<value>' for field in REPORT_FIELDS)} or since:<days>d")
+
+        if not keys:
+            return list(self.ranked_since(since) if since else self.ranked_reports)
+        # Walk the shortest posting list, already newest first, and check the rest against their sets
+        keys.sort(key=lambda key: len(self.postings.get(key, ())))
+        others = [self.reports_by_term.get(key, frozenset()) for key in keys[1:]]
+        return [report_id for report_id in self.postings.get(keys[0], ())
+                if all(report_id in reports for reports in others)
+                and (not since or (self.report_dates.get(report_id) or "") >= since)]
+
+    def report_date(self, report_id):
+        """Date a report is ordered by, or None"""
+        return self.report_dates.get(str(report_id))
@@ -0,0 +1,218 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+
+def utc_now():
+    """Current UTC time as an ISO 8601 string"""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+class LinkStore:
+    """SQLite index of scraped links with one row per (category, url)
+
+    The primary key gives indexed membership checks, so re-scraping a link
+    only bumps its last_seen timestamp instead of adding a duplicate. Links
+    that have not been written to the plain text output yet are flagged, so
+    the text file only ever has new lines appended to it.
+    """
+
+    def __init__(self, path, wal=True):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        # WAL lets the scrapers of a parallel run write to the same file, but only
+        # processes on one host; files on shared storage need the rollback journal
+        self.conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS links (
+                category TEXT NOT NULL,
+                url TEXT NOT NULL,
+                item_id TEXT,
+                page_index INTEGER,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                exported INTEGER NOT NULL DEFAULT 0,
+                listed_at TEXT,
+                PRIMARY KEY (category, url)
+            )
+        """)
+        # Stores created before the listing's dates were kept lack their column
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(links)")}
+        if "listed_at" not in columns:
+            self.conn.execute("ALTER TABLE links ADD COLUMN listed_at TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS links_exported ON links (category, exported)")
+        # Fingerprint and IDs of every listing page as of the last crawl that stored it
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                category TEXT NOT NULL,
+                page_index INTEGER NOT NULL,
+                fingerprint TEXT NOT NULL,
+                ids TEXT NOT NULL,
+                checked_at TEXT NOT NULL,
+                PRIMARY KEY (category, page_index)
+            )
+        """)
+        # Report count the discovery listing showed for each CVE or CWE
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS report_counts (
+                category TEXT NOT NULL,
+                item_id TEXT NOT NULL,
+                report_count INTEGER NOT NULL,
+                seen_at TEXT NOT NULL,
+                PRIMARY KEY (category, item_id)
+            )
+        """)
+        self.conn.commit()
+
+    def add_many(self, category, links, page_index=None, id_from_link=None):
+        """Add links, returning the ones that were not in the store before"""
+        now = utc_now()
+        new_links = []
+        with self.lock, self.conn:
+            for link in links:
+                item_id = id_from_link(link) if id_from_link else None
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO links (category, url, item_id, page_index, first_seen, last_seen) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (category, link, item_id, page_index, now, now),
+                )
+                if cursor.rowcount:
+                    new_links.append(link)
+                else:
+                    self.conn.execute(
+                        "UPDATE links SET last_seen = ? WHERE category = ? AND url = ?",
+                        (now, category, link),
+                    )
+        return new_links
+
+    def add(self, category, link, page_index=None, item_id=None):
+        """Add a single link and return True if it is new"""
+        return bool(self.add_many(category, [link], page_index, (lambda _: item_id) if item_id else None))
+
+    def contains(self, category, link):
+        """Check whether a link is already stored"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM links WHERE category = ? AND url = ?", (category, link)
+            ).fetchone()
+        return row is not None
+
+    def count(self, category=None):
+        """Number of stored links, for one category or all of them"""
+        with self.lock:
+            if category is None:
+                return self.conn.execute("SELECT COUNT(*) FROM links").fetchone()[0]
+            return self.conn.execute("SELECT COUNT(*) FROM links WHERE category = ?", (category,)).fetchone()[0]
+
+    def links(self, category):
+        """All links of a category in the order they were first stored"""
+        with self.lock:
+            rows = self.conn.execute("SELECT url FROM links WHERE category = ? ORDER BY rowid", (category,))
+            return [row[0] for row in rows]
+
+    def rows(self, category=None):
+        """Yield every stored row as a dict, oldest first"""
+        query = "SELECT category, url, item_id, page_index, first_seen, last_seen FROM links"
+        params = ()
+        if category is not None:
+            query += " WHERE category = ?"
+            params = (category,)
+        with self.lock:
+            rows = self.conn.execute(query + " ORDER BY rowid", params).fetchall()
+        for row in rows:
+            yield dict(zip(("category", "url", "item_id", "page_index", "first_seen", "last_seen"), row))
+
+    def page(self, category, page_index):
+        """Return the (fingerprint, ids) stored for a listing page, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT fingerprint, ids FROM pages WHERE category = ? AND page_index = ?", (category, page_index)
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def save_page(self, category, page_index, fingerprint, ids):
+        """Remember the fingerprint and IDs of a listing page whose links have been stored"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO pages (category, page_index, fingerprint, ids, checked_at) VALUES (?, ?, ?, ?, ?)",
+                (category, page_index, fingerprint, json.dumps(ids), utc_now()),
+            )
+
+    def save_report_counts(self, category, counts):
+        """Remember the report count a listing showed for each of its IDs"""
+        now = utc_now()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO report_counts (category, item_id, report_count, seen_at) VALUES (?, ?, ?, ?)",
+                [(category, item_id, count, now) for item_id, count in counts.items()],
+            )
+
+    def save_dates(self, category, dates):
+        """Remember the date the listing gives for each stored ID, such as when a report was disclosed"""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE links SET listed_at = ? WHERE category = ? AND item_id = ?",
+                [(date, category, str(item_id)) for item_id, date in dates.items()],
+            )
+
+    def report_counts(self, category):
+        """Report count the listing last showed for each ID of a category"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT item_id, report_count FROM report_counts WHERE category = ?", (category,)
+            ).fetchall()
+        return dict(rows)
+
+    def touch_page(self, category, page_index):
+        """Record that a listing page was fetched again and found unchanged"""
+        with self.lock, self.conn:
+            self.conn.execute(
+                "UPDATE pages SET checked_at = ? WHERE category = ? AND page_index = ?",
+                (utc_now(), category, page_index),
+            )
+
+    def unexported(self, category):
+        """Links not yet written to the text output, in insertion order"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT url FROM links WHERE category = ? AND exported = 0 ORDER BY rowid", (category,)
+            )
+            return [row[0] for row in rows]
+
+    def mark_exported(self, category, links):
+        """Flag links as written to the text output"""
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE links SET exported = 1 WHERE category = ? AND url = ?",
+                [(category, link) for link in links],
+            )
+
+    def import_text_file(self, category, path, id_from_link=None):
+        """Load an existing one-link-per-line file, returning its unique links and the number of duplicates"""
+        seen = set()
+        links = []
+        duplicates = 0
+        with open(path, "r") as f:
+            for line in f:
+                link = line.strip()
+                if not link:
+                    continue
+                if link in seen:
+                    duplicates += 1
+                    continue
+                seen.add(link)
+                links.append(link)
+        self.add_many(category, links, id_from_link=id_from_link)
+        self.mark_exported(category, links)
+        return links, duplicates
+
+    def close(self):
+        """Close the database connection"""
+        with self.lock:
+            self.conn.close()
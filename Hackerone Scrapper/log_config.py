@@ -0,0 +1,17 @@
+import sys
+import logging
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def configure_logging(log_file, level=logging.INFO):
+    """Log to a file and stdout; only the entry point calls this, so importing a module never configures logging"""
+    logging.basicConfig(
+        level=level,
+        format=LOG_FORMAT,
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler(sys.stdout)
+        ]
+    )
+    logging.getLogger().setLevel(level)
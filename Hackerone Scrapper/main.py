@@ -4,23 +4,46 @@ import time
 import argparse
 import logging
 import sys
-from cve_scraper import CVEScraper
-from cwe_scraper import CWEScraper
-from disclosed_reports_scraper import DisclosedReportsScraper
-from undisclosed_reports_scraper import UndisclosedReportsScraper
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("hackerone_scraper.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+import importlib
+import importlib.util
+from log_config import configure_logging
+from exporters import EXPORTERS
+from link_index import LinkIndex, query_database
+
+# Only light modules are imported up front, so --help, count, status, export and query
+# start quickly; the scrapers and their browser dependencies load when a crawl runs
 
 logger = logging.getLogger("HackerOneScraper")
 
+# Scraper class of each --type as (module, class), imported on first use
+SCRAPER_TYPES = {
+    "cve": ("cve_scraper", "CVEScraper"),
+    "cwe": ("cwe_scraper", "CWEScraper"),
+    "disclosed": ("disclosed_reports_scraper", "DisclosedReportsScraper"),
+    "undisclosed": ("undisclosed_reports_scraper", "UndisclosedReportsScraper"),
+}
+
+# Category names the scrapers store their links under
+CATEGORIES = {"cve": "CVE", "cwe": "CWE", "disclosed": "Disclosed Reports", "undisclosed": "Undisclosed Reports"}
+
+def scraper_class(scraper_type):
+    """Import and return the scraper class for a --type"""
+    module_name, class_name = SCRAPER_TYPES[scraper_type]
+    return getattr(importlib.import_module(module_name), class_name)
+
+def parse_browser_profiles(values):
+    """Map each --browser-profile value, PROFILE or TYPE=PROFILE, to {category or None: profile}"""
+    from browser_profiles import PROFILES
+    profiles = {}
+    for value in values:
+        scraper_type, _, profile = value.rpartition("=")
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown browser profile {profile!r}, expected one of {', '.join(PROFILES)}")
+        if scraper_type and scraper_type not in CATEGORIES:
+            raise ValueError(f"Unknown scraper type {scraper_type!r} in --browser-profile {value}")
+        profiles[CATEGORIES[scraper_type] if scraper_type else None] = profile
+    return profiles
+
 def create_output_directory():
     """Create the output directory if it doesn't exist"""
     os.makedirs("output", exist_ok=True)
@@ -58,137 +81,517 @@ def print_banner():
     print("  HackerOne Link Scraper - Extract CVE, CWE, and Report Links")
     print("  ============================================================\n")
 
-def run_all_scrapers():
-    """Run all scrapers sequentially"""
+def configure_scraper(scraper, workers=1, incremental=False, stop_after_known=3, resume=True, response_cache=None,
+                      fingerprint_pages=True, stop_after_unchanged=None, browser_profiles=None):
+    """Apply the command line options to a scraper"""
+    browser_profiles = browser_profiles or {}
+    scraper.browser_profile = browser_profiles.get(scraper.category_name, browser_profiles.get(None, "full"))
+    scraper.response_cache = response_cache
+    scraper.workers = workers
+    scraper.incremental = incremental
+    scraper.stop_after_known_pages = stop_after_known
+    scraper.resume = resume
+    scraper.fingerprint_pages = fingerprint_pages
+    scraper.stop_after_unchanged_pages = stop_after_unchanged
+    return scraper
+
+def run_scraper(title, scraper):
+    """Run one scraper, isolating any failure from the other scrapers"""
+    try:
+        scraper.run()
+    except Exception as e:
+        scraper.error = e
+        logger.error(f"{title} scraper failed: {e}")
+    return scraper
+
+def run_all_scrapers(backend="auto", parallel=False, **options):
+    """Run all scrapers, one after another or in parallel"""
     start_time = time.time()
     
     # Create output directory
     create_output_directory()
     
-    # Run CVE scraper
-    print("\n=== Running CVE Scraper ===")
-    cve_scraper = CVEScraper()
-    cve_scraper.run()
-    
-    # Run CWE scraper
-    print("\n=== Running CWE Scraper ===")
-    cwe_scraper = CWEScraper()
-    cwe_scraper.run()
-    
-    # Run Disclosed Reports scraper
-    print("\n=== Running Disclosed Reports Scraper ===")
-    disclosed_scraper = DisclosedReportsScraper()
-    disclosed_scraper.run()
+    scrapers = [
+        ("CVE", configure_scraper(scraper_class("cve")(backend), **options)),
+        ("CWE", configure_scraper(scraper_class("cwe")(backend), **options)),
+        ("Disclosed Reports", configure_scraper(scraper_class("disclosed")(backend), **options)),
+        ("Undisclosed Reports", configure_scraper(scraper_class("undisclosed")(backend), **options)),
+    ]
     
-    # Run Undisclosed Reports scraper
-    print("\n=== Running Undisclosed Reports Scraper ===")
-    undisclosed_scraper = UndisclosedReportsScraper()
-    undisclosed_scraper.run()
+    if parallel:
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        from tqdm import tqdm
+        # The scrapers are I/O bound and independent, so threads are enough and
+        # let them share one terminal with a progress bar line each
+        print("\n=== Running All Scrapers In Parallel ===")
+        executor = ThreadPoolExecutor(max_workers=len(scrapers))
+        try:
+            futures = []
+            for position, (title, scraper) in enumerate(scrapers):
+                scraper.progress_position = position
+                futures.append(executor.submit(run_scraper, title, scraper))
+            for future in as_completed(futures):
+                scraper = future.result()
+                status = "done" if scraper.error is None else f"failed: {scraper.error}"
+                tqdm.write(f"{scraper.category_name} scraper {status} in {scraper.elapsed_time or 0:.2f} seconds")
+        except KeyboardInterrupt:
+            # Only the main thread sees Ctrl-C, so tell every scraper to stop after its current page
+            for _, scraper in scrapers:
+                scraper.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+    else:
+        for title, scraper in scrapers:
+            print(f"\n=== Running {title} Scraper ===")
+            run_scraper(title, scraper)
     
     # Print summary
     total_time = time.time() - start_time
     print("\n=== Scraping Summary ===")
     print(f"Total execution time: {total_time:.2f} seconds")
     
-    # Count links in each file
-    cve_count = count_lines("output/cve_links.txt")
-    cwe_count = count_lines("output/cwe_links.txt")
-    disclosed_count = count_lines("output/disclosed_links.txt")
-    undisclosed_count = count_lines("output/undisclosed_links.txt")
-    
-    print(f"CVE Links: {cve_count}")
-    print(f"CWE Links: {cwe_count}")
-    print(f"Disclosed Report Links: {disclosed_count}")
-    print(f"Undisclosed Report Links: {undisclosed_count}")
-    print(f"Total Links: {cve_count + cwe_count + disclosed_count + undisclosed_count}")
+    # The link store keeps the counts, so the output files are not read again
+    total_count = 0
+    for title, scraper in scrapers:
+        count = scraper.link_store.count(scraper.category_name)
+        total_count += count
+        status = "OK" if scraper.error is None else f"FAILED ({scraper.error})"
+        print(f"{title} Links: {count} | {scraper.elapsed_time or 0:.2f} seconds | {status}")
+    print(f"Total Links: {total_count}")
+    return [scraper for _, scraper in scrapers]
 
-def run_specific_scraper(scraper_type):
+def run_specific_scraper(scraper_type, backend="auto", **options):
     """Run a specific scraper based on the type"""
     create_output_directory()
     
-    if scraper_type == "cve":
-        print("\n=== Running CVE Scraper ===")
-        scraper = CVEScraper()
-    elif scraper_type == "cwe":
-        print("\n=== Running CWE Scraper ===")
-        scraper = CWEScraper()
-    elif scraper_type == "disclosed":
-        print("\n=== Running Disclosed Reports Scraper ===")
-        scraper = DisclosedReportsScraper()
-    elif scraper_type == "undisclosed":
-        print("\n=== Running Undisclosed Reports Scraper ===")
-        scraper = UndisclosedReportsScraper()
-    else:
+    if scraper_type not in SCRAPER_TYPES:
         logger.error(f"Unknown scraper type: {scraper_type}")
         return
     
+    print(f"\n=== Running {CATEGORIES[scraper_type]} Scraper ===")
+    scraper = scraper_class(scraper_type)(backend)
+    configure_scraper(scraper, **options)
     start_time = time.time()
     scraper.run()
     total_time = time.time() - start_time
     
-    # Count links in the file
-    count = count_lines(scraper.output_file)
-    print(f"\n=== Scraping Summary ===")
+    count = scraper.link_store.count(scraper.category_name)
+    print("\n=== Scraping Summary ===")
     print(f"Execution time: {total_time:.2f} seconds")
     print(f"Total {scraper_type} links: {count}")
 
-def count_lines(file_path):
-    """Count the number of lines in a file"""
+def run_enrichment(concurrency=8, refresh=False):
+    """Fetch metadata for the disclosed reports found so far"""
+    from link_store import LinkStore
+    from report_store import ReportStore
+    from report_enricher import ReportEnricher
+    print("\n=== Enriching Disclosed Reports ===")
+    create_output_directory()
+    link_store = LinkStore(os.path.join("output", "links.db"))
+    report_store = ReportStore(os.path.join("output", "reports.db"))
+    enricher = ReportEnricher(link_store, report_store, concurrency=concurrency)
     try:
-        if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                return len(f.readlines())
-        return 0
-    except Exception as e:
-        logger.error(f"Error counting lines in {file_path}: {e}")
-        return 0
+        counts = enricher.run(refresh)
+        print(f"Total reports with metadata: {report_store.count()}")
+        return counts
+    finally:
+        enricher.close()
+        report_store.close()
+        link_store.close()
+
+def run_drilldown(scraper_types=("cve", "cwe"), concurrency=8, refresh=False, **options):
+    """Map the CVEs and CWEs found so far to their reports and write the edge tables"""
+    from edge_store import EdgeStore
+    from drilldown import DrilldownCrawler
+    create_output_directory()
+    edge_store = EdgeStore(os.path.join("output", "edges.db"))
+    try:
+        for scraper_type in scraper_types:
+            scraper = configure_scraper(scraper_class(scraper_type)("http"), **options)
+            print(f"\n=== Drilling Down Into {scraper.category_name} ===")
+            DrilldownCrawler(scraper, edge_store, concurrency).run(refresh)
+            path = os.path.join("output", f"{scraper_type}_report_edges.csv")
+            rows = edge_store.write_csv(path, scraper.category_name)
+            print(f"Wrote {rows} {scraper.category_name} to report edges to {path}")
+    finally:
+        edge_store.close()
+
+def run_exports(formats, directory="output"):
+    """Export every stored link in the requested formats"""
+    from link_store import LinkStore
+    from exporters import ExportError, export_links
+    print("\n=== Exporting Links ===")
+    link_store = LinkStore(os.path.join(directory, "links.db"))
+    try:
+        for fmt in formats:
+            try:
+                path = export_links(link_store, directory, fmt)
+                print(f"Exported {link_store.count()} links to {path}")
+            except ExportError as e:
+                logger.error(f"Could not export {fmt}: {e}")
+                print(f"Could not export {fmt}: {e}")
+    finally:
+        link_store.close()
+
+def create_distributed_scraper(scraper_type, backend="auto", **options):
+    """Create a scraper whose link store is shared with the other nodes of a distributed crawl"""
+    scraper = configure_scraper(scraper_class(scraper_type)(backend), **options)
+    scraper.shared_storage = True
+    return scraper
+
+def run_coordinator(queue, scraper_types, backend="auto", enrich=False, refresh=False,
+                    pages_per_lease=20, reports_per_lease=100, **options):
+    """Split the crawl into leases, wait for the workers to finish them, then write the output files"""
+    from link_store import LinkStore
+    from report_store import ReportStore
+    from report_enricher import ReportEnricher
+    from distributed import plan_pages, plan_reports, wait_for_queue
+    print("\n=== Coordinating Distributed Crawl ===")
+    create_output_directory()
+    if queue.unfinished() and not queue.is_finished():
+        print(f"Resuming the unfinished crawl in {queue.path}")
+    else:
+        queue.clear()
+        # Workers started from here on must not see the finished mark of the last crawl
+        queue.mark_unfinished()
+        for scraper_type in scraper_types:
+            scraper = create_distributed_scraper(scraper_type, backend, **options)
+            count = plan_pages(queue, scraper_type, scraper, pages_per_lease)
+            print(f"Queued {count} page ranges of {scraper.category_name}")
+    wait_for_queue(queue)
+    
+    if enrich:
+        # Report IDs are only known once the disclosed reports have been crawled
+        link_store = LinkStore(os.path.join("output", "links.db"), wal=False)
+        report_store = ReportStore(os.path.join("output", "reports.db"), wal=False)
+        enricher = ReportEnricher(link_store, report_store)
+        try:
+            count = plan_reports(queue, enricher, reports_per_lease, refresh)
+            print(f"Queued {count} batches of reports")
+        finally:
+            enricher.close()
+            report_store.close()
+            link_store.close()
+        wait_for_queue(queue)
+    queue.mark_finished()
+    
+    # Only the coordinator writes the text files, so the workers never append to the same file
+    for scraper_type in scraper_types:
+        scraper = create_distributed_scraper(scraper_type, backend, **options)
+        scraper.save_links()
+        print(f"{scraper.category_name} Links: {scraper.link_store.count(scraper.category_name)}")
+    failed = queue.counts().get("failed", 0)
+    if failed:
+        print(f"{failed} leases failed, see {queue.path} for their errors")
+
+def run_distributed_worker(queue, worker_id, backend="auto", enrich_concurrency=8, **options):
+    """Work on leases from the queue until the coordinator marks it finished"""
+    from link_store import LinkStore
+    from report_store import ReportStore
+    from report_enricher import ReportEnricher
+    from distributed import run_worker
+    print(f"\n=== Distributed Worker {worker_id} ===")
+    create_output_directory()
+    link_store = LinkStore(os.path.join("output", "links.db"), wal=False)
+    report_store = ReportStore(os.path.join("output", "reports.db"), wal=False)
+    enricher = ReportEnricher(link_store, report_store, concurrency=enrich_concurrency)
+    try:
+        def create_scraper(scraper_type):
+            return create_distributed_scraper(scraper_type, backend, **options)
+        completed = run_worker(queue, worker_id, create_scraper, enricher)
+        print(f"Completed {completed} leases")
+    finally:
+        enricher.close()
+        report_store.close()
+        link_store.close()
+
+# Packages a crawl needs, checked without importing them
+REQUIRED_MODULES = ("selenium", "requests", "bs4", "tqdm", "webdriver_manager")
 
 def check_dependencies():
     """Check if all required dependencies are installed"""
-    try:
-        import selenium
-        import requests
-        import bs4
-        import tqdm
-        import webdriver_manager
+    missing = [name for name in REQUIRED_MODULES if importlib.util.find_spec(name) is None]
+    if not missing:
         logger.info("All dependencies are installed")
         return True
-    except ImportError as e:
-        logger.error(f"Missing dependency: {e}")
-        print("\nPlease install all required dependencies:")
-        print("pip install -r requirements.txt")
-        return False
+    logger.error(f"Missing dependencies: {', '.join(missing)}")
+    print("\nPlease install all required dependencies:")
+    print("pip install -r requirements.txt")
+    return False
 
-if __name__ == "__main__":
-    # Print banner
-    print_banner()
+def stored_counts(directory="output"):
+    """Number of stored links per category, or None if nothing has been stored yet"""
+    path = os.path.join(directory, "links.db")
+    if not os.path.exists(path):
+        return None
+    return dict(query_database(path, "SELECT category, COUNT(*) FROM links GROUP BY category"))
+
+def print_counts(directory="output"):
+    """Print the number of links found in each category"""
+    counts = stored_counts(directory)
+    if counts is None:
+        print(f"No links stored in {directory} yet")
+        return
+    for category in CATEGORIES.values():
+        print(f"{category}: {counts.get(category, 0)}")
+    print(f"Total: {sum(counts.values())}")
+
+def print_status(directory="output", queue_path=None):
+    """Print link counts, the last crawl of each category, interrupted crawls, report metadata and the work queue"""
+    import json
+    counts = stored_counts(directory) or {}
+    state_path = os.path.join(directory, "crawl_state.json")
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path, "r") as f:
+            state = json.load(f)
+    print("Links:")
+    for category in CATEGORIES.values():
+        updated_at = state.get(category, {}).get("updated_at")
+        last_crawl = f" (last crawl {updated_at})" if updated_at else ""
+        print(f"  {category}: {counts.get(category, 0)}{last_crawl}")
     
-    # Check dependencies
-    if not check_dependencies():
-        sys.exit(1)
+    for name in sorted(os.listdir(directory)) if os.path.isdir(directory) else []:
+        if name.endswith(".journal"):
+            with open(os.path.join(directory, name), "r") as f:
+                pages = max(0, sum(1 for _ in f) - 1)
+            print(f"Interrupted crawl: {name} ({pages} pages done, resumes on the next run)")
     
-    # Parse command line arguments
-    parser = argparse.ArgumentParser(description="HackerOne Link Scraper")
-    parser.add_argument("--type", choices=["all", "cve", "cwe", "disclosed", "undisclosed"], 
-                        default="all", help="Type of scraper to run")
+    reports_path = os.path.join(directory, "reports.db")
+    if os.path.exists(reports_path):
+        print(f"Reports with metadata: {query_database(reports_path, 'SELECT COUNT(*) FROM reports')[0][0]}")
+    
+    edges_path = os.path.join(directory, "edges.db")
+    if os.path.exists(edges_path):
+        edges = query_database(edges_path, "SELECT category, COUNT(*), COUNT(DISTINCT item_id) FROM edges GROUP BY category")
+        for category, count, identifiers in edges:
+            print(f"{category} to report edges: {count} across {identifiers} identifiers")
+    
+    queue_path = queue_path or os.path.join(directory, "queue.db")
+    if os.path.exists(queue_path):
+        leases = query_database(queue_path, "SELECT status, COUNT(*) FROM leases GROUP BY status")
+        print("Work queue: " + (", ".join(f"{status} {count}" for status, count in sorted(leases)) or "empty"))
+
+def print_query(terms, directory="output", count_only=False, as_json=False):
+    """Print the reports matching every query term, or the number of them"""
+    import json
+    index = LinkIndex.load(directory)
+    report_ids = index.query(*terms)
+    if count_only:
+        print(len(report_ids))
+        return
+    for report_id in report_ids:
+        url = f"https://hackerone.com/reports/{report_id}"
+        if as_json:
+            print(json.dumps({"report_id": report_id, "url": url, "date": index.report_date(report_id),
+                              "terms": sorted(index.terms_for(report_id))}))
+        else:
+            print(url)
+
+def build_parser():
+    """Build the command line parser"""
+    parser = argparse.ArgumentParser(description="HackerOne Link Scraper",
+                                     epilog="Without a command, main.py runs the scrapers.")
+    parser.add_argument("--type", choices=["all", "cve", "cwe", "disclosed", "undisclosed", "enrich", "drilldown"], 
+                        default="all", help="Type of scraper to run (enrich only fetches report metadata, "
+                                            "drilldown only maps the stored CVEs and CWEs to their reports)")
+    parser.add_argument("--backend", choices=["auto", "http", "selenium", "async", "hybrid"], default="auto",
+                        help="How pages are fetched: GraphQL over HTTP, headless Chrome, HTTP with Selenium fallback, "
+                             "GraphQL from an asyncio event loop, or Chrome reading the GraphQL responses "
+                             "the page fetches from its network log")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of pages fetched concurrently for pageIndex-addressable listings "
+                             "(requests in flight with --backend async)")
+    parser.add_argument("--rate", type=float, default=1.0,
+                        help="Maximum requests per second shared by every scraper and worker (0 disables the limit)")
+    parser.add_argument("--browsers", type=int, default=4,
+                        help="Maximum number of Chrome instances shared by all scrapers and workers")
+    parser.add_argument("--recycle-after", type=int, default=200,
+                        help="Restart a browser after it has rendered this many pages")
+    parser.add_argument("--browser-profile", action="append", default=[], metavar="[TYPE=]PROFILE",
+                        help="Chrome profile for Selenium pages: full, or lean to block images, media, fonts, "
+                             "stylesheets and trackers and stop at DOMContentLoaded (e.g. lean or disclosed=lean, "
+                             "can be given more than once)")
+    parser.add_argument("--parallel", action="store_true",
+                        help="Run all four scrapers at the same time (with --type all)")
+    parser.add_argument("--target-latency", type=float, default=None,
+                        help="Slow down when responses take longer than this many seconds")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Stop once the crawl reaches reports found by an earlier run")
+    parser.add_argument("--stop-after-known", type=int, default=3,
+                        help="Number of consecutive already-known pages that ends an incremental crawl")
+    parser.add_argument("--no-fingerprints", action="store_true",
+                        help="Extract and store every page, even those identical to the last crawl")
+    parser.add_argument("--stop-after-unchanged", type=int, default=None, metavar="PAGES",
+                        help="Stop once this many consecutive pages are identical to the last crawl")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Discard the journal of an interrupted crawl and start from the first page")
+    parser.add_argument("--cache-dir", default=os.path.join("output", "cache"),
+                        help="Directory of the on-disk GraphQL response cache")
+    parser.add_argument("--cache-size", type=int, default=500,
+                        help="Maximum size of the response cache in MB before old entries are evicted")
+    parser.add_argument("--no-cache", action="store_true", help="Always fetch pages from the network")
+    parser.add_argument("--offline", action="store_true",
+                        help="Only replay cached responses, ignoring their age, and never touch the network")
+    parser.add_argument("--export", action="append", choices=list(EXPORTERS), default=[],
+                        help="Also export all links as JSON Lines, compressed JSON Lines, Arrow or Parquet "
+                             "(can be given more than once)")
+    parser.add_argument("--enrich", action="store_true",
+                        help="Fetch title, severity, CWE, bounty, team and disclosure date of new disclosed reports")
+    parser.add_argument("--enrich-concurrency", type=int, default=8,
+                        help="Number of report metadata requests in flight at once")
+    parser.add_argument("--refresh-reports", action="store_true",
+                        help="Revalidate reports that already have metadata instead of only fetching new ones")
+    parser.add_argument("--drilldown", action="store_true",
+                        help="Map each CVE and CWE to its disclosed reports, skipping those whose report count is unchanged")
+    parser.add_argument("--drilldown-concurrency", type=int, default=8,
+                        help="Number of CVEs or CWEs drilled down into at once")
+    parser.add_argument("--refresh-drilldown", action="store_true",
+                        help="Crawl every CVE and CWE again, even if its report count has not changed")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="Keep a Prometheus text file with fetch, render, extraction, retry and sleep metrics up to date")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="Serve the metrics on http://127.0.0.1:PORT/metrics while scraping")
+    parser.add_argument("--trace-file", metavar="PATH",
+                        help="Write a JSON trace of every fetch, render wait and extraction (open in chrome://tracing)")
+    parser.add_argument("--role", choices=["coordinator", "worker"],
+                        help="Take part in a crawl split across several nodes through a shared work queue")
+    parser.add_argument("--queue", default=os.path.join("output", "queue.db"),
+                        help="SQLite work queue on storage shared by every node (with --role)")
+    parser.add_argument("--worker-id", default=None, help="Name of this worker in the queue (default: host-pid)")
+    parser.add_argument("--pages-per-lease", type=int, default=20, help="Listing pages in each lease")
+    parser.add_argument("--reports-per-lease", type=int, default=100, help="Reports in each enrichment lease")
+    parser.add_argument("--lease-seconds", type=int, default=300,
+                        help="How long a lease lasts without a heartbeat before another worker takes it over")
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
     
-    args = parser.parse_args()
+    # Commands that only read the output directory and never start a crawl
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    count = commands.add_parser("count", help="Print the number of links found in each category")
+    status = commands.add_parser("status", help="Print counts, last crawls, interrupted crawls and the work queue")
+    status.add_argument("--queue", default=None, help="Work queue to report on (default: <output-dir>/queue.db)")
+    export = commands.add_parser("export", help="Export the stored links without scraping")
+    export.add_argument("--format", dest="formats", action="append", choices=list(EXPORTERS), required=True,
+                        help="Export format (can be given more than once)")
+    query = commands.add_parser("query", help="List the reports matching every term, newest first",
+                                description="Terms: CVE-2021-44228, CWE-79, severity:high, team:<handle>, "
+                                            "since:30d or since:2024-01-31. Reports must match all of them.")
+    query.add_argument("terms", nargs="+", help="CVE or CWE ID, severity:, team: or since: term")
+    query.add_argument("--count", action="store_true", help="Only print the number of matching reports")
+    query.add_argument("--json", action="store_true", help="Print each report as a JSON line with its date and terms")
+    for command in (count, status, export, query):
+        command.add_argument("--output-dir", default="output", help="Directory holding links.db")
+    return parser
+
+def run_crawl(parser, args):
+    """Run the scrapers, enrichment and exports selected on the command line"""
+    from scraper_base import configure_shared_rate_limiter
+    from driver_pool import configure_shared_driver_pool
+    from response_cache import ResponseCache
+    from metrics import MetricsServer, PrometheusFileExporter, registry
+    from work_queue import WorkQueue
+    from distributed import default_worker_id
+    
+    configure_shared_driver_pool(max_size=args.browsers, max_pages=args.recycle_after)
+    # One limiter for every scraper, worker and report request, since they all hit the same site
+    configure_shared_rate_limiter(rate=args.rate or None, burst=max(1, args.workers), target_latency=args.target_latency)
     
-    # Set logging level based on verbose flag
-    if args.verbose:
-        logging.getLogger().setLevel(logging.DEBUG)
-        logger.info("Verbose logging enabled")
+    try:
+        browser_profiles = parse_browser_profiles(args.browser_profile)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.offline and args.no_cache:
+        parser.error("--offline needs the response cache, it cannot be combined with --no-cache")
+    if args.offline and args.backend in ("selenium", "hybrid"):
+        parser.error(f"--offline replays cached GraphQL responses and cannot be used with the {args.backend} backend")
+    response_cache = None
+    if not args.no_cache:
+        response_cache = ResponseCache(args.cache_dir, max_size_mb=args.cache_size, offline=args.offline)
+    
+    options = {
+        "workers": args.workers,
+        "incremental": args.incremental,
+        "stop_after_known": args.stop_after_known,
+        "resume": not args.no_resume,
+        "response_cache": response_cache,
+        "fingerprint_pages": not args.no_fingerprints,
+        "stop_after_unchanged": args.stop_after_unchanged,
+        "browser_profiles": browser_profiles,
+    }
+    
+    metrics_exporters = []
+    if args.metrics_file:
+        metrics_exporters.append(PrometheusFileExporter(args.metrics_file).start())
+    if args.metrics_port:
+        server = MetricsServer(args.metrics_port).start()
+        metrics_exporters.append(server)
+        print(f"Serving metrics on {server.url}/metrics")
+    registry.tracer.enabled = bool(args.trace_file)
     
     try:
-        if args.type == "all":
-            run_all_scrapers()
-        else:
-            run_specific_scraper(args.type)
+        if args.role:
+            queue = WorkQueue(args.queue, lease_seconds=args.lease_seconds)
+            try:
+                if args.role == "coordinator":
+                    scraper_types = [] if args.type in ("enrich", "drilldown") else list(SCRAPER_TYPES) if args.type == "all" else [args.type]
+                    run_coordinator(queue, scraper_types, args.backend, args.enrich or args.type == "enrich",
+                                    args.refresh_reports, args.pages_per_lease, args.reports_per_lease, **options)
+                else:
+                    run_distributed_worker(queue, args.worker_id or default_worker_id(), args.backend,
+                                           args.enrich_concurrency, **options)
+            finally:
+                queue.close()
+        elif args.type == "all":
+            run_all_scrapers(args.backend, args.parallel, **options)
+        elif args.type not in ("enrich", "drilldown"):
+            run_specific_scraper(args.type, args.backend, **options)
+        if not args.role and (args.enrich or args.type == "enrich"):
+            run_enrichment(args.enrich_concurrency, args.refresh_reports)
+        if not args.role and (args.drilldown or args.type == "drilldown"):
+            drilldown_types = [args.type] if args.type in ("cve", "cwe") else ["cve", "cwe"]
+            run_drilldown(drilldown_types, args.drilldown_concurrency, args.refresh_drilldown, **options)
+        if args.export and args.role != "worker":
+            run_exports(args.export)
     except KeyboardInterrupt:
         logger.warning("Scraping interrupted by user")
         print("\nScraping interrupted. Partial results have been saved.")
     except Exception as e:
         logger.error(f"Error during scraping: {e}")
         print(f"\nAn error occurred: {e}")
-        print("Check the log file for more details: hackerone_scraper.log")
\ No newline at end of file
+        print("Check the log file for more details: hackerone_scraper.log")
+    finally:
+        for exporter in metrics_exporters:
+            exporter.stop()
+        if args.trace_file:
+            registry.tracer.dump(args.trace_file)
+            print(f"Trace written to {args.trace_file}")
+
+
+def main(argv=None):
+    """Parse the command line and run the selected command"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    configure_logging("hackerone_scraper.log", logging.DEBUG if args.verbose else logging.INFO)
+    if args.verbose:
+        logger.info("Verbose logging enabled")
+    
+    if args.command == "count":
+        print_counts(args.output_dir)
+    elif args.command == "status":
+        print_status(args.output_dir, args.queue)
+    elif args.command == "export":
+        run_exports(args.formats, args.output_dir)
+    elif args.command == "query":
+        try:
+            print_query(args.terms, args.output_dir, args.count, args.json)
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        print_banner()
+        if not check_dependencies():
+            sys.exit(1)
+        run_crawl(parser, args)
+
+if __name__ == "__main__":
+    main()
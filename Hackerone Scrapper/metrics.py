@@ -0,0 +1,335 @@
+import os
+import json
+import time
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram buckets in seconds, from a fast cached page to a stuck browser
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def label_key(labels):
+    """Turn keyword labels into a hashable, ordered key"""
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def matches(key, labels):
+    """Whether a label key has all of the given labels"""
+    return set(label_key(labels)) <= set(key)
+
+
+def escape_label(value):
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(key, extra=()):
+    """Format a label key in the Prometheus text format"""
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape_label(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """Monotonically increasing value, kept per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        """Add to the counter"""
+        key = label_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels):
+        """Current value for a label set"""
+        with self.lock:
+            return self.values.get(label_key(labels), 0)
+
+    def sum(self, **labels):
+        """Total over every label set that has the given labels"""
+        with self.lock:
+            return sum(value for key, value in self.values.items() if matches(key, labels))
+
+    def lines(self):
+        """Prometheus text lines for every label set"""
+        with self.lock:
+            return [f"{self.name}{format_labels(key)} {value}" for key, value in sorted(self.values.items())]
+
+    def snapshot(self):
+        """Values as a JSON-friendly list"""
+        with self.lock:
+            return [{"labels": dict(key), "value": value} for key, value in sorted(self.values.items())]
+
+
+class Histogram:
+    """Distribution of observed values in cumulative buckets, kept per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name, description, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.lock = threading.Lock()
+        # label key -> [bucket counts..., +Inf count, sum]
+        self.values = {}
+
+    def observe(self, value, **labels):
+        """Record one observation"""
+        key = label_key(labels)
+        with self.lock:
+            series = self.values.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def count(self, **labels):
+        """Number of observations for a label set"""
+        with self.lock:
+            series = self.values.get(label_key(labels))
+            return sum(series[:-1]) if series else 0
+
+    def total(self, **labels):
+        """Sum of the observations over every label set that has the given labels"""
+        with self.lock:
+            return sum(series[-1] for key, series in self.values.items() if matches(key, labels))
+
+    def lines(self):
+        """Prometheus text lines with cumulative buckets, sum and count"""
+        lines = []
+        with self.lock:
+            for key, series in sorted(self.values.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{format_labels(key, [('le', bound)])} {cumulative}")
+                lines.append(f"{self.name}_sum{format_labels(key)} {series[-1]}")
+                lines.append(f"{self.name}_count{format_labels(key)} {cumulative}")
+        return lines
+
+    def snapshot(self):
+        """Counts and sums as a JSON-friendly list"""
+        with self.lock:
+            return [{"labels": dict(key), "count": sum(series[:-1]), "sum": series[-1]}
+                    for key, series in sorted(self.values.items())]
+
+
+class Tracer:
+    """Keep timed spans in memory and dump them as a Chrome trace
+
+    The dump opens in chrome://tracing or Perfetto, with one row per thread,
+    so a slow page shows whether the time went into the request, the render
+    wait or the extraction. Only the most recent ``max_events`` are kept.
+    """
+
+    def __init__(self, max_events=100000):
+        self.enabled = False
+        self.events = deque(maxlen=max_events)
+        self.origin = time.perf_counter()
+
+    def add(self, name, start, duration, labels):
+        """Record a span that started at ``start`` (perf_counter seconds)"""
+        if self.enabled:
+            self.events.append({
+                "name": name,
+                "ph": "X",
+                "ts": round((start - self.origin) * 1e6),
+                "dur": round(duration * 1e6),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": labels,
+            })
+
+    def dump(self, path):
+        """Write the recorded spans as a Chrome trace JSON file"""
+        with open(path, "w") as f:
+            json.dump({"traceEvents": list(self.events), "displayTimeUnit": "ms"}, f)
+
+
+class MetricsRegistry:
+    """Named counters and histograms shared by every scraper in the process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.tracer = Tracer()
+
+    def register(self, metric):
+        """Add a metric, or return the one already registered under its name"""
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, description):
+        """Get or create a counter"""
+        return self.register(Counter(name, description))
+
+    def histogram(self, name, description, buckets=DEFAULT_BUCKETS):
+        """Get or create a histogram"""
+        return self.register(Histogram(name, description, buckets))
+
+    def prometheus_text(self):
+        """Every metric in the Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.lines())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """Every metric as a JSON-friendly dict"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return {metric.name: {"type": metric.kind, "values": metric.snapshot()} for metric in metrics}
+
+    def reset(self):
+        """Clear every recorded value, keeping the metrics registered"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        for metric in metrics:
+            with metric.lock:
+                metric.values.clear()
+        self.tracer.events.clear()
+
+
+registry = MetricsRegistry()
+
+FETCH_SECONDS = registry.histogram("hackerone_fetch_seconds", "Time to fetch one listing page or request")
+RENDER_WAIT_SECONDS = registry.histogram("hackerone_render_wait_seconds", "Time spent waiting for a page to render")
+EXTRACT_SECONDS = registry.histogram("hackerone_extract_seconds", "Time to extract IDs from a fetched page")
+PAGES = registry.counter("hackerone_pages_total", "Listing pages processed")
+LINKS = registry.counter("hackerone_links_total", "New links found")
+UNCHANGED_PAGES = registry.counter("hackerone_unchanged_pages_total", "Listing pages that matched their fingerprint from the last crawl")
+RETRIES = registry.counter("hackerone_retries_total", "Requests or page loads that were retried")
+SLEEP_SECONDS = registry.counter("hackerone_sleep_seconds_total", "Time spent sleeping, by reason")
+CACHE_LOOKUPS = registry.counter("hackerone_cache_lookups_total", "Response cache lookups, by result")
+
+
+@contextmanager
+def timed(histogram, **labels):
+    """Observe the duration of a block in a histogram and trace it as a span"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        histogram.observe(duration, **labels)
+        registry.tracer.add(histogram.name, start, duration, labels)
+
+
+def record_sleep(seconds, reason, **labels):
+    """Sleep and count the time under a reason such as rate_limit or backoff"""
+    start = time.perf_counter()
+    time.sleep(seconds)
+    SLEEP_SECONDS.inc(seconds, reason=reason, **labels)
+    registry.tracer.add(f"sleep:{reason}", start, seconds, labels)
+
+
+def phase_summary(category):
+    """Seconds spent in each phase for one category, summed over every worker"""
+    return {
+        "fetch": FETCH_SECONDS.total(category=category),
+        "render wait": RENDER_WAIT_SECONDS.total(category=category),
+        "extraction": EXTRACT_SECONDS.total(category=category),
+        "backoff": SLEEP_SECONDS.sum(category=category, reason="backoff"),
+    }
+
+
+def write_prometheus(path, metrics_registry=registry):
+    """Write the metrics to a Prometheus text file, replacing it atomically"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(metrics_registry.prometheus_text())
+    os.replace(tmp_path, path)
+
+
+class PrometheusFileExporter:
+    """Rewrite a Prometheus text file every ``interval`` seconds, for node_exporter's textfile collector"""
+
+    def __init__(self, path, interval=15, metrics_registry=registry):
+        self.path = path
+        self.interval = interval
+        self.registry = metrics_registry
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def run(self):
+        """Write the file until stopped"""
+        while not self.stopped.wait(self.interval):
+            write_prometheus(self.path, self.registry)
+
+    def start(self):
+        """Start writing in a background thread"""
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop and write the final values"""
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        write_prometheus(self.path, self.registry)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serve /metrics in the Prometheus text format and /metrics.json as JSON"""
+
+    def do_GET(self):
+        """Send the current metrics"""
+        if self.path == "/metrics":
+            payload = self.server.registry.prometheus_text().encode("utf-8")
+            content_type = "text/plain; version=0.0.4"
+        elif self.path == "/metrics.json":
+            payload = json.dumps(self.server.registry.snapshot()).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        """Keep scrape logs quiet"""
+
+
+class MetricsServer:
+    """Local HTTP endpoint that Prometheus can scrape while a crawl runs"""
+
+    def __init__(self, port=9108, host="127.0.0.1", metrics_registry=registry):
+        self.httpd = ThreadingHTTPServer((host, port), MetricsHandler)
+        self.httpd.registry = metrics_registry
+        self.thread = None
+
+    @property
+    def url(self):
+        """Base URL of the endpoint"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Start serving in a background thread"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop the server"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
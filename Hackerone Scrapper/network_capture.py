@@ -0,0 +1,133 @@
+import copy
+import json
+import time
+import base64
+import logging
+
+logger = logging.getLogger("NetworkCapture")
+
+
+def network_logging_options(options):
+    """Return a copy of Chrome options with the performance log, which carries the DevTools network events"""
+    options = copy.deepcopy(options)
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+def graphql_operations(post_data):
+    """Return the (operationName, variables) of each operation in a GraphQL request body"""
+    try:
+        body = json.loads(post_data or "")
+    except ValueError:
+        return []
+    operations = body if isinstance(body, list) else [body]
+    return [(op.get("operationName"), op.get("variables") or {}) for op in operations if isinstance(op, dict)]
+
+
+class CapturedRequest:
+    """A request the page made, as far as the network events have told us"""
+
+    def __init__(self, request_id, url, method, post_data):
+        self.id = request_id
+        self.url = url
+        self.method = method
+        self.post_data = post_data
+        self.status = None
+        self.mime_type = None
+        self.finished = False
+
+
+class NetworkCapture:
+    """Read the GraphQL responses a page fetches for itself from Chrome's performance log
+
+    Chrome writes every DevTools network event to the performance log when
+    the driver was started with ``goog:loggingPrefs``. The events say which
+    requests the page sent and when each response finished loading; the body
+    is then read with ``Network.getResponseBody`` from the browser's own
+    buffer, so the data costs no extra request.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.requests = {}
+        self.checked = set()
+
+    def start(self):
+        """Enable the network events and forget everything logged so far"""
+        self.driver.execute_cdp_cmd("Network.enable", {})
+        self.driver.get_log("performance")
+        self.requests = {}
+        self.checked = set()
+
+    def poll(self):
+        """Apply the network events logged since the last poll"""
+        for entry in self.driver.get_log("performance"):
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, TypeError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params") or {}
+            request_id = params.get("requestId")
+            if method == "Network.requestWillBeSent":
+                request = params.get("request") or {}
+                self.requests[request_id] = CapturedRequest(request_id, request.get("url"), request.get("method"),
+                                                            request.get("postData"))
+            elif request_id in self.requests:
+                if method == "Network.responseReceived":
+                    response = params.get("response") or {}
+                    self.requests[request_id].status = response.get("status")
+                    self.requests[request_id].mime_type = response.get("mimeType")
+                elif method == "Network.loadingFinished":
+                    self.requests[request_id].finished = True
+
+    def post_data(self, request):
+        """Return the body a request was sent with, asking Chrome for it when the event left it out"""
+        if request.post_data is None:
+            try:
+                request.post_data = self.driver.execute_cdp_cmd(
+                    "Network.getRequestPostData", {"requestId": request.id}).get("postData")
+            except Exception:
+                return None
+        return request.post_data
+
+    def body(self, request):
+        """Decode the JSON body of a finished response, or return None"""
+        try:
+            result = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request.id})
+            body = result.get("body") or ""
+            if result.get("base64Encoded"):
+                body = base64.b64decode(body).decode("utf-8")
+            return json.loads(body)
+        except Exception as e:
+            # Chrome drops bodies it has evicted from its buffer
+            logger.debug(f"Could not read the response body of {request.url}: {e}")
+            return None
+
+    def wait_for_operation(self, operation_name, match=None, timeout=10, poll=0.1):
+        """Wait for the response to a GraphQL operation and return (data, variables), or (None, None)
+
+        ``match`` is called with the operation's variables and can reject
+        responses meant for another page.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            self.poll()
+            for request in list(self.requests.values()):
+                if not request.finished or request.id in self.checked:
+                    continue
+                self.checked.add(request.id)
+                if request.method != "POST" or (request.status or 0) >= 400 or "json" not in (request.mime_type or ""):
+                    continue
+                operations = graphql_operations(self.post_data(request))
+                for position, (name, variables) in enumerate(operations):
+                    if name != operation_name or (match is not None and not match(variables)):
+                        continue
+                    data = self.body(request)
+                    if isinstance(data, list):
+                        data = data[position] if position < len(data) else None
+                    if data is not None:
+                        return data, variables
+            if time.monotonic() >= deadline:
+                return None, None
+            time.sleep(poll)
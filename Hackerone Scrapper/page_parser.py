@@ -0,0 +1,62 @@
+import re
+from bs4 import BeautifulSoup
+from fetch_backend import unique
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+CVE_PATTERN = r'(CVE-\d{4}-\d+)'
+CWE_PATTERN = r'(CWE-\d+)'
+
+# Links on hacktivity pages that are navigation rather than report content
+NAVIGATION_PATHS = ["/hacktivity/", "/opportunities/", "/directory/", "/leaderboard", "/users/sign_in"]
+
+
+def parse_html(html):
+    """Parse a rendered page once so every lookup runs locally"""
+    return BeautifulSoup(html, PARSER)
+
+
+def table_cell_ids(soup, column, pattern):
+    """Collect IDs matching a regex from one column of every table row"""
+    regex = re.compile(pattern)
+    ids = []
+    for row in soup.select("tr"):
+        cells = row.find_all("td")
+        if len(cells) > column:
+            match = regex.search(cells[column].get_text(" ", strip=True))
+            if match:
+                ids.append(match.group(1))
+    return ids
+
+
+def parse_cve_ids(html):
+    """Extract CVE IDs from the second column of the CVE discovery table"""
+    return table_cell_ids(parse_html(html), 1, CVE_PATTERN)
+
+
+def parse_cwe_ids(html):
+    """Extract CWE IDs from the first column of the CWE discovery table"""
+    return table_cell_ids(parse_html(html), 0, CWE_PATTERN)
+
+
+def parse_report_ids(html):
+    """Extract report IDs from every report link on a hacktivity page"""
+    ids = []
+    for link in parse_html(html).select("a[href*='/reports/']"):
+        match = re.search(r'/reports/(\d+)', link.get("href", ""))
+        if match:
+            ids.append(match.group(1))
+    return unique(ids)
+
+
+def parse_content_links(html):
+    """Return the program/report links on a hacktivity page and whether it shows an error"""
+    soup = parse_html(html)
+    links = [link.get("href", "") for link in soup.select("a[href^='https://hackerone.com/']")]
+    content_links = [href for href in links if not any(x in href for x in NAVIGATION_PATHS)]
+    has_error = soup.find(string=re.compile("Error")) is not None
+    return content_links, has_error
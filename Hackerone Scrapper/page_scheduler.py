@@ -0,0 +1,89 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+class PageScheduler:
+    """Fetch pageIndex-addressable listing pages with a bounded pool of workers
+
+    Each worker thread gets its own fetch backend from ``backend_factory`` (an
+    HTTP client or a browser), and every fetch first takes a token from the
+    shared rate limiter. Pages are fetched at most ``lookahead`` pages ahead
+    of the one being consumed and yielded strictly in page order, so a slow
+    page holds back at most that many finished ones in memory.
+    """
+
+    def __init__(self, backend_factory, workers=4, rate_limiter=None, lookahead=None):
+        self.backend_factory = backend_factory
+        self.workers = max(1, workers)
+        self.lookahead = max(self.workers, lookahead or 2 * self.workers)
+        self.rate_limiter = rate_limiter
+        self.local = threading.local()
+        self.backends = []
+        self.lock = threading.Lock()
+
+    def get_backend(self):
+        """Return the backend owned by the current worker thread"""
+        backend = getattr(self.local, "backend", None)
+        if backend is None:
+            backend = self.backend_factory()
+            self.local.backend = backend
+            with self.lock:
+                self.backends.append(backend)
+        return backend
+
+    def fetch(self, page_index):
+        """Fetch a single page on a worker thread"""
+        backend = self.get_backend()
+        if self.rate_limiter is not None and not backend.is_cached(page_index):
+            self.rate_limiter.acquire()
+        return backend.fetch_page(page_index)
+
+    def run(self, start=0, last_page=None, max_pages=None):
+        """Yield (page_index, PageResult) from ``start`` until the listing ends
+
+        ``last_page`` is the index one past the final page when it is already
+        known (for example from a total count); otherwise the end is found by
+        probing ahead until a page comes back empty or without a next page.
+        """
+        if max_pages is not None:
+            last_page = max_pages if last_page is None else min(last_page, max_pages)
+
+        pending = {}
+        results = {}
+        next_submit = start
+        next_emit = start
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            while last_page is None or next_emit < last_page:
+                # Keep every worker busy, probing ahead of the page being consumed but no further than the look-ahead
+                while (len(pending) < self.workers and next_submit < next_emit + self.lookahead
+                       and (last_page is None or next_submit < last_page)):
+                    pending[executor.submit(self.fetch, next_submit)] = next_submit
+                    next_submit += 1
+
+                if next_emit not in results:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        page_index = pending.pop(future)
+                        results[page_index] = future
+                        if future.exception() is None:
+                            page = future.result()
+                            # An empty page or one without a next page marks the end
+                            if not page.ids:
+                                last_page = page_index if last_page is None else min(last_page, page_index)
+                            elif not page.has_next:
+                                last_page = page_index + 1 if last_page is None else min(last_page, page_index + 1)
+                    continue
+
+                page = results.pop(next_emit).result()
+                if not page.ids:
+                    break
+                yield next_emit, page
+                next_emit += 1
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+            for backend in self.backends:
+                backend.close()
+            self.backends = []
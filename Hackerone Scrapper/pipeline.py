@@ -0,0 +1,133 @@
+import os
+import queue
+
+
+class LinkRecord:
+    """A normalized link produced by a scraper"""
+
+    __slots__ = ("category", "item_id", "url", "page_index")
+
+    def __init__(self, category, item_id, url, page_index=None):
+        self.category = category
+        self.item_id = item_id
+        self.url = url
+        self.page_index = page_index
+
+    def to_dict(self):
+        """Return the record as a plain dict"""
+        return {"category": self.category, "id": self.item_id, "url": self.url, "page_index": self.page_index}
+
+    def __repr__(self):
+        return f"LinkRecord({self.category!r}, {self.item_id!r}, {self.url!r}, {self.page_index!r})"
+
+
+class Sink:
+    """Destination for new links, written one page at a time"""
+
+    def write(self, records):
+        """Write a batch of new records"""
+        raise NotImplementedError("Sinks must implement write")
+
+    def close(self):
+        """Flush and release the sink"""
+
+
+class TextFileSink(Sink):
+    """Append one URL per line to a text file, flushing after every page"""
+
+    def __init__(self, path, on_written=None):
+        self.path = path
+        self.on_written = on_written
+        self.file = None
+
+    def write(self, records):
+        """Append the URLs of a batch and flush them to disk"""
+        if not records:
+            return
+        if self.file is None:
+            self.file = open(self.path, "a")
+        for record in records:
+            self.file.write(f"{record.url}\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        if self.on_written:
+            self.on_written(records)
+
+    def close(self):
+        """Close the file"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class QueueSink(Sink):
+    """Hand new records to a consumer thread through a bounded queue
+
+    A full queue blocks the crawl, so a slow consumer applies backpressure
+    instead of letting records pile up in memory. ``None`` is put on the queue
+    when the crawl ends.
+    """
+
+    def __init__(self, maxsize=1000):
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def write(self, records):
+        """Queue every record of a batch"""
+        for record in records:
+            self.queue.put(record)
+
+    def close(self):
+        """Tell the consumer there are no more records"""
+        self.queue.put(None)
+
+    def __iter__(self):
+        """Yield records as they arrive until the crawl ends"""
+        while True:
+            record = self.queue.get()
+            if record is None:
+                return
+            yield record
+
+
+class CallbackSink(Sink):
+    """Call a function with every batch of new records"""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def write(self, records):
+        """Pass a batch to the callback"""
+        if records:
+            self.callback(records)
+
+
+class LinkPipeline:
+    """Turn page IDs into normalized links, keep the new ones and fan them out to sinks"""
+
+    def __init__(self, category, link_store, sinks, links_for_page, id_from_link):
+        self.category = category
+        self.link_store = link_store
+        self.sinks = sinks
+        self.links_for_page = links_for_page
+        self.id_from_link = id_from_link
+        self.new_links = 0
+
+    def records(self, page_index, ids):
+        """Normalize the IDs of a page into link records"""
+        return [LinkRecord(self.category, self.id_from_link(url), url, page_index)
+                for url in self.links_for_page(page_index, ids)]
+
+    def process(self, page_index, ids):
+        """Store a page's links and write the new ones to every sink"""
+        records = self.records(page_index, ids)
+        new_urls = set(self.link_store.add_many(self.category, [r.url for r in records], page_index, self.id_from_link))
+        new_records = [record for record in records if record.url in new_urls]
+        for sink in self.sinks:
+            sink.write(new_records)
+        self.new_links += len(new_records)
+        return new_records
+
+    def close(self):
+        """Close every sink"""
+        for sink in self.sinks:
+            sink.close()
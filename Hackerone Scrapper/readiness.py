@@ -0,0 +1,52 @@
+import time
+
+# Returns [matching element count, text of the first match, resources loaded so far]
+# in a single round trip, so polling costs one WebDriver call per check
+SIGNATURE_SCRIPT = """
+var nodes = arguments[0] ? document.querySelectorAll(arguments[0]) : [];
+var first = nodes.length ? (nodes[0].innerText || nodes[0].getAttribute('href') || '') : '';
+var resources = window.performance ? performance.getEntriesByType('resource').length : 0;
+return [nodes.length, first, resources];
+"""
+
+
+def page_signature(driver, selector):
+    """Return (count, first item text, resource count) for a CSS selector"""
+    count, first, resources = driver.execute_script(SIGNATURE_SCRIPT, selector)
+    return count, first, resources
+
+
+def wait_for_network_idle(driver, quiet=0.5, timeout=5, poll=0.1):
+    """Wait until the page has stopped loading new resources for ``quiet`` seconds"""
+    deadline = time.monotonic() + timeout
+    last = None
+    last_change = time.monotonic()
+    while time.monotonic() < deadline:
+        resources = page_signature(driver, None)[2]
+        if resources != last:
+            last = resources
+            last_change = time.monotonic()
+        elif time.monotonic() - last_change >= quiet:
+            return True
+        time.sleep(poll)
+    return False
+
+
+def wait_until_ready(driver, selector, previous=None, timeout=10, poll=0.1):
+    """Wait until a listing has rendered, instead of sleeping for a fixed time
+
+    The page is ready once ``selector`` matches at least one element and, when
+    ``previous`` is the signature taken before navigating, once the row count
+    or the first item has changed. Pages without a selector, or that never
+    match it (such as an empty last page), fall back to waiting for the
+    network to go idle. Returns the new signature.
+    """
+    if selector:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            signature = page_signature(driver, selector)
+            if signature[0] > 0 and (previous is None or signature[:2] != previous[:2]):
+                return signature
+            time.sleep(poll)
+    wait_for_network_idle(driver)
+    return page_signature(driver, selector)
@@ -0,0 +1,182 @@
+import re
+import time
+import asyncio
+import logging
+from tqdm import tqdm
+from async_client import AsyncHttpClient
+from fetch_backend import FetchError, parse_retry_after
+from metrics import FETCH_SECONDS, RETRIES, timed
+from scraper_base import shared_rate_limiter
+
+logger = logging.getLogger("ReportEnricher")
+
+# Responses that mean the report is gone or no longer public, so retrying will not help
+PERMANENT_STATUSES = (401, 403, 404, 410)
+
+
+def parse_bounty(value):
+    """Convert a bounty amount such as "1,500.00" to a float"""
+    if value in (None, ""):
+        return None
+    try:
+        return float(str(value).replace(",", "").lstrip("$"))
+    except ValueError:
+        return None
+
+
+def weakness_cwe(weakness):
+    """Return the CWE of a report's weakness, such as "CWE-79", from its external_id"""
+    external_id = weakness.get("external_id")
+    if isinstance(external_id, int):
+        return f"CWE-{external_id}"
+    if isinstance(external_id, str):
+        match = re.fullmatch(r'(?:cwe-)?(\d+)', external_id.strip(), re.IGNORECASE)
+        if match:
+            return f"CWE-{match.group(1)}"
+    return None
+
+
+def parse_report(report_id, data):
+    """Pick the fields we keep from a report's JSON document"""
+    severity = data.get("severity_rating") or (data.get("severity") or {}).get("rating")
+    weakness = data.get("weakness") or {}
+    team = data.get("team") or {}
+    return {
+        "report_id": str(report_id),
+        "title": data.get("title"),
+        "severity": severity,
+        "cwe": weakness_cwe(weakness),
+        "weakness": weakness.get("name"),
+        "bounty": parse_bounty(data.get("bounty_amount") or data.get("formatted_bounty")),
+        "team": team.get("handle") or (team.get("profile") or {}).get("name"),
+        "disclosed_at": data.get("disclosed_at"),
+    }
+
+
+class ReportEnricher:
+    """Fetch metadata for the disclosed reports in the link store
+
+    Reports are fetched from their ``/reports/<id>.json`` documents by a fixed
+    number of asyncio workers sharing one AsyncHttpClient, so at most
+    ``concurrency`` requests are in flight, and every worker takes its turn
+    from the rate limiter shared with the scrapers. Only reports that are not
+    in the report store yet are fetched, unless ``refresh`` is set, in which
+    case known reports are revalidated with If-None-Match/If-Modified-Since.
+    """
+
+    def __init__(self, link_store, report_store, category="Disclosed Reports", concurrency=8,
+                 max_retries=3, timeout=30, rate_limiter=None, base_url="https://hackerone.com"):
+        self.link_store = link_store
+        self.report_store = report_store
+        self.category = category
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.rate_limiter = rate_limiter or shared_rate_limiter()
+        self.base_url = base_url.rstrip("/")
+        # One connection per worker, reused across reports
+        self.client = AsyncHttpClient({
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+            "Accept": "application/json",
+        }, limit=concurrency, timeout=timeout)
+
+    def report_url(self, report_id):
+        """Return the JSON URL of a report"""
+        return f"{self.base_url}/reports/{report_id}.json"
+
+    def pending_ids(self, refresh=False):
+        """Report IDs from the link store that still need fetching"""
+        report_ids = [row["item_id"] for row in self.link_store.rows(self.category) if row["item_id"]]
+        return report_ids if refresh else self.report_store.missing(report_ids)
+
+    async def fetch_report(self, report_id):
+        """Fetch one report and store it, returning "updated", "unchanged" or "missing"
+
+        The caller takes the rate limit token for the first attempt, retries
+        take their own.
+        """
+        url = self.report_url(report_id)
+        etag, last_modified = self.report_store.validators(report_id)
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        retries = 0
+        while True:
+            retry_after = None
+            try:
+                start = time.monotonic()
+                with timed(FETCH_SECONDS, category=self.category, backend="report"):
+                    response = await self.client.get(url, headers=headers)
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                self.rate_limiter.observe(time.monotonic() - start, response.status_code, retry_after)
+                if response.status_code == 304:
+                    self.report_store.touch(report_id)
+                    return "unchanged"
+                if response.status_code in PERMANENT_STATUSES:
+                    # Remember the report so it is not requested again on every run
+                    self.report_store.save({"report_id": str(report_id), "url": url, "status": response.status_code})
+                    return "missing"
+                if response.status_code >= 400:
+                    raise OSError(f"Server returned status {response.status_code}")
+                data = response.json()
+                break
+            except ValueError as e:
+                raise FetchError(f"Invalid JSON from {url}: {e}")
+            except Exception as e:
+                retries += 1
+                if retries >= self.max_retries:
+                    raise FetchError(f"Request to {url} failed after {retries} attempts: {e}")
+                logger.debug(f"Retry {retries}/{self.max_retries} for report {report_id} due to: {e}")
+                RETRIES.inc(category=self.category, backend="report")
+                await self.rate_limiter.backoff_async(retries, retry_after, category=self.category)
+                await self.rate_limiter.acquire_async()
+
+        report = parse_report(report_id, data)
+        report.update({
+            "url": url,
+            "status": response.status_code,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        })
+        self.report_store.save(report, data)
+        return "updated"
+
+    async def enrich_async(self, report_ids, progress=None):
+        """Fetch reports with a bounded number of concurrent workers and return result counts"""
+        counts = {"updated": 0, "unchanged": 0, "missing": 0, "failed": 0}
+        pending = iter(report_ids)
+
+        async def worker():
+            for report_id in pending:
+                await self.rate_limiter.acquire_async()
+                try:
+                    result = await self.fetch_report(report_id)
+                except FetchError as e:
+                    logger.warning(f"Could not fetch report {report_id}: {e}")
+                    result = "failed"
+                counts[result] += 1
+                if progress is not None:
+                    progress.update(1)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        finally:
+            # The connections belong to this event loop, and every call runs in a new one
+            await self.client.close()
+        return counts
+
+    def run(self, refresh=False):
+        """Enrich every pending report and return the result counts"""
+        report_ids = self.pending_ids(refresh)
+        print(f"Fetching metadata for {len(report_ids)} reports")
+        with tqdm(total=len(report_ids), desc="Enriching reports", unit="report") as pbar:
+            counts = asyncio.run(self.enrich_async(report_ids, pbar))
+        print(f"Reports updated: {counts['updated']}, unchanged: {counts['unchanged']}, "
+              f"missing: {counts['missing']}, failed: {counts['failed']}")
+        return counts
+
+    def close(self):
+        """Close the HTTP client if a run was interrupted before it could"""
+        asyncio.run(self.client.close())
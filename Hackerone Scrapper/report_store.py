@@ -0,0 +1,100 @@
+import os
+import json
+import sqlite3
+import threading
+from link_store import utc_now
+
+REPORT_COLUMNS = ("report_id", "url", "title", "severity", "cwe", "weakness", "bounty", "team",
+                  "disclosed_at", "status", "etag", "last_modified", "fetched_at")
+
+
+class ReportStore:
+    """SQLite table of report metadata fetched by the enricher
+
+    Each row keeps the ETag and Last-Modified validators of the last fetch,
+    so a refresh can ask the server whether a report changed instead of
+    downloading it again.
+    """
+
+    def __init__(self, path, wal=True):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS reports (
+                report_id TEXT PRIMARY KEY,
+                url TEXT,
+                title TEXT,
+                severity TEXT,
+                cwe TEXT,
+                weakness TEXT,
+                bounty REAL,
+                team TEXT,
+                disclosed_at TEXT,
+                status INTEGER,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at TEXT NOT NULL,
+                data TEXT
+            )
+        """)
+        self.conn.commit()
+
+    def save(self, report, data=None):
+        """Insert or replace the metadata of a report"""
+        row = dict(report, fetched_at=utc_now())
+        values = [row.get(column) for column in REPORT_COLUMNS]
+        with self.lock, self.conn:
+            self.conn.execute(
+                f"INSERT OR REPLACE INTO reports ({', '.join(REPORT_COLUMNS)}, data) "
+                f"VALUES ({', '.join('?' * (len(REPORT_COLUMNS) + 1))})",
+                values + [json.dumps(data) if data is not None else None],
+            )
+
+    def touch(self, report_id):
+        """Record that a report was checked and has not changed"""
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE reports SET fetched_at = ? WHERE report_id = ?", (utc_now(), str(report_id)))
+
+    def validators(self, report_id):
+        """Return the (etag, last_modified) of the last fetch of a report"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified FROM reports WHERE report_id = ?", (str(report_id),)
+            ).fetchone()
+        return row if row else (None, None)
+
+    def get(self, report_id):
+        """Return the stored metadata of a report as a dict, or None"""
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT {', '.join(REPORT_COLUMNS)} FROM reports WHERE report_id = ?", (str(report_id),)
+            ).fetchone()
+        return dict(zip(REPORT_COLUMNS, row)) if row else None
+
+    def missing(self, report_ids):
+        """Return the IDs that have never been fetched, keeping their order"""
+        with self.lock:
+            known = {row[0] for row in self.conn.execute("SELECT report_id FROM reports")}
+        return [report_id for report_id in report_ids if str(report_id) not in known]
+
+    def count(self):
+        """Number of stored reports"""
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    def rows(self):
+        """Yield every stored report as a dict"""
+        with self.lock:
+            rows = self.conn.execute(f"SELECT {', '.join(REPORT_COLUMNS)} FROM reports ORDER BY rowid").fetchall()
+        for row in rows:
+            yield dict(zip(REPORT_COLUMNS, row))
+
+    def close(self):
+        """Close the database connection"""
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+from fetch_backend import FetchError
+
+
+class CacheMiss(FetchError):
+    """Raised in offline mode when a response is not in the cache"""
+
+
+class ResponseCache:
+    """On-disk cache of decoded responses, addressed by request key
+
+    Each response is stored as ``<dir>/<key[:2]>/<key>.json``, where the key is
+    the hash of the request's method, URL and body, so a response from a
+    fixture server is never served for the real site. Entries older than the
+    TTL passed to ``get`` are treated as missing, and the least recently used
+    entries are deleted once the cache grows beyond ``max_size_mb``. In
+    offline mode every entry is used regardless of its age and a miss raises
+    CacheMiss instead of reaching the network.
+    """
+
+    def __init__(self, directory, max_size_mb=500, offline=False):
+        self.directory = directory
+        self.max_size = max_size_mb * 1024 * 1024
+        self.offline = offline
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # Entry read by each thread's last contains(), reused by the get() that follows
+        self.local = threading.local()
+        os.makedirs(directory, exist_ok=True)
+        # key -> size in bytes, least recently used first
+        self.entries = OrderedDict()
+        self.size = 0
+        self.load_index()
+
+    def load_index(self):
+        """Rebuild the LRU order from the files' modification times"""
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    stat = os.stat(os.path.join(root, name))
+                    found.append((stat.st_mtime, name[:-5], stat.st_size))
+        for _, key, size in sorted(found):
+            self.entries[key] = size
+            self.size += size
+
+    def path(self, key):
+        """File holding the entry for a key"""
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def read(self, key):
+        """Parse the entry for a key, or return None if it is missing or unreadable"""
+        peeked = getattr(self.local, "peeked", None)
+        self.local.peeked = None
+        if peeked is not None and peeked[0] == key:
+            return peeked[1]
+        try:
+            with open(self.path(key), "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if isinstance(entry, dict) and "stored_at" in entry else None
+
+    def is_fresh(self, entry, ttl):
+        """Whether an entry may still be used"""
+        return self.offline or ttl is None or time.time() - entry["stored_at"] <= ttl
+
+    def get(self, key, ttl=None):
+        """Return the cached response for a key, or None if it is missing or expired"""
+        entry = self.read(key)
+        if entry is None:
+            with self.lock:
+                self.misses += 1
+            if self.offline:
+                raise CacheMiss(f"Response {key} is not in the cache at {self.directory} (offline mode)")
+            return None
+
+        if not self.is_fresh(entry, ttl):
+            with self.lock:
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+            if key in self.entries:
+                self.entries.move_to_end(key)
+        try:
+            # The modification time keeps the LRU order across runs
+            os.utime(self.path(key))
+        except OSError:
+            pass
+        return entry["response"]
+
+    def contains(self, key, ttl=None):
+        """Check whether a fresh entry exists without counting a hit or miss"""
+        entry = self.read(key)
+        if entry is None or not self.is_fresh(entry, ttl):
+            return False
+        # Checking first and then fetching is the usual pattern, so keep the entry for the get()
+        self.local.peeked = (key, entry)
+        return True
+
+    def put(self, key, response, url=None, request=None, category=None):
+        """Store a response and evict the least recently used entries if the cache is too big"""
+        path = self.path(key)
+        self.local.peeked = None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {"url": url, "request": request, "category": category, "stored_at": time.time(), "response": response}
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+        size = os.path.getsize(path)
+
+        with self.lock:
+            self.size += size - self.entries.pop(key, 0)
+            self.entries[key] = size
+            while self.size > self.max_size and len(self.entries) > 1:
+                old_key, old_size = self.entries.popitem(last=False)
+                self.size -= old_size
+                try:
+                    os.remove(self.path(old_key))
+                except OSError:
+                    pass
+
+    def clear(self):
+        """Delete every entry"""
+        with self.lock:
+            for key in list(self.entries):
+                try:
+                    os.remove(self.path(key))
+                except OSError:
+                    pass
+            self.entries.clear()
+            self.size = 0
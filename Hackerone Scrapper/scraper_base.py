@@ -1,7 +1,6 @@
 import os
 import time
 import requests
-from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
@@ -13,27 +12,284 @@ import json
 import re
 from tqdm import tqdm
 import logging
-import sys
-from webdriver_manager.chrome import ChromeDriverManager
+import math
+import threading
+import random
+import asyncio
+from fetch_backend import AsyncHttpBackend, FetchError, HttpBackend, HybridBackend, PageResult, SeleniumBackend
+from page_scheduler import PageScheduler
+from driver_pool import shared_driver_pool
+from browser_profiles import block_requests, profile_options
+from network_capture import network_logging_options
+from crawl_state import get_high_water_mark, save_high_water_mark
+from crawl_journal import CrawlJournal
+from link_store import LinkStore
+from metrics import LINKS, PAGES, RETRIES, SLEEP_SECONDS, UNCHANGED_PAGES, phase_summary, record_sleep
+from pipeline import LinkPipeline, TextFileSink
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("scraper.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+def chromedriver_path():
+    """Resolve the ChromeDriver binary once per process instead of once per browser"""
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path is None:
+            # Imported here because it is slow to load and only needed once a browser starts
+            from webdriver_manager.chrome import ChromeDriverManager
+            _chromedriver_path = ChromeDriverManager().install()
+        return _chromedriver_path
+
+class RateLimiter:
+    """Thread-safe and asyncio-safe token bucket shared by every worker of a crawl
+    
+    The rate adapts to how the site responds (AIMD): it is halved on HTTP 429
+    and server errors, reduced when responses are slower than
+    ``target_latency``, and grows back by a tenth of the configured rate for
+    every fast response. A Retry-After from the server pauses every worker
+    that shares the limiter, and failed requests back off exponentially with
+    full jitter so retries from many workers do not arrive in lockstep.
+    """
+    
+    def __init__(self, rate=1.0, burst=1, min_rate=None, target_latency=None, backoff_base=1.0, max_backoff=60.0):
+        """Allow ``rate`` requests per second with bursts of up to ``burst``; None disables limiting"""
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate if min_rate is not None else (rate / 16 if rate else None)
+        self.target_latency = target_latency
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.lock = threading.Lock()
+        
+    def reserve(self):
+        """Take a token if one is available, otherwise return how many seconds to wait for one"""
+        with self.lock:
+            now = time.monotonic()
+            if self.paused_until > now:
+                return self.paused_until - now
+            if not self.rate:
+                return 0
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+        
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            wait = self.reserve()
+            if wait <= 0:
+                return
+            record_sleep(wait, "rate_limit")
+            
+    async def acquire_async(self):
+        """Wait without blocking the event loop until a request may be sent"""
+        while True:
+            wait = self.reserve()
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+            SLEEP_SECONDS.inc(wait, reason="rate_limit")
+            
+    def pause(self, seconds):
+        """Hold every worker back for ``seconds``, as asked by a Retry-After header"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            
+    def observe(self, latency=None, status=None, retry_after=None):
+        """Adjust the rate after a response took ``latency`` seconds and returned ``status``"""
+        if retry_after:
+            self.pause(retry_after)
+        if not self.max_rate:
+            return
+        with self.lock:
+            if status == 429 or (status is not None and status >= 500):
+                self.rate = max(self.min_rate, self.rate / 2)
+            elif self.target_latency and latency is not None and latency > self.target_latency:
+                self.rate = max(self.min_rate, self.rate * 0.9)
+            else:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+                
+    def backoff_delay(self, attempt, retry_after=None):
+        """Seconds to wait before retry number ``attempt``: Retry-After if given, else jittered exponential"""
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_backoff, self.backoff_base * 2 ** max(0, attempt - 1)))
+        
+    def backoff(self, attempt, retry_after=None, **labels):
+        """Sleep before retry number ``attempt`` and return the time slept"""
+        delay = self.backoff_delay(attempt, retry_after)
+        if delay > 0:
+            record_sleep(delay, "backoff", **labels)
+        return delay
+        
+    async def backoff_async(self, attempt, retry_after=None, **labels):
+        """Wait before retry number ``attempt`` without blocking the event loop"""
+        delay = self.backoff_delay(attempt, retry_after)
+        if delay > 0:
+            await asyncio.sleep(delay)
+            SLEEP_SECONDS.inc(delay, reason="backoff", **labels)
+        return delay
+
+_shared_rate_limiter = None
+_shared_rate_limiter_lock = threading.Lock()
+
+def configure_shared_rate_limiter(**kwargs):
+    """Replace the process-wide rate limiter with one built from ``kwargs``"""
+    global _shared_rate_limiter
+    with _shared_rate_limiter_lock:
+        _shared_rate_limiter = RateLimiter(**kwargs)
+        return _shared_rate_limiter
+
+def shared_rate_limiter():
+    """Return the rate limiter shared by every scraper and worker, creating it on first use"""
+    global _shared_rate_limiter
+    with _shared_rate_limiter_lock:
+        if _shared_rate_limiter is None:
+            _shared_rate_limiter = RateLimiter(rate=1.0)
+        return _shared_rate_limiter
+
+class Crawl:
+    """Progress of one scrape: the link pipeline, the progress bar and the incremental stop
+    
+    Pages are handed over in order by the sync or the asyncio scrape loop;
+    each one goes straight from the fetcher to the sinks, so nothing
+    accumulates in memory.
+    """
+    
+    def __init__(self, scraper):
+        self.scraper = scraper
+        self.incremental = scraper.incremental and scraper.incremental_supported
+        if scraper.incremental and not self.incremental:
+            print(f"Incremental mode is not supported for {scraper.category_name}, running a full crawl")
+        scraper.journal = CrawlJournal(scraper.journal_file, scraper.page_size)
+        self.pipeline = None
+        self.pbar = None
+        self.page_count = 0
+        self.total_ids = 0
+        self.newest = None
+        self.high_water_mark = {}
+        self.known_pages = 0
+        self.unchanged_pages = 0
+        self.unchanged_run = 0
+        
+    def start(self):
+        """Open the pipeline and the progress bar"""
+        scraper = self.scraper
+        # Bring the output file up to date so the sinks only ever append to it
+        scraper.export_links()
+        self.pipeline = scraper.create_pipeline()
+        if self.incremental:
+            self.high_water_mark = get_high_water_mark(scraper.state_file, scraper.category_name)
+        self.pbar = tqdm(desc=f"Scraping {scraper.category_name} pages", unit="page", position=scraper.progress_position)
+        
+    def add_page(self, page_index, page):
+        """Send a page's new links to the sinks and return True once the crawl should stop"""
+        scraper = self.scraper
+        category = scraper.category_name
+        if self.newest is None:
+            self.newest = (page.ids[0], page.activity_at)
+        # Check before storing the page, which makes all of its links known
+        known = self.incremental and (page.unchanged or scraper.is_known_page(page_index, page, self.high_water_mark))
+        scraper.store_page(self.pipeline, page_index, page)
+        self.page_count += 1
+        self.total_ids += len(page.ids)
+        self.pbar.set_postfix({f"{category} found": self.total_ids, "new": self.pipeline.new_links})
+        self.pbar.update(1)
+        
+        if self.incremental:
+            # Listings are newest first, so a run of known pages means we caught up
+            self.known_pages = self.known_pages + 1 if known else 0
+            if self.known_pages >= scraper.stop_after_known_pages:
+                print(f"Reached {self.known_pages} pages of known {category}, stopping")
+                return True
+        
+        self.unchanged_pages += page.unchanged
+        self.unchanged_run = self.unchanged_run + 1 if page.unchanged else 0
+        if scraper.stop_after_unchanged_pages and self.unchanged_run >= scraper.stop_after_unchanged_pages:
+            # Nothing was added above these pages, so the rest of the listing has not moved either
+            print(f"Reached {self.unchanged_run} unchanged pages of {category}, stopping")
+            return True
+        return False
+        
+    def finish(self):
+        """Report the totals and remember the newest item for the next incremental run"""
+        scraper = self.scraper
+        if scraper.max_pages is not None and self.page_count >= scraper.max_pages:
+            print("Reached maximum page limit")
+        print(f"Found a total of {self.total_ids} {scraper.category_name} on {self.page_count} pages, "
+              f"{self.pipeline.new_links} new links, {self.unchanged_pages} pages unchanged")
+        if self.newest is not None:
+            save_high_water_mark(scraper.state_file, scraper.category_name, *self.newest)
+        
+    def close(self):
+        """Close the progress bar, the pipeline and the journal"""
+        if self.pbar is not None:
+            self.pbar.close()
+        if self.pipeline is not None:
+            self.pipeline.close()
+            self.scraper.new_link_count = self.pipeline.new_links
+        self.scraper.journal.close()
 
 class BaseHackerOneScraper:
     """Base class for HackerOne scrapers"""
     
-    def __init__(self, output_file, category_name):
+    # Fetch backends: "http" talks to GraphQL, "selenium" renders pages,
+    # "auto" uses HTTP and falls back to Selenium if the first page fails,
+    # "async" talks to GraphQL from an asyncio event loop, "hybrid" renders
+    # pages but reads the GraphQL responses they fetch from the browser's network log
+    BACKENDS = ("auto", "http", "selenium", "async", "hybrid")
+    
+    def __init__(self, output_file, category_name, backend="auto"):
         """Initialize the scraper with output file and category name"""
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
         self.output_file = output_file
         self.category_name = category_name
+        self.backend = backend
+        self.graphql_url = "https://hackerone.com/graphql"
+        self.page_size = 25
+        self.max_pages = None
+        self.workers = 1
+        # Incremental mode stops after this many consecutive pages of known IDs
+        self.incremental = False
+        self.resume = True  # Continue an interrupted crawl from its journal
+        self.journal = None
+        self.incremental_supported = False
+        self.stop_after_known_pages = 3
+        # Pages whose fingerprint matches the last crawl reuse its IDs and skip the link store;
+        # a run of this many unchanged pages ends the crawl (None walks the whole listing)
+        self.fingerprint_pages = True
+        self.stop_after_unchanged_pages = None
+        self.driver_pool = None  # Defaults to the pool shared by every scraper in the process
+        # "lean" skips images, media, fonts, stylesheets and trackers when rendering with Selenium
+        self.browser_profile = "full"
+        self.progress_position = None  # tqdm line used when several scrapers share the terminal
+        self.error = None
+        self.elapsed_time = None
+        # Request rate shared by every scraper and worker in the process
+        self.rate_limiter = shared_rate_limiter()
+        # CSS selector that matches once a listing page has rendered its items
+        self.ready_selector = None
+        self.record_dir = None
+        # Shared on-disk cache of GraphQL responses, and how long this category's entries stay fresh
+        self.response_cache = None
+        self.cache_ttl = 3600
         self.links = []
+        # Extra sinks, such as a QueueSink, that receive new links while the crawl runs
+        self.sinks = []
+        # Set by cancel() from another thread; the crawl stops before its next page
+        self.cancelled = threading.Event()
+        self.new_link_count = 0
+        self._link_store = None
+        # Set when the link store is shared with other hosts, which rules out SQLite's WAL mode
+        self.shared_storage = False
         self.total_links = 0
         self.current_link = ""
         self.logger = logging.getLogger(f"{category_name}Scraper")
@@ -68,65 +324,448 @@ class BaseHackerOneScraper:
         
     def setup_driver(self):
         """Set up and return a Chrome webdriver"""
+        options = profile_options(self.chrome_options, self.browser_profile)
+        if self.backend == "hybrid":
+            options = network_logging_options(options)
         try:
             # Try to use webdriver-manager to get the ChromeDriver
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=self.chrome_options)
+            service = Service(chromedriver_path())
+            driver = webdriver.Chrome(service=service, options=options)
         except Exception as e:
             self.logger.warning(f"Failed to use webdriver-manager: {e}")
             # Fallback to default Chrome webdriver
-            driver = webdriver.Chrome(options=self.chrome_options)
+            driver = webdriver.Chrome(options=options)
             
         driver.set_page_load_timeout(30)
+        if self.browser_profile == "lean":
+            block_requests(driver)
         return driver
         
+    def get_driver_pool(self):
+        """Return the driver pool browsers are leased from"""
+        if self.driver_pool is None:
+            # Browsers that log their network traffic are kept apart from the others
+            pool_name = f"{self.browser_profile}-network" if self.backend == "hybrid" else self.browser_profile
+            self.driver_pool = shared_driver_pool(self.setup_driver, pool_name)
+        return self.driver_pool
+        
+    @property
+    def link_store(self):
+        """Index of every link found for this scraper's output directory"""
+        path = os.path.join(os.path.dirname(self.output_file), "links.db")
+        if self._link_store is None or self._link_store.path != path:
+            self._link_store = LinkStore(path, wal=not self.shared_storage)
+        return self._link_store
+        
+    def export_links(self):
+        """Write the stored links that are not in the output file yet and return them"""
+        store = self.link_store
+        if os.path.exists(self.output_file):
+            new_links = store.unexported(self.category_name)
+            mode = 'a'
+        else:
+            new_links = store.links(self.category_name)
+            mode = 'w'
+        with open(self.output_file, mode) as f:
+            for link in new_links:
+                f.write(f"{link}\n")
+        store.mark_exported(self.category_name, new_links)
+        return new_links
+        
     def save_links(self):
-        """Save the collected links to the output file"""
+        """Append the links that are not in the output file yet"""
         try:
-            with open(self.output_file, 'w') as f:
-                for link in self.links:
-                    f.write(f"{link}\n")
-            self.logger.info(f"Saved {len(self.links)} {self.category_name} links to {self.output_file}")
+            store = self.link_store
+            # Links may also have been set directly rather than found by scrape()
+            store.add_many(self.category_name, self.links, id_from_link=self.id_from_link)
+            new_links = self.export_links()
+            self.logger.info(f"Saved {len(new_links)} new {self.category_name} links to {self.output_file} "
+                             f"({store.count(self.category_name)} total)")
         except Exception as e:
             self.logger.error(f"Error saving links to {self.output_file}: {e}")
         
+    def import_existing_links(self):
+        """Import the output file into the link store the first time it is used"""
+        try:
+            store = self.link_store
+            if store.count(self.category_name) == 0 and os.path.exists(self.output_file):
+                links, duplicates = store.import_text_file(self.category_name, self.output_file, self.id_from_link)
+                if duplicates:
+                    # Earlier versions appended every link again on each run
+                    with open(self.output_file, 'w') as f:
+                        for link in links:
+                            f.write(f"{link}\n")
+                    self.logger.info(f"Removed {duplicates} duplicate links from {self.output_file}")
+            self.logger.info(f"Found {store.count(self.category_name)} existing {self.category_name} links in {store.path}")
+        except Exception as e:
+            self.logger.error(f"Error loading links from {self.output_file}: {e}")
+        
     def load_existing_links(self):
-        """Load existing links from the output file if it exists"""
-        if os.path.exists(self.output_file):
-            try:
-                with open(self.output_file, 'r') as f:
-                    self.links = [line.strip() for line in f.readlines()]
-                self.logger.info(f"Loaded {len(self.links)} existing {self.category_name} links from {self.output_file}")
-            except Exception as e:
-                self.logger.error(f"Error loading links from {self.output_file}: {e}")
-                self.links = []
+        """Load existing links from the link store, importing the output file the first time"""
+        self.import_existing_links()
+        try:
+            self.links = self.link_store.links(self.category_name)
+        except Exception as e:
+            self.logger.error(f"Error loading links from {self.output_file}: {e}")
+            self.links = []
             
+    def create_pipeline(self):
+        """Create the pipeline that turns fetched pages into stored and exported links"""
+        return LinkPipeline(self.category_name, self.link_store, self.create_sinks(),
+                            self.links_for_page, self.id_from_link)
+        
+    def create_sinks(self):
+        """Sinks that receive the new links of each page as soon as it is fetched"""
+        store = self.link_store
+        def mark_exported(records):
+            store.mark_exported(self.category_name, [record.url for record in records])
+        return [TextFileSink(self.output_file, on_written=mark_exported)] + list(self.sinks)
+        
+    @property
+    def state_file(self):
+        """File holding the per-category high-water marks"""
+        return os.path.join(os.path.dirname(self.output_file), "crawl_state.json")
+        
+    def id_from_link(self, link):
+        """Recover the ID a link was built from"""
+        return re.split(r'[/=]', link.rstrip("/"))[-1]
+        
+    def wait_before_retry(self, attempt):
+        """Count a retry of a page load and back off before trying again"""
+        RETRIES.inc(category=self.category_name, backend="selenium")
+        self.rate_limiter.backoff(attempt, category=self.category_name)
+        
     def update_progress(self, current, total, link=""):
         """Update and display the progress"""
         self.current_link = link
         self.logger.debug(f"Progress: {current}/{total} {self.category_name} links scraped | Current: {link}")
         
+    def graphql_payload(self, page_index):
+        """Return the GraphQL request for a listing page"""
+        raise NotImplementedError("Subclasses must implement graphql_payload")
+        
+    def parse_graphql(self, data):
+        """Return (ids, total_count) from a GraphQL listing response, optionally followed by a dict of PageResult fields"""
+        raise NotImplementedError("Subclasses must implement parse_graphql")
+        
+    def page_url(self, page_index):
+        """Return the URL of a listing page, or None if it is only reachable by clicking next"""
+        return None
+        
+    def extract_page_ids(self, driver):
+        """Extract the IDs from the page currently rendered in the driver"""
+        raise NotImplementedError("Subclasses must implement extract_page_ids")
+        
+    def build_link(self, item_id):
+        """Build the output link for a single ID"""
+        raise NotImplementedError("Subclasses must implement build_link")
+        
+    def links_for_page(self, page_index, ids):
+        """Return the output links for the IDs found on a page"""
+        return [self.build_link(item_id) for item_id in ids]
+        
+    def check_next_page(self, driver):
+        """Check if there's a next page button and if it's enabled"""
+        try:
+            # Find the next page button
+            next_button = WebDriverWait(driver, 5).until(
+                EC.presence_of_element_located((By.ID, "pagination-next-page"))
+            )
+            
+            # Check if the button is enabled
+            return next_button.is_enabled() and "disabled" not in next_button.get_attribute("class")
+        except (TimeoutException, NoSuchElementException):
+            return False
+        except Exception as e:
+            print(f"Error checking next page: {e}")
+            return False
+        
+    def create_backend(self, name=None):
+        """Create the fetch backend for this scraper"""
+        name = name or self.backend
+        if name == "selenium":
+            return SeleniumBackend(self)
+        if name == "hybrid":
+            return HybridBackend(self)
+        if name == "async":
+            return AsyncHttpBackend(self, record_dir=self.record_dir)
+        return HttpBackend(self, record_dir=self.record_dir)
+        
+    def iter_pages(self, start=0, end=None):
+        """Yield (page_index, PageResult) for every listing page from ``start`` (up to ``end``) in page order"""
+        max_pages = self.max_pages
+        if end is not None:
+            max_pages = end if max_pages is None else min(end, max_pages)
+        if max_pages is not None and start >= max_pages:
+            return
+        # The async backend's coroutines cannot be driven from here, so blocking HTTP stands in
+        backend = self.create_backend("http" if self.backend == "async" else None)
+        try:
+            # Fetch the first page on its own so a failing HTTP backend can fall back
+            while True:
+                try:
+                    if not backend.is_cached(start):
+                        self.rate_limiter.acquire()
+                    page = backend.fetch_page(start)
+                    break
+                except FetchError as e:
+                    offline = self.response_cache is not None and self.response_cache.offline
+                    if self.backend != "auto" or backend.name != "http" or offline:
+                        raise
+                    self.logger.warning(f"HTTP backend failed ({e}), falling back to Selenium")
+                    backend.close()
+                    backend = self.create_backend("selenium")
+            
+            if not page.ids:
+                return
+            yield start, page
+            if not page.has_next:
+                return
+            
+            if self.workers > 1 and backend.page_addressable:
+                # Hand the first backend's browser back before the workers lease theirs
+                backend.close()
+                last_page = None
+                if page.total_count is not None:
+                    last_page = math.ceil(page.total_count / self.page_size)
+                # Let every worker keep its own pooled connection open
+                adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.workers)
+                self.session.mount("https://", adapter)
+                self.session.mount("http://", adapter)
+                workers = self.workers
+                if backend.name in ("selenium", "hybrid"):
+                    # Workers keep their browser until the crawl ends, so more workers than browsers
+                    # would leave the one fetching the next page waiting on a lease forever
+                    max_size = self.get_driver_pool().max_size
+                    if max_size:
+                        workers = min(workers, max_size)
+                scheduler = PageScheduler(lambda: self.create_backend(backend.name), workers, self.rate_limiter)
+                yield from scheduler.run(start=start + 1, last_page=last_page, max_pages=max_pages)
+                return
+            
+            page_index = start + 1
+            while max_pages is None or page_index < max_pages:
+                if not backend.is_cached(page_index):
+                    self.rate_limiter.acquire()
+                page = backend.fetch_page(page_index)
+                if not page.ids:
+                    return
+                yield page_index, page
+                if not page.has_next:
+                    return
+                page_index += 1
+        finally:
+            backend.close()
+        
+    def resumed_pages(self):
+        """Return the pages an interrupted crawl completed and whether it had reached the last page"""
+        completed = self.journal.load() if self.resume else []
+        if not self.resume:
+            self.journal.discard()
+        if completed:
+            print(f"Resuming {self.category_name} crawl after page {len(completed)}")
+        pages = [(page_index, PageResult(ids, has_next=has_next, activity_at=activity_at))
+                 for page_index, ids, has_next, activity_at in completed]
+        return pages, bool(completed) and not completed[-1][2]
+        
+    def iter_resumable_pages(self):
+        """Yield the pages of an interrupted crawl from the journal, then fetch the rest"""
+        pages, finished = self.resumed_pages()
+        yield from pages
+        if finished:
+            return
+        
+        for page_index, page in self.iter_pages(len(pages)):
+            self.journal.record(page_index, page)
+            yield page_index, page
+        
+    async def iter_pages_async(self, start=0):
+        """Yield (page_index, PageResult) in page order, keeping up to ``workers`` requests in flight"""
+        backend = self.create_backend("async")
+        
+        async def fetch(page_index):
+            if not backend.is_cached(page_index):
+                await self.rate_limiter.acquire_async()
+            return await backend.fetch_page(page_index)
+        
+        in_flight = {}
+        next_page = start
+        try:
+            # The first page tells us whether there is more than one
+            page = await fetch(start)
+            if not page.ids:
+                return
+            yield start, page
+            if not page.has_next:
+                return
+            last_page = math.ceil(page.total_count / self.page_size) if page.total_count is not None else None
+            if self.max_pages is not None:
+                last_page = min(last_page, self.max_pages) if last_page is not None else self.max_pages
+            
+            page_index = next_page = start + 1
+            while last_page is None or page_index < last_page:
+                # Keep the window full, then hand out pages in order as they finish
+                while len(in_flight) < max(1, self.workers) and (last_page is None or next_page < last_page):
+                    in_flight[next_page] = asyncio.ensure_future(fetch(next_page))
+                    next_page += 1
+                page = await in_flight.pop(page_index)
+                if not page.ids:
+                    return
+                yield page_index, page
+                if not page.has_next:
+                    return
+                page_index += 1
+        finally:
+            for task in in_flight.values():
+                task.cancel()
+            await asyncio.gather(*in_flight.values(), return_exceptions=True)
+            await backend.aclose()
+        
+    async def iter_resumable_pages_async(self):
+        """Yield the pages of an interrupted crawl from the journal, then fetch the rest concurrently"""
+        pages, finished = self.resumed_pages()
+        for item in pages:
+            yield item
+        if finished:
+            return
+        
+        fetched = self.iter_pages_async(len(pages))
+        try:
+            async for page_index, page in fetched:
+                self.journal.record(page_index, page)
+                yield page_index, page
+        finally:
+            await fetched.aclose()
+        
+    def stored_page(self, page_index):
+        """Return the (fingerprint, ids) the last crawl stored for a page, or None"""
+        if not self.fingerprint_pages:
+            return None
+        return self.link_store.page(self.category_name, page_index)
+        
+    def store_page(self, pipeline, page_index, page):
+        """Send a page's links through the pipeline and remember its fingerprint, skipping unchanged pages"""
+        category = self.category_name
+        PAGES.inc(category=category)
+        if page.unchanged:
+            UNCHANGED_PAGES.inc(category=category)
+            self.link_store.touch_page(category, page_index)
+            return []
+        new_records = pipeline.process(page_index, page.ids)
+        LINKS.inc(len(new_records), category=category)
+        if page.report_counts:
+            self.link_store.save_report_counts(category, page.report_counts)
+        if page.report_dates:
+            self.link_store.save_dates(category, page.report_dates)
+        # Saved only once the links are stored, so an interrupted crawl never skips a page it lost
+        if self.fingerprint_pages and page.fingerprint is not None:
+            self.link_store.save_page(category, page_index, page.fingerprint, page.ids)
+        return new_records
+        
+    @property
+    def journal_file(self):
+        """File recording the pages completed by the current crawl"""
+        return f"{os.path.splitext(self.output_file)[0]}.journal"
+        
+    def is_known_page(self, page_index, page, high_water_mark):
+        """Check whether every item on a page was already seen by an earlier crawl"""
+        newest_activity_at = high_water_mark.get("newest_activity_at")
+        if page.activity_at and newest_activity_at and page.activity_at <= newest_activity_at:
+            return True
+        return all(self.link_store.contains(self.category_name, link) for link in self.links_for_page(page_index, page.ids))
+        
+    def cancel(self):
+        """Ask a running crawl to stop before its next page"""
+        self.cancelled.set()
+        
+    def check_cancelled(self):
+        """Stop the crawl like Ctrl-C would once cancel() was called, keeping its journal for a resume"""
+        if self.cancelled.is_set():
+            raise KeyboardInterrupt(f"{self.category_name} crawl cancelled")
+        
     def scrape(self):
-        """Main scrape method to be implemented by subclasses"""
-        raise NotImplementedError("Subclasses must implement the scrape method")
+        """Scrape every listing page through the configured fetch backend"""
+        if self.backend == "async":
+            # Run the asyncio core to completion so callers keep a blocking scrape()
+            return asyncio.run(self.scrape_async())
+        
+        crawl = Crawl(self)
+        try:
+            crawl.start()
+            for page_index, page in self.iter_resumable_pages():
+                self.check_cancelled()
+                if crawl.add_page(page_index, page):
+                    break
+            crawl.finish()
+        except Exception as e:
+            self.error = e
+            print(f"Error during {self.category_name} scraping: {e}")
+        finally:
+            crawl.close()
+        
+    async def scrape_async(self):
+        """Scrape every listing page over GraphQL with up to ``workers`` requests in flight"""
+        crawl = Crawl(self)
+        pages = self.iter_resumable_pages_async()
+        try:
+            crawl.start()
+            async for page_index, page in pages:
+                self.check_cancelled()
+                if crawl.add_page(page_index, page):
+                    break
+            crawl.finish()
+        except Exception as e:
+            self.error = e
+            print(f"Error during {self.category_name} scraping: {e}")
+        finally:
+            await pages.aclose()
+            crawl.close()
+        
+    def scrape_range(self, start, end=None):
+        """Store the links of pages ``start`` up to ``end`` and return how many were new
+        
+        Used by the workers of a distributed crawl: the pages go to the link
+        store only, without the journal, high-water mark or output file,
+        which the coordinator brings up to date once every range is done.
+        """
+        pipeline = LinkPipeline(self.category_name, self.link_store, list(self.sinks),
+                                self.links_for_page, self.id_from_link)
+        try:
+            for page_index, page in self.iter_pages(start, end):
+                self.check_cancelled()
+                self.store_page(pipeline, page_index, page)
+        finally:
+            pipeline.close()
+        return pipeline.new_links
         
     def run(self):
-        """Run the scraper"""
+        """Run the scraper and return True if it completed without errors"""
         self.logger.info(f"Starting {self.category_name} scraper...")
-        self.load_existing_links()
+        self.import_existing_links()
+        self.error = None
         
         start_time = time.time()
         try:
             self.scrape()
             self.save_links()
+            if self.error is None and self.journal is not None:
+                # Every page is in the output file now, so there is nothing left to resume
+                self.journal.discard()
             
             elapsed_time = time.time() - start_time
             self.logger.info(f"Completed {self.category_name} scraping in {elapsed_time:.2f} seconds")
-            self.logger.info(f"Total {self.category_name} links: {len(self.links)}")
+            self.logger.info(f"Total {self.category_name} links: {self.link_store.count(self.category_name)}")
+            phases = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in phase_summary(self.category_name).items())
+            self.logger.info(f"Time spent on {self.category_name} (all workers): {phases}")
             
-        except KeyboardInterrupt:
+        except KeyboardInterrupt as e:
+            self.error = e
             self.logger.warning("Scraping interrupted by user")
             self.save_links()  # Save what we have so far
         except Exception as e:
+            self.error = e
             self.logger.error(f"Error during scraping: {e}")
-            self.save_links()  # Save what we have so far
\ No newline at end of file
+            self.save_links()  # Save what we have so far
+        finally:
+            self.elapsed_time = time.time() - start_time
+        return self.error is None
@@ -3,6 +3,42 @@ import unittest
 import os
 import sys
 import logging
+import tempfile
+import asyncio
+import requests
+import importlib.util
+import gzip
+import json
+import time
+import threading
+import subprocess
+from datetime import datetime, timezone
+from unittest import mock
+from fetch_backend import FetchBackend, FetchError, HttpBackend, request_key
+from fixture_server import FixtureServer, SyntheticServer
+from scraper_base import RateLimiter, configure_shared_rate_limiter, shared_rate_limiter
+from page_scheduler import PageScheduler
+from driver_pool import DriverPool, shared_driver_pool
+from browser_profiles import block_requests, profile_options
+from network_capture import network_logging_options
+from selenium.webdriver.chrome.options import Options
+from crawl_state import get_high_water_mark
+from crawl_journal import CrawlJournal
+from link_store import LinkStore
+from pipeline import CallbackSink, LinkPipeline, QueueSink, TextFileSink
+import metrics
+from exporters import ExportError, count_rows, export_links, read_metadata
+from response_cache import CacheMiss, ResponseCache
+from report_enricher import ReportEnricher, parse_report
+from report_store import ReportStore
+from work_queue import WorkQueue
+from edge_store import EdgeStore
+from drilldown import DrilldownCrawler
+from link_index import LinkIndex
+from distributed import plan_pages, run_worker
+from readiness import SIGNATURE_SCRIPT, wait_until_ready
+from page_parser import parse_content_links, parse_cve_ids, parse_cwe_ids, parse_report_ids
+from fetch_backend import PageResult
 from cve_scraper import CVEScraper
 from cwe_scraper import CWEScraper
 from disclosed_reports_scraper import DisclosedReportsScraper
@@ -11,6 +47,28 @@ from undisclosed_reports_scraper import UndisclosedReportsScraper
 # Disable logging for tests
 logging.disable(logging.CRITICAL)
 
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+WORKING_DIR = None
+ORIGINAL_CWD = None
+
+def setUpModule():
+    """Run the tests in a temporary directory, so default paths such as output/ and the log file stay out of the tree"""
+    global WORKING_DIR, ORIGINAL_CWD
+    ORIGINAL_CWD = os.getcwd()
+    WORKING_DIR = tempfile.TemporaryDirectory()
+    os.chdir(WORKING_DIR.name)
+
+def tearDownModule():
+    """Return to the original directory and remove everything the tests wrote"""
+    os.chdir(ORIGINAL_CWD)
+    WORKING_DIR.cleanup()
+
+def main_environment():
+    """Environment for running main.py from the temporary working directory"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SOURCE_DIR, env.get("PYTHONPATH")]))
+    return env
+
 class TestScrapers(unittest.TestCase):
     """Test cases for HackerOne scrapers"""
     
@@ -23,7 +81,8 @@ class TestScrapers(unittest.TestCase):
         """Clean up after tests"""
         # Remove test files
         for file in ["test_output/cve_test.txt", "test_output/cwe_test.txt", 
-                    "test_output/disclosed_test.txt", "test_output/undisclosed_test.txt"]:
+                    "test_output/disclosed_test.txt", "test_output/undisclosed_test.txt",
+                    "test_output/links.db", "test_output/links.db-wal", "test_output/links.db-shm"]:
             if os.path.exists(file):
                 os.remove(file)
     
@@ -83,5 +142,1928 @@ class TestScrapers(unittest.TestCase):
         # Check if links were loaded correctly
         self.assertEqual(new_scraper.links, test_links)
 
+class FakeDriver:
+    """Stand-in for a Selenium WebDriver"""
+    
+    def __init__(self, page_source=""):
+        self.url = None
+        self.alive = True
+        self.quit_calls = 0
+        self.page_source = page_source
+        self.find_calls = 0
+        
+    def get(self, url):
+        self.url = url
+        
+    def find_element(self, by, value):
+        self.find_calls += 1
+        return object()
+        
+    def execute_script(self, script, *args):
+        if not self.alive:
+            raise RuntimeError("browser crashed")
+        if script == SIGNATURE_SCRIPT:
+            return [1, self.url or "", 0]
+        return 1
+        
+    def quit(self):
+        self.quit_calls += 1
+
+FIXTURES_DIR = os.path.join(SOURCE_DIR, "fixtures")
+
+def read_fixture(name):
+    """Read a saved page from the fixtures directory"""
+    with open(os.path.join(FIXTURES_DIR, name)) as f:
+        return f.read()
+
+def temp_dir(test):
+    """Create a temporary directory that is removed when the test ends"""
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    return directory.name
+
+def use_temp_output(scraper, test):
+    """Point a scraper's output file at a temporary directory removed when the test ends"""
+    scraper.output_file = os.path.join(temp_dir(test), os.path.basename(scraper.output_file))
+    return scraper
+
+def collect_links(scraper):
+    """Attach a sink that collects the new links a scraper finds"""
+    links = []
+    scraper.sinks.append(CallbackSink(lambda records: links.extend(record.url for record in records)))
+    return links
+
+def wrap_pipeline(create_pipeline, page_indexes):
+    """Record the page index of every page a scraper's pipeline processes"""
+    def create():
+        pipeline = create_pipeline()
+        process = pipeline.process
+        def recording(page_index, ids):
+            page_indexes.append(page_index)
+            return process(page_index, ids)
+        pipeline.process = recording
+        return pipeline
+    return create
+
+def hacktivity_response(report_ids, total_count, activity_at="2024-01-01T00:00:00Z"):
+    """Build a recorded hacktivity search response"""
+    nodes = [{"_id": f"item-{i}", "report": {"databaseId": str(i)}, "latest_disclosable_activity_at": activity_at}
+             for i in report_ids]
+    return {"data": {"search": {"total_count": total_count, "nodes": nodes}}}
+
+class TestPageParser(unittest.TestCase):
+    """Test bulk extraction from saved pages"""
+    
+    def test_parse_cve_ids(self):
+        """Test CVE IDs are read from the second table column"""
+        self.assertEqual(parse_cve_ids(read_fixture("cve_discovery_page.html")),
+                         ["CVE-2021-44228", "CVE-2022-22965", "CVE-2023-4863"])
+    
+    def test_parse_cwe_ids(self):
+        """Test CWE IDs are read from the first table column"""
+        self.assertEqual(parse_cwe_ids(read_fixture("cwe_discovery_page.html")), ["CWE-79", "CWE-200", "CWE-918"])
+    
+    def test_parse_report_ids(self):
+        """Test report IDs are deduplicated and keep page order"""
+        self.assertEqual(parse_report_ids(read_fixture("disclosed_reports_page.html")), ["2219876", "2219001", "2198765"])
+    
+    def test_parse_content_links(self):
+        """Test navigation links are ignored when looking for report content"""
+        content_links, has_error = parse_content_links(read_fixture("undisclosed_reports_page.html"))
+        self.assertEqual(content_links, ["https://hackerone.com/acme", "https://hackerone.com/example"])
+        self.assertFalse(has_error)
+        self.assertEqual(parse_content_links("<html><body><p>Error loading</p></body></html>"), ([], True))
+    
+    def test_extract_uses_a_single_page_source_read(self):
+        """Test the scrapers parse page_source instead of querying elements one by one"""
+        driver = FakeDriver(read_fixture("cve_discovery_page.html"))
+        self.assertEqual(len(CVEScraper().extract_cve_ids(driver)), 3)
+        self.assertEqual(driver.find_calls, 1)  # Only the readiness wait touches the driver
+        
+        driver = FakeDriver(read_fixture("disclosed_reports_page.html"))
+        self.assertEqual(DisclosedReportsScraper().extract_report_ids(driver), ["2219876", "2219001", "2198765"])
+        
+        driver = FakeDriver(read_fixture("undisclosed_reports_page.html"))
+        self.assertTrue(UndisclosedReportsScraper().check_page_has_content(driver))
+
+class TestReadiness(unittest.TestCase):
+    """Test readiness waits and the adaptive rate limiter"""
+    
+    class RenderingDriver:
+        """Driver whose listing changes after a few polls"""
+        
+        def __init__(self, signatures):
+            self.signatures = list(signatures)
+            self.polls = 0
+            
+        def execute_script(self, script, *args):
+            self.polls += 1
+            return self.signatures.pop(0) if len(self.signatures) > 1 else self.signatures[0]
+    
+    def test_waits_for_rows_to_appear(self):
+        """Test the wait returns as soon as the selector matches"""
+        driver = self.RenderingDriver([[0, "", 3], [0, "", 5], [25, "CVE-2021-1", 9]])
+        start = time.monotonic()
+        self.assertEqual(wait_until_ready(driver, "tr td", poll=0.01), (25, "CVE-2021-1", 9))
+        self.assertLess(time.monotonic() - start, 1)
+    
+    def test_waits_for_first_item_to_change(self):
+        """Test a click to the next page waits until different rows are shown"""
+        previous = (25, "CVE-2021-1", 9)
+        driver = self.RenderingDriver([[25, "CVE-2021-1", 9], [25, "CVE-2021-1", 10], [25, "CVE-2020-7", 12]])
+        self.assertEqual(wait_until_ready(driver, "tr td", previous, poll=0.01)[1], "CVE-2020-7")
+        self.assertEqual(driver.polls, 3)
+    
+    def test_falls_back_to_network_idle(self):
+        """Test a page that never matches the selector waits for the network to go quiet"""
+        driver = self.RenderingDriver([[0, "", 3], [0, "", 4], [0, "", 4]])
+        with mock.patch("readiness.wait_for_network_idle") as idle:
+            wait_until_ready(driver, "tr td", timeout=0.05, poll=0.01)
+        idle.assert_called_once()
+    
+    def test_rate_limiter_adapts_to_responses(self):
+        """Test throttling halves the rate, slow responses reduce it and fast ones restore it"""
+        limiter = RateLimiter(rate=8, target_latency=1.0)
+        limiter.observe(0.2, 429)
+        self.assertEqual(limiter.rate, 4)
+        limiter.observe(2.0, 200)
+        self.assertAlmostEqual(limiter.rate, 3.6)
+        for _ in range(20):
+            limiter.observe(0.2, 200)
+        self.assertEqual(limiter.rate, 8)
+        for _ in range(20):
+            limiter.observe(0.2, 503)
+        self.assertEqual(limiter.rate, 0.5)
+
+class TestRateLimiter(unittest.TestCase):
+    """Test the shared rate limiter's pausing, backoff and asyncio support"""
+    
+    def test_retry_after_pauses_every_worker(self):
+        """Test a Retry-After seen by one worker holds back the others"""
+        limiter = RateLimiter(rate=None)
+        limiter.observe(0.1, 429, retry_after=0.2)
+        start = time.monotonic()
+        threads = [threading.Thread(target=limiter.acquire) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - start, 0.15)
+    
+    def test_backoff_is_exponential_with_jitter(self):
+        """Test retry delays grow exponentially, are jittered and capped, and honour Retry-After"""
+        limiter = RateLimiter(backoff_base=1.0, max_backoff=10.0)
+        delays = [limiter.backoff_delay(3) for _ in range(200)]
+        self.assertTrue(all(0 <= delay <= 4 for delay in delays))
+        self.assertGreater(len(set(delays)), 100)
+        self.assertTrue(all(limiter.backoff_delay(20) <= 10 for _ in range(50)))
+        self.assertEqual(limiter.backoff_delay(3, retry_after=7), 7)
+    
+    def test_acquire_async_spaces_coroutines(self):
+        """Test coroutines share the token bucket without blocking the event loop"""
+        limiter = RateLimiter(rate=50, burst=1)
+        ticks = []
+        
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+        
+        async def crawl():
+            await asyncio.gather(ticker(), *(limiter.acquire_async() for _ in range(6)))
+        
+        start = time.monotonic()
+        asyncio.run(crawl())
+        self.assertGreaterEqual(time.monotonic() - start, 5 / 50 * 0.9)
+        self.assertEqual(len(ticks), 5)
+    
+    def test_http_backend_honours_retry_after(self):
+        """Test a throttled request waits for Retry-After instead of the exponential backoff"""
+        with FixtureServer() as server:
+            scraper = use_temp_output(CVEScraper("http"), self)
+            scraper.graphql_url = f"{server.url}/graphql"
+            scraper.rate_limiter = RateLimiter(rate=None, backoff_base=30)
+            server.add({"method": "POST", "url": scraper.graphql_url, "request": scraper.graphql_payload(0),
+                        "response": {"data": {"cve_discovery": {"total_count": 1, "nodes": [{"cve_id": "CVE-2024-0001"}]}}},
+                        "fail_first": 1, "fail_status": 429, "retry_after": 0.1})
+            start = time.monotonic()
+            page = HttpBackend(scraper).fetch_page(0)
+        self.assertEqual(page.ids, ["CVE-2024-0001"])
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(len(server.requests), 2)
+    
+    def test_scrapers_share_one_limiter(self):
+        """Test scrapers created without an explicit limiter share the process-wide one"""
+        configured = configure_shared_rate_limiter(rate=5)
+        self.addCleanup(configure_shared_rate_limiter, rate=1.0)
+        self.assertIs(CVEScraper().rate_limiter, configured)
+        self.assertIs(DisclosedReportsScraper().rate_limiter, configured)
+        self.assertIs(shared_rate_limiter(), configured)
+
+class TestLinkStore(unittest.TestCase):
+    """Test the indexed link store"""
+    
+    def setUp(self):
+        """Create a scraper writing to a temporary directory"""
+        self.scraper = use_temp_output(DisclosedReportsScraper(), self)
+        self.store = self.scraper.link_store
+    
+    def test_links_are_deduplicated(self):
+        """Test adding a link twice keeps one row and updates last_seen"""
+        link = "https://hackerone.com/reports/1"
+        self.assertEqual(self.store.add_many("Disclosed Reports", [link, "https://hackerone.com/reports/2"]),
+                         [link, "https://hackerone.com/reports/2"])
+        self.assertEqual(self.store.add_many("Disclosed Reports", [link]), [])
+        self.assertTrue(self.store.contains("Disclosed Reports", link))
+        self.assertFalse(self.store.contains("CVE", link))
+        self.assertEqual(self.store.count("Disclosed Reports"), 2)
+    
+    def test_save_links_only_appends_new_links(self):
+        """Test repeated runs append new links instead of rewriting or duplicating the file"""
+        self.scraper.links = ["https://hackerone.com/reports/1", "https://hackerone.com/reports/2"]
+        self.scraper.save_links()
+        self.scraper.links.append("https://hackerone.com/reports/3")
+        self.scraper.save_links()
+        self.scraper.save_links()
+        with open(self.scraper.output_file) as f:
+            self.assertEqual(f.read().split(), [f"https://hackerone.com/reports/{i}" for i in (1, 2, 3)])
+        row = next(self.store.rows("Disclosed Reports"))
+        self.assertEqual(row["item_id"], "1")
+        self.assertIsNotNone(row["first_seen"])
+    
+    def test_duplicated_output_file_is_imported_once(self):
+        """Test an output file written by an older version is deduplicated on load"""
+        with open(self.scraper.output_file, "w") as f:
+            f.write("https://hackerone.com/reports/1\nhttps://hackerone.com/reports/2\nhttps://hackerone.com/reports/1\n")
+        self.scraper.load_existing_links()
+        self.assertEqual(self.scraper.links, ["https://hackerone.com/reports/1", "https://hackerone.com/reports/2"])
+        with open(self.scraper.output_file) as f:
+            self.assertEqual(len(f.read().split()), 2)
+
+class TestHttpBackend(unittest.TestCase):
+    """Test the GraphQL fetch backend against a fixture server"""
+    
+    def setUp(self):
+        """Start a fixture server"""
+        self.server = FixtureServer().start()
+        
+    def tearDown(self):
+        """Stop the fixture server"""
+        self.server.stop()
+        
+    def make_scraper(self, scraper_class, responses, backend="http"):
+        """Create a scraper pointed at the fixture server with recorded responses"""
+        scraper = use_temp_output(scraper_class(backend), self)
+        scraper.graphql_url = f"{self.server.url}/graphql"
+        scraper.page_size = 2
+        scraper.rate_limiter = RateLimiter(rate=None)
+        for page_index, response in enumerate(responses):
+            self.server.add({
+                "method": "POST",
+                "url": scraper.graphql_url,
+                "request": scraper.graphql_payload(page_index),
+                "response": response,
+            })
+        return scraper
+    
+    def test_cve_scraper_over_http(self):
+        """Test CVE IDs are read from GraphQL responses"""
+        scraper = self.make_scraper(CVEScraper, [
+            {"data": {"cve_discovery": {"total_count": 3, "nodes": [{"cve_id": "CVE-2021-1234"}, {"cve_id": "CVE-2022-5678"}]}}},
+            {"data": {"cve_discovery": {"total_count": 3, "nodes": [{"cve_id": "CVE-2023-0001"}]}}},
+        ])
+        links = collect_links(scraper)
+        scraper.scrape()
+        self.assertEqual(links, [
+            "https://hackerone.com/hacktivity/cve_discovery?id=CVE-2021-1234",
+            "https://hackerone.com/hacktivity/cve_discovery?id=CVE-2022-5678",
+            "https://hackerone.com/hacktivity/cve_discovery?id=CVE-2023-0001",
+        ])
+        self.assertEqual(len(self.server.requests), 2)
+    
+    def test_cwe_scraper_over_http(self):
+        """Test CWE IDs are lowercased in the generated links"""
+        scraper = self.make_scraper(CWEScraper, [
+            {"data": {"cwe_discovery": {"total_count": 1, "nodes": [{"cwe_id": "CWE-79", "name": "Cross-site Scripting"}]}}},
+        ])
+        links = collect_links(scraper)
+        scraper.scrape()
+        self.assertEqual(links, ["https://hackerone.com/hacktivity/cwe_discovery?id=cwe-79"])
+    
+    def test_disclosed_reports_scraper_over_http(self):
+        """Test report IDs are read from hacktivity search responses"""
+        scraper = self.make_scraper(DisclosedReportsScraper, [
+            hacktivity_response([101, 102], 4),
+            hacktivity_response([103, 104], 4),
+        ])
+        links = collect_links(scraper)
+        scraper.scrape()
+        self.assertEqual(links, [f"https://hackerone.com/reports/{i}" for i in (101, 102, 103, 104)])
+    
+    def test_undisclosed_reports_scraper_over_http(self):
+        """Test one listing page link is produced per non-empty page"""
+        scraper = self.make_scraper(UndisclosedReportsScraper, [
+            hacktivity_response([1, 2], 3),
+            hacktivity_response([3], 3),
+        ])
+        links = collect_links(scraper)
+        scraper.scrape()
+        self.assertEqual(links, [scraper.page_url(0), scraper.page_url(1)])
+    
+    def test_graphql_errors_raise_fetch_error(self):
+        """Test a GraphQL error response is surfaced as a FetchError"""
+        scraper = self.make_scraper(CVEScraper, [{"errors": [{"message": "boom"}]}])
+        with self.assertRaises(FetchError):
+            HttpBackend(scraper).fetch_page(0)
+    
+    def test_auto_backend_falls_back_to_selenium(self):
+        """Test the auto backend switches to Selenium when GraphQL is unavailable"""
+        scraper = self.make_scraper(DisclosedReportsScraper, [], backend="auto")
+        drivers = []
+        
+        def setup_driver():
+            drivers.append(FakeDriver())
+            return drivers[-1]
+        
+        scraper.driver_pool = DriverPool(setup_driver)
+        scraper.extract_page_ids = lambda driver: []
+        scraper.scrape()
+        self.assertEqual(len(drivers), 1)
+        self.assertEqual(drivers[0].url, scraper.page_url(0))
+    
+    def test_disclosure_dates_are_stored_with_the_links(self):
+        """Test the dates in the listing's response are kept with the disclosed report links"""
+        response = hacktivity_response([7, 8], 2, "2024-03-01T00:00:00Z")
+        response["data"]["search"]["nodes"][0]["disclosed_at"] = "2024-02-01T00:00:00Z"
+        scraper = self.make_scraper(DisclosedReportsScraper, [response])
+        scraper.scrape()
+        self.assertEqual(dict(scraper.link_store.conn.execute("SELECT item_id, listed_at FROM links")),
+                         {"7": "2024-02-01T00:00:00Z", "8": "2024-03-01T00:00:00Z"})
+    
+    def test_recorded_responses_are_replayed(self):
+        """Test responses recorded by HttpBackend can be replayed by the fixture server"""
+        record_dir = temp_dir(self)
+        scraper = self.make_scraper(DisclosedReportsScraper, [hacktivity_response([7], 1)])
+        scraper.record_dir = record_dir
+        scraper.scrape()
+        
+        with FixtureServer(record_dir) as replay:
+            replayed = use_temp_output(DisclosedReportsScraper("http"), self)
+            replayed.graphql_url = f"{replay.url}/graphql"
+            replayed.page_size = 2
+            replayed.rate_limiter = RateLimiter(rate=None)
+            links = collect_links(replayed)
+            replayed.scrape()
+        self.assertEqual(links, ["https://hackerone.com/reports/7"])
+
+class FakeBackend(FetchBackend):
+    """Backend serving a fixed number of pages with a short delay"""
+    
+    name = "fake"
+    page_addressable = True
+    
+    def __init__(self, total_pages, page_size=2, delay=0.01):
+        self.total_pages = total_pages
+        self.page_size = page_size
+        self.delay = delay
+        self.fetched = []
+        self.closed = False
+        
+    def fetch_page(self, page_index):
+        time.sleep(self.delay * (page_index % 3))  # Finish out of order
+        self.fetched.append(page_index)
+        if page_index >= self.total_pages:
+            return PageResult([])
+        ids = [f"{page_index}-{i}" for i in range(self.page_size)]
+        return PageResult(ids, has_next=page_index + 1 < self.total_pages)
+        
+    def close(self):
+        self.closed = True
+
+class TestPageCountSearch(unittest.TestCase):
+    """Test the undisclosed reports listing is measured instead of walked"""
+    
+    def make_scraper(self, backend):
+        """Create an undisclosed reports scraper that fetches from a fake backend"""
+        scraper = use_temp_output(UndisclosedReportsScraper("http"), self)
+        scraper.rate_limiter = RateLimiter(rate=None)
+        scraper.create_backend = lambda name=None: backend
+        return scraper
+    
+    def test_page_count_takes_logarithmic_fetches(self):
+        """Test exponential then binary probing finds the last page of any listing"""
+        for total_pages in (0, 1, 2, 3, 7, 8, 9, 1000, 1500):
+            backend = FakeBackend(total_pages, delay=0)
+            scraper = self.make_scraper(backend)
+            self.assertEqual(scraper.find_page_count(), total_pages)
+            self.assertLessEqual(len(backend.fetched), 2 * max(1, total_pages).bit_length() + 1)
+    
+    def test_total_count_needs_one_fetch(self):
+        """Test the page count is read from the reported total when there is one"""
+        backend = FakeBackend(50, delay=0)
+        backend.fetch_page = lambda page_index: PageResult(["x"], total_count=123, has_next=True)
+        scraper = self.make_scraper(backend)
+        scraper.page_size = 25
+        self.assertEqual(scraper.find_page_count(), 5)
+        self.assertEqual(scraper.probes, 1)
+    
+    def test_scrape_links_every_page_without_a_cap(self):
+        """Test every page past the old 1000 page limit gets its link, and max_pages still applies"""
+        scraper = self.make_scraper(FakeBackend(1200, delay=0))
+        links = collect_links(scraper)
+        with mock.patch("builtins.print"):
+            scraper.scrape()
+        self.assertEqual(len(links), 1200)
+        self.assertEqual(links[-1], scraper.page_url(1199))
+        
+        limited = self.make_scraper(FakeBackend(1200, delay=0))
+        limited.max_pages = 10
+        self.assertEqual(limited.find_page_count(), 10)
+
+class TestIncrementalCrawl(unittest.TestCase):
+    """Test stopping a crawl once it reaches known reports"""
+    
+    def setUp(self):
+        """Start a fixture server"""
+        self.server = FixtureServer().start()
+        
+    def tearDown(self):
+        """Stop the fixture server"""
+        self.server.stop()
+    
+    def make_scraper(self, responses, existing_links=()):
+        """Create an incremental disclosed reports scraper with some links already saved"""
+        scraper = use_temp_output(DisclosedReportsScraper("http"), self)
+        scraper.graphql_url = f"{self.server.url}/graphql"
+        scraper.page_size = 2
+        scraper.rate_limiter = RateLimiter(rate=None)
+        scraper.incremental = True
+        scraper.stop_after_known_pages = 2
+        scraper.link_store.add_many(scraper.category_name, existing_links)
+        for page_index, response in enumerate(responses):
+            self.server.add({
+                "method": "POST",
+                "url": scraper.graphql_url,
+                "request": scraper.graphql_payload(page_index),
+                "response": response,
+            })
+        return scraper
+    
+    def test_stops_after_consecutive_known_pages(self):
+        """Test the crawl stops after K pages of known IDs and only adds new links"""
+        old = [f"https://hackerone.com/reports/{i}" for i in (3, 4, 5, 6, 7, 8)]
+        scraper = self.make_scraper([
+            hacktivity_response([1, 2], 10, "2024-03-01T00:00:00Z"),
+            hacktivity_response([3, 4], 10, "2024-02-01T00:00:00Z"),
+            hacktivity_response([5, 6], 10, "2024-02-01T00:00:00Z"),
+            hacktivity_response([7, 8], 10, "2024-02-01T00:00:00Z"),
+            hacktivity_response([9, 10], 10, "2024-02-01T00:00:00Z"),
+        ], old)
+        links = collect_links(scraper)
+        scraper.scrape()
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(links, ["https://hackerone.com/reports/1", "https://hackerone.com/reports/2"])
+        self.assertEqual(scraper.link_store.count(scraper.category_name), 8)
+    
+    def test_high_water_mark_is_persisted(self):
+        """Test the newest report and activity timestamp are saved and used by the next run"""
+        scraper = self.make_scraper([hacktivity_response([1, 2], 2, "2024-03-01T00:00:00Z")])
+        scraper.scrape()
+        state = get_high_water_mark(scraper.state_file, scraper.category_name)
+        self.assertEqual(state["newest_id"], "1")
+        self.assertEqual(state["newest_activity_at"], "2024-03-01T00:00:00Z")
+        
+        # Pages no newer than the high-water mark count as known even without saved links
+        page = PageResult(["5"], activity_at="2024-02-01T00:00:00Z")
+        self.assertTrue(scraper.is_known_page(3, page, state))
+        page = PageResult(["5"], activity_at="2024-04-01T00:00:00Z")
+        self.assertFalse(scraper.is_known_page(3, page, state))
+
+class TestPageFingerprints(unittest.TestCase):
+    """Test skipping pages that have not changed since the last crawl"""
+    
+    def setUp(self):
+        """Start a fixture server and create a disclosed reports scraper"""
+        self.server = FixtureServer().start()
+        self.scraper = use_temp_output(DisclosedReportsScraper("http"), self)
+        self.scraper.graphql_url = f"{self.server.url}/graphql"
+        self.scraper.page_size = 2
+        self.scraper.rate_limiter = RateLimiter(rate=None)
+        # scrape() leaves its journal behind, which would replay the last crawl
+        self.scraper.resume = False
+        self.processed = []
+        self.scraper.create_pipeline = wrap_pipeline(self.scraper.create_pipeline, self.processed)
+        
+    def tearDown(self):
+        """Stop the fixture server"""
+        self.server.stop()
+    
+    def crawl(self, pages):
+        """Record the listing's pages, crawl it and return the pages the pipeline processed"""
+        for page_index, response in enumerate(pages):
+            self.server.add({"method": "POST", "url": self.scraper.graphql_url,
+                             "request": self.scraper.graphql_payload(page_index), "response": response})
+        del self.server.requests[:]
+        del self.processed[:]
+        with mock.patch("builtins.print"):
+            self.scraper.scrape()
+        return list(self.processed)
+    
+    def test_unchanged_pages_skip_extraction_and_writes(self):
+        """Test a re-crawl of an identical listing reuses the stored IDs and stores nothing"""
+        pages = [hacktivity_response([1, 2], 5), hacktivity_response([3, 4], 5), hacktivity_response([5], 5)]
+        self.assertEqual(self.crawl(pages), [0, 1, 2])
+        self.assertEqual(self.scraper.link_store.page("Disclosed Reports", 1)[1], ["3", "4"])
+        
+        with mock.patch.object(self.scraper, "parse_graphql", wraps=self.scraper.parse_graphql) as parse:
+            self.assertEqual(self.crawl(pages), [])
+        parse.assert_not_called()
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(self.scraper.link_store.count("Disclosed Reports"), 5)
+    
+    def test_changed_pages_are_stored(self):
+        """Test only the pages whose content changed go through the pipeline, ignoring the total"""
+        self.crawl([hacktivity_response([1, 2], 5), hacktivity_response([3, 4], 5), hacktivity_response([5], 5)])
+        links = collect_links(self.scraper)
+        processed = self.crawl([hacktivity_response([1, 2], 6), hacktivity_response([3, 6], 6),
+                                hacktivity_response([5], 6)])
+        self.assertEqual(processed, [1])
+        self.assertEqual(links, ["https://hackerone.com/reports/6"])
+        self.assertEqual(self.scraper.stored_page(1)[1], ["3", "6"])
+    
+    def test_stops_after_unchanged_pages(self):
+        """Test a run of unchanged pages ends the crawl, and fingerprints can be turned off"""
+        pages = [hacktivity_response([i, i + 1], 10) for i in range(1, 11, 2)]
+        self.crawl(pages)
+        self.scraper.stop_after_unchanged_pages = 2
+        pages[0] = hacktivity_response([1, 2], 10, "2024-02-01T00:00:00Z")
+        self.assertEqual(self.crawl(pages), [0])
+        self.assertEqual(len(self.server.requests), 3)
+        
+        self.scraper.fingerprint_pages = False
+        self.assertEqual(self.crawl(pages), [0, 1, 2, 3, 4])
+
+class TestResumableCrawl(unittest.TestCase):
+    """Test resuming an interrupted crawl from its journal"""
+    
+    def setUp(self):
+        """Start a fixture server"""
+        self.server = FixtureServer().start()
+        self.output_file = os.path.join(temp_dir(self), "disclosed_links.txt")
+        
+    def tearDown(self):
+        """Stop the fixture server"""
+        self.server.stop()
+    
+    def make_scraper(self):
+        """Create a disclosed reports scraper writing to the shared temporary output file"""
+        scraper = DisclosedReportsScraper("http")
+        scraper.output_file = self.output_file
+        scraper.graphql_url = f"{self.server.url}/graphql"
+        scraper.page_size = 2
+        scraper.rate_limiter = RateLimiter(rate=None)
+        return scraper
+    
+    def add_page(self, scraper, page_index, report_ids):
+        """Record the response for one page"""
+        self.server.add({
+            "method": "POST",
+            "url": scraper.graphql_url,
+            "request": scraper.graphql_payload(page_index),
+            "response": hacktivity_response(report_ids, 6),
+        })
+    
+    def test_crawl_resumes_after_last_completed_page(self):
+        """Test a crawl that failed on page 2 continues from page 2 on the next run"""
+        scraper = self.make_scraper()
+        self.add_page(scraper, 0, [1, 2])
+        self.add_page(scraper, 1, [3, 4])
+        scraper.run()
+        self.assertIsNotNone(scraper.error)
+        self.assertTrue(os.path.exists(scraper.journal_file))
+        
+        self.add_page(scraper, 2, [5, 6])
+        self.server.requests.clear()
+        resumed = self.make_scraper()
+        self.assertTrue(resumed.run())
+        self.assertEqual([body["variables"]["from"] for _, _, body in self.server.requests], [4])
+        with open(resumed.output_file) as f:
+            self.assertEqual(f.read().split(), [f"https://hackerone.com/reports/{i}" for i in range(1, 7)])
+        self.assertFalse(os.path.exists(resumed.journal_file))
+    
+    def test_truncated_journal_line_is_ignored(self):
+        """Test a half-written last line from a crash does not break the resume"""
+        scraper = self.make_scraper()
+        journal = CrawlJournal(scraper.journal_file, scraper.page_size)
+        journal.record(0, PageResult(["1", "2"], has_next=True))
+        journal.close()
+        with open(scraper.journal_file, "a") as f:
+            f.write('{"page": 1, "ids": ["3"')
+        self.assertEqual(CrawlJournal(scraper.journal_file, scraper.page_size).load(), [(0, ["1", "2"], True, None)])
+        # A journal written with another page size cannot be resumed
+        self.assertEqual(CrawlJournal(scraper.journal_file, 25).load(), [])
+
+class TestPageScheduler(unittest.TestCase):
+    """Test concurrent page fetching"""
+    
+    def test_pages_are_merged_in_order(self):
+        """Test pages fetched out of order are yielded in page order"""
+        backends = []
+        
+        def factory():
+            backends.append(FakeBackend(10))
+            return backends[-1]
+        
+        pages = list(PageScheduler(factory, workers=4).run())
+        self.assertEqual([page_index for page_index, _ in pages], list(range(10)))
+        self.assertEqual(pages[3][1].ids, ["3-0", "3-1"])
+        self.assertLessEqual(len(backends), 4)
+        self.assertTrue(all(backend.closed for backend in backends))
+    
+    def test_probe_ahead_stops_at_last_page(self):
+        """Test the end of the listing is found without a known total"""
+        backend = FakeBackend(5)
+        pages = list(PageScheduler(lambda: backend, workers=3).run())
+        self.assertEqual(len(pages), 5)
+        # At most one window of probes past the end
+        self.assertLessEqual(max(backend.fetched), 5 + 3)
+    
+    def test_known_last_page_and_max_pages(self):
+        """Test a known page count and the page limit bound the fetches"""
+        backend = FakeBackend(50)
+        pages = list(PageScheduler(lambda: backend, workers=4).run(start=1, last_page=50, max_pages=6))
+        self.assertEqual([page_index for page_index, _ in pages], [1, 2, 3, 4, 5])
+        self.assertTrue(all(page_index < 6 for page_index in backend.fetched))
+    
+    def test_fetch_errors_propagate(self):
+        """Test a failing page raises instead of being silently skipped"""
+        class FailingBackend(FakeBackend):
+            def fetch_page(self, page_index):
+                if page_index == 2:
+                    raise FetchError("boom")
+                return super().fetch_page(page_index)
+        
+        with self.assertRaises(FetchError):
+            list(PageScheduler(lambda: FailingBackend(5), workers=2).run())
+    
+    def test_rate_limiter_spaces_requests(self):
+        """Test the shared token bucket limits the request rate"""
+        limiter = RateLimiter(rate=50, burst=1)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 5 / 50 * 0.9)
+    
+    def test_scraper_uses_workers(self):
+        """Test a scraper with several workers fetches every page"""
+        scraper = use_temp_output(DisclosedReportsScraper("http"), self)
+        scraper.workers = 3
+        scraper.rate_limiter = RateLimiter(rate=None)
+        scraper.create_backend = lambda name=None: FakeBackend(7)
+        links = collect_links(scraper)
+        scraper.scrape()
+        self.assertEqual(len(links), 14)
+        self.assertEqual(links[:2], ["https://hackerone.com/reports/0-0", "https://hackerone.com/reports/0-1"])
+    
+    def test_lookahead_bounds_pages_held_back(self):
+        """Test a slow page stops the workers from fetching more than the look-ahead past it"""
+        release = threading.Event()
+        
+        class SlowFirstPage(FakeBackend):
+            def fetch_page(self, page_index):
+                if page_index == 0:
+                    release.wait(5)
+                return super().fetch_page(page_index)
+        
+        backend = SlowFirstPage(100, delay=0)
+        pages = PageScheduler(lambda: backend, workers=2, lookahead=4).run()
+        thread = threading.Thread(target=lambda: next(pages))
+        thread.start()
+        time.sleep(0.2)
+        self.assertLessEqual(max(backend.fetched), 3)
+        release.set()
+        thread.join()
+        pages.close()
+
+class TestAsyncBackend(unittest.TestCase):
+    """Test the asyncio scraper core against local servers"""
+    
+    def make_scraper(self, server, scraper_class=DisclosedReportsScraper, workers=1, page_size=5):
+        """Create an async scraper pointed at a local server"""
+        scraper = use_temp_output(scraper_class("async"), self)
+        scraper.graphql_url = f"{server.url}/graphql"
+        scraper.page_size = page_size
+        scraper.workers = workers
+        scraper.rate_limiter = RateLimiter(rate=None, backoff_base=0)
+        return scraper
+    
+    def test_sync_scrape_runs_the_async_core(self):
+        """Test scrape() blocks until the asyncio crawl has stored every link"""
+        with SyntheticServer(pages=4, page_size=5) as server, mock.patch("builtins.print"):
+            scraper = self.make_scraper(server)
+            links = collect_links(scraper)
+            scraper.scrape()
+        self.assertIsNone(scraper.error)
+        self.assertEqual(len(links), 20)
+        self.assertEqual(len(server.requests), 4)
+        self.assertEqual(scraper.link_store.count(scraper.category_name), 20)
+    
+    def test_pages_in_flight_are_yielded_in_order(self):
+        """Test several concurrent requests still reach the sinks in page order"""
+        with SyntheticServer(pages=6, page_size=5, latency=0.05) as server, mock.patch("builtins.print"):
+            scraper = self.make_scraper(server, workers=4)
+            pages = []
+            scraper.create_pipeline = wrap_pipeline(scraper.create_pipeline, pages)
+            start = time.monotonic()
+            scraper.scrape()
+            elapsed = time.monotonic() - start
+        self.assertIsNone(scraper.error)
+        self.assertEqual(pages, list(range(6)))
+        # The first page is fetched alone, the other five in two overlapping windows
+        self.assertLess(elapsed, 6 * 0.05)
+    
+    def test_async_retries_and_errors(self):
+        """Test server errors are retried and client errors end the crawl with an error"""
+        with FixtureServer() as server:
+            scraper = self.make_scraper(server, CVEScraper, page_size=2)
+            server.add({"method": "POST", "url": scraper.graphql_url, "request": scraper.graphql_payload(0),
+                        "response": {"data": {"cve_discovery": {"total_count": 1, "nodes": [{"cve_id": "CVE-2024-0001"}]}}},
+                        "fail_first": 1})
+            links = collect_links(scraper)
+            with mock.patch("builtins.print"):
+                scraper.scrape()
+            self.assertIsNone(scraper.error)
+            self.assertEqual(links, ["https://hackerone.com/hacktivity/cve_discovery?id=CVE-2024-0001"])
+            self.assertEqual(len(server.requests), 2)
+            
+            missing = self.make_scraper(server, CWEScraper, page_size=2)
+            with mock.patch("builtins.print"):
+                missing.scrape()
+            self.assertIsInstance(missing.error, FetchError)
+    
+    def test_benchmark_runs_the_async_backend(self):
+        """Test the benchmark times awaited fetches"""
+        import benchmark
+        with SyntheticServer(pages=3, page_size=5) as server, mock.patch("builtins.print"):
+            result = benchmark.run_scenario("cve", "async", server, page_size=5, workers=2)
+        self.assertIsNone(result["error"])
+        self.assertEqual((result["pages"], result["links"]), (3, 15))
+
+class TestWorkQueue(unittest.TestCase):
+    """Test the lease queue of distributed crawls"""
+    
+    def setUp(self):
+        """Create an empty queue"""
+        self.queue = WorkQueue(os.path.join(temp_dir(self), "queue.db"), lease_seconds=60, max_attempts=2)
+        
+    def tearDown(self):
+        """Close the queue"""
+        self.queue.close()
+    
+    def test_ranges_are_claimed_once(self):
+        """Test every page range goes to exactly one worker"""
+        self.assertEqual(self.queue.add_page_ranges("cve", 0, 45, 20), 3)
+        leases = [self.queue.claim("a"), self.queue.claim("b"), self.queue.claim("a")]
+        self.assertEqual([(lease.start, lease.end) for lease in leases], [(0, 20), (20, 40), (40, 45)])
+        self.assertIsNone(self.queue.claim("c"))
+        for lease in leases:
+            self.queue.complete(lease, 1)
+        self.assertEqual(self.queue.counts(), {"done": 3})
+        self.assertEqual(self.queue.unfinished(), 0)
+    
+    def test_expired_leases_are_reassigned(self):
+        """Test a lease whose worker stopped sending heartbeats goes to another worker"""
+        self.queue.add_batches("reports", "Disclosed Reports", ["1", "2", "3"], batch_size=2)
+        lost = self.queue.claim("lost-node")
+        self.assertEqual(lost.items, ["1", "2"])
+        self.assertTrue(self.queue.heartbeat(lost))
+        
+        with self.queue.lock:
+            self.queue.conn.execute("UPDATE leases SET expires_at = 0 WHERE id = ?", (lost.id,))
+        taken = self.queue.claim("b")
+        self.assertEqual((taken.id, taken.attempts), (lost.id, 2))
+        # The lost node can no longer renew or finish the lease
+        self.assertFalse(self.queue.heartbeat(lost))
+        self.queue.complete(lost)
+        self.assertEqual(self.queue.counts()["leased"], 1)
+    
+    def test_failed_leases_are_retried_then_given_up(self):
+        """Test a failing lease is handed back until it runs out of attempts"""
+        self.queue.add("pages", "cve", 0, 5)
+        self.queue.fail(self.queue.claim("a"), "boom")
+        lease = self.queue.claim("b")
+        self.assertEqual(lease.attempts, 2)
+        self.queue.fail(lease, "boom again")
+        self.assertIsNone(self.queue.claim("c"))
+        self.assertEqual(self.queue.counts(), {"failed": 1})
+    
+    def test_workers_crawl_a_listing_together(self):
+        """Test two workers split a listing into disjoint ranges and store every link once"""
+        output = temp_dir(self)
+        
+        def create_scraper(scraper_type):
+            scraper = DisclosedReportsScraper("http")
+            scraper.output_file = os.path.join(output, os.path.basename(scraper.output_file))
+            scraper.graphql_url = f"{server.url}/graphql"
+            scraper.page_size = 5
+            scraper.rate_limiter = RateLimiter(rate=None)
+            scraper.shared_storage = True
+            return scraper
+        
+        with SyntheticServer(pages=6, page_size=5) as server, mock.patch("builtins.print"):
+            self.assertEqual(plan_pages(self.queue, "disclosed", create_scraper("disclosed"), pages_per_lease=2), 3)
+            completed = []
+            workers = [threading.Thread(target=lambda name=name: completed.append(
+                run_worker(self.queue, name, create_scraper, wait=False))) for name in ("a", "b")]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        
+        self.assertEqual(sum(completed), 3)
+        self.assertEqual(self.queue.counts(), {"done": 3})
+        scraper = create_scraper("disclosed")
+        self.assertEqual(scraper.link_store.count(scraper.category_name), 30)
+        self.assertFalse(os.path.exists(scraper.output_file))
+
+    def test_lost_leases_are_not_completed(self):
+        """Test a worker drops its result when the lease was reassigned while it worked"""
+        self.queue.add("pages", "cve", 0, 5)
+        
+        class LostHeartbeat:
+            lost = True
+            
+            def __init__(self, queue, lease):
+                pass
+            
+            def __enter__(self):
+                return self
+            
+            def __exit__(self, *exc):
+                pass
+        
+        scraper = mock.Mock()
+        scraper.scrape_range.return_value = 5
+        with mock.patch("builtins.print"), mock.patch("distributed.Heartbeat", LostHeartbeat):
+            self.assertEqual(run_worker(self.queue, "a", lambda scraper_type: scraper, wait=False), 0)
+        self.assertEqual(self.queue.counts(), {"leased": 1})
+    
+    def test_planned_page_count_is_shared_with_workers(self):
+        """Test the undisclosed page count is measured by the coordinator only"""
+        scraper = use_temp_output(UndisclosedReportsScraper("http"), self)
+        scraper.find_page_count = mock.Mock(return_value=45)
+        self.assertEqual(plan_pages(self.queue, "undisclosed", scraper, pages_per_lease=20), 3)
+        self.assertEqual(self.queue.page_count("undisclosed"), 45)
+        
+        worker_scraper = use_temp_output(UndisclosedReportsScraper("http"), self)
+        worker_scraper.find_page_count = mock.Mock()
+        with mock.patch("builtins.print"):
+            run_worker(self.queue, "a", lambda scraper_type: worker_scraper, wait=False)
+        worker_scraper.find_page_count.assert_not_called()
+        self.assertEqual(worker_scraper.link_store.count("Undisclosed Reports"), 45)
+    
+    def test_finished_mark_is_reset(self):
+        """Test workers of a new crawl do not stop on the finished mark of the last one"""
+        self.queue.mark_finished()
+        self.queue.mark_unfinished()
+        self.assertFalse(self.queue.is_finished())
+
+class TestPipeline(unittest.TestCase):
+    """Test streaming pages through the link pipeline"""
+    
+    def setUp(self):
+        """Create a scraper writing to a temporary directory"""
+        self.scraper = use_temp_output(DisclosedReportsScraper("http"), self)
+        self.scraper.rate_limiter = RateLimiter(rate=None)
+        self.scraper.create_backend = lambda name=None: FakeBackend(3)
+    
+    def test_links_reach_the_output_file_while_crawling(self):
+        """Test each page is appended to the output file before the next page is fetched"""
+        seen = []
+        def check_file(records):
+            with open(self.scraper.output_file) as f:
+                seen.append(len(f.read().split()))
+        self.scraper.sinks.append(CallbackSink(check_file))
+        self.scraper.scrape()
+        self.assertEqual(seen, [2, 4, 6])
+        self.assertEqual(self.scraper.new_link_count, 6)
+        self.assertEqual(self.scraper.link_store.unexported(self.scraper.category_name), [])
+    
+    def test_only_new_links_are_written(self):
+        """Test links already in the store are not passed to the sinks again"""
+        store = self.scraper.link_store
+        pipeline = LinkPipeline("Disclosed Reports", store, [], self.scraper.links_for_page, self.scraper.id_from_link)
+        first = pipeline.process(0, ["1", "2"])
+        second = pipeline.process(1, ["2", "3"])
+        self.assertEqual([record.item_id for record in first], ["1", "2"])
+        self.assertEqual([record.url for record in second], ["https://hackerone.com/reports/3"])
+        self.assertEqual(second[0].page_index, 1)
+        self.assertEqual(pipeline.new_links, 3)
+    
+    def test_queue_sink_feeds_a_consumer_thread(self):
+        """Test a downstream consumer receives links before the crawl has finished"""
+        sink = QueueSink(maxsize=1)
+        self.scraper.sinks.append(sink)
+        received = []
+        consumer = threading.Thread(target=lambda: received.extend(record.url for record in sink))
+        consumer.start()
+        self.scraper.scrape()
+        consumer.join(timeout=5)
+        self.assertFalse(consumer.is_alive())
+        self.assertEqual(len(received), 6)
+    
+    def test_text_file_sink_appends(self):
+        """Test the text sink appends to an existing file"""
+        path = os.path.join(temp_dir(self), "links.txt")
+        with open(path, "w") as f:
+            f.write("https://hackerone.com/reports/1\n")
+        sink = TextFileSink(path)
+        sink.write(LinkPipeline("Disclosed Reports", self.scraper.link_store, [], self.scraper.links_for_page,
+                                self.scraper.id_from_link).records(0, ["2"]))
+        sink.close()
+        with open(path) as f:
+            self.assertEqual(f.read().split(), ["https://hackerone.com/reports/1", "https://hackerone.com/reports/2"])
+
+class TestResponseCache(unittest.TestCase):
+    """Test the on-disk response cache"""
+    
+    def setUp(self):
+        """Create a cache in a temporary directory"""
+        self.directory = temp_dir(self)
+        self.cache = ResponseCache(self.directory)
+    
+    def test_entries_expire_after_ttl(self):
+        """Test an entry older than the TTL is treated as missing"""
+        self.cache.put("ab12", {"data": 1})
+        self.assertEqual(self.cache.get("ab12", ttl=60), {"data": 1})
+        with mock.patch("response_cache.time.time", return_value=time.time() + 120):
+            self.assertIsNone(self.cache.get("ab12", ttl=60))
+            self.assertFalse(self.cache.contains("ab12", ttl=60))
+            self.assertEqual(self.cache.get("ab12"), {"data": 1})
+    
+    def test_contains_then_get_parses_the_entry_once(self):
+        """Test checking for an entry and then reading it opens the file once"""
+        self.cache.put("ab12", {"data": 1})
+        with mock.patch("response_cache.json.load", wraps=json.load) as load:
+            self.assertTrue(self.cache.contains("ab12", ttl=60))
+            self.assertEqual(self.cache.get("ab12", ttl=60), {"data": 1})
+        self.assertEqual(load.call_count, 1)
+    
+    def test_keys_include_the_host(self):
+        """Test a response from a local server is never served for the real site"""
+        payload = {"operationName": "HacktivitySearchQuery"}
+        self.assertNotEqual(request_key("POST", "http://127.0.0.1:8000/graphql", payload),
+                            request_key("POST", "https://hackerone.com/graphql", payload))
+        self.assertEqual(request_key("POST", "https://HackerOne.com/graphql", payload),
+                         request_key("POST", "https://hackerone.com/graphql", payload))
+    
+    def test_least_recently_used_entries_are_evicted(self):
+        """Test the cache deletes the oldest unused entries once it is too big"""
+        self.cache.put("aa", {"data": "x" * 400})
+        self.cache.put("bb", {"data": "x" * 400})
+        self.cache.get("aa")
+        self.cache.max_size = 1200
+        self.cache.put("cc", {"data": "x" * 400})
+        self.assertIsNone(self.cache.get("bb"))
+        self.assertIsNotNone(self.cache.get("aa"))
+        # The LRU order and sizes survive a restart
+        reopened = ResponseCache(self.directory)
+        self.assertEqual(set(reopened.entries), {"aa", "cc"})
+    
+    def test_offline_mode_ignores_ttl_and_raises_on_miss(self):
+        """Test offline mode replays stale entries and never falls through to the network"""
+        self.cache.put("ab12", {"data": 1})
+        offline = ResponseCache(self.directory, offline=True)
+        with mock.patch("response_cache.time.time", return_value=time.time() + 10 ** 6):
+            self.assertEqual(offline.get("ab12", ttl=60), {"data": 1})
+        with self.assertRaises(CacheMiss):
+            offline.get("cd34")
+    
+    def test_repeated_scrape_is_served_from_cache(self):
+        """Test a second run reads every page from the cache without any request"""
+        with FixtureServer() as server:
+            def make_scraper():
+                scraper = use_temp_output(CVEScraper("auto"), self)
+                scraper.graphql_url = f"{server.url}/graphql"
+                scraper.page_size = 2
+                scraper.rate_limiter = RateLimiter(rate=None)
+                scraper.response_cache = self.cache
+                return scraper
+            scraper = make_scraper()
+            server.add({"method": "POST", "url": scraper.graphql_url, "request": scraper.graphql_payload(0),
+                        "response": {"data": {"cve_discovery": {"total_count": 1, "nodes": [{"cve_id": "CVE-2024-0001"}]}}}})
+            scraper.scrape()
+            self.assertEqual(len(server.requests), 1)
+            
+            replayed = make_scraper()
+            # With its only token used up, any rate limited request would wait 100 seconds
+            replayed.rate_limiter = RateLimiter(rate=0.01)
+            replayed.rate_limiter.acquire()
+            links = collect_links(replayed)
+            start = time.monotonic()
+            replayed.scrape()
+            self.assertLess(time.monotonic() - start, 5)
+            self.assertEqual(len(server.requests), 1)
+            self.assertEqual(links, ["https://hackerone.com/hacktivity/cve_discovery?id=CVE-2024-0001"])
+
+class TestExporters(unittest.TestCase):
+    """Test exporting the link store"""
+    
+    def setUp(self):
+        """Store a few links from two categories"""
+        self.scraper = use_temp_output(DisclosedReportsScraper("http"), self)
+        self.directory = os.path.dirname(self.scraper.output_file)
+        self.store = self.scraper.link_store
+        self.store.add_many("Disclosed Reports", ["https://hackerone.com/reports/1", "https://hackerone.com/reports/2"],
+                            page_index=0, id_from_link=self.scraper.id_from_link)
+        self.store.add_many("CVE", ["https://hackerone.com/hacktivity/cve_discovery?id=CVE-2024-0001"],
+                            page_index=3, id_from_link=self.scraper.id_from_link)
+    
+    def read_jsonl(self, path, opener=open):
+        """Read the rows of a JSON Lines export"""
+        with opener(path, "rt") as f:
+            return [json.loads(line) for line in f]
+    
+    def test_jsonl_export_and_metadata(self):
+        """Test JSON Lines exports have typed rows and a metadata sidecar with the counts"""
+        path = export_links(self.store, self.directory, "jsonl")
+        rows = self.read_jsonl(path)
+        self.assertEqual(rows[0]["id"], "1")
+        self.assertEqual(rows[2], dict(rows[2], category="CVE", id="CVE-2024-0001", page_index=3))
+        self.assertEqual(set(rows[0]), {"category", "id", "url", "first_seen", "page_index"})
+        self.assertEqual(count_rows(path), 3)
+        self.assertEqual(read_metadata(path)["categories"], {"Disclosed Reports": 2, "CVE": 1})
+    
+    def test_gzip_export(self):
+        """Test compressed JSON Lines can be read back"""
+        path = export_links(self.store, self.directory, "jsonl.gz")
+        self.assertTrue(path.endswith(".jsonl.gz"))
+        self.assertEqual(len(self.read_jsonl(path, gzip.open)), 3)
+    
+    def test_unknown_format(self):
+        """Test an unknown format is rejected"""
+        with self.assertRaises(ExportError):
+            export_links(self.store, self.directory, "csv")
+    
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+    def test_parquet_export_has_typed_columns(self):
+        """Test the Parquet export keeps the column types"""
+        import pyarrow.parquet
+        path = export_links(self.store, self.directory, "parquet")
+        table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(str(table.schema.field("page_index").type), "int32")
+        self.assertTrue(str(table.schema.field("first_seen").type).startswith("timestamp"))
+    
+    @unittest.skipUnless(importlib.util.find_spec("zstandard"), "zstandard is not installed")
+    def test_zstd_export(self):
+        """Test zstd-compressed JSON Lines can be read back"""
+        import zstandard
+        path = export_links(self.store, self.directory, "jsonl.zst")
+        self.assertEqual(len(self.read_jsonl(path, zstandard.open)), 3)
+
+class TestBenchmark(unittest.TestCase):
+    """Test the benchmark harness against the synthetic server"""
+    
+    def test_scenario_measures_a_full_run(self):
+        """Test a scenario crawls every synthetic page and reports its timings"""
+        import benchmark
+        with SyntheticServer(pages=3, page_size=5, latency=0.01) as server, mock.patch("builtins.print"):
+            result = benchmark.run_scenario("disclosed", "http", server, page_size=5, workers=2)
+        self.assertIsNone(result["error"])
+        self.assertEqual((result["pages"], result["links"], result["requests"]), (3, 15, 3))
+        self.assertGreater(result["pages_per_sec"], 0)
+        self.assertGreater(result["peak_rss_mb"], 0)
+        self.assertEqual(set(result["phases"]), {"setup", "fetch", "pipeline", "save"})
+    
+    def test_compare_flags_regressions(self):
+        """Test a slower run than the baseline is reported"""
+        import benchmark
+        def report(pages_per_sec):
+            return {"results": [{"scenario": "cve/http/w1", "pages_per_sec": pages_per_sec,
+                                 "links_per_sec": 100, "peak_rss_mb": 40}]}
+        with mock.patch("builtins.print"):
+            self.assertEqual(benchmark.compare(report(100), report(95)), [])
+            self.assertEqual(benchmark.compare(report(100), report(50)), [("cve/http/w1", "pages_per_sec", 100, 50)])
+
+class TestMetrics(unittest.TestCase):
+    """Test the metrics registry, its exporters and the scraper instrumentation"""
+    
+    def setUp(self):
+        """Start from empty metrics"""
+        metrics.registry.reset()
+        self.addCleanup(setattr, metrics.registry.tracer, "enabled", False)
+    
+    def test_prometheus_text_format(self):
+        """Test counters and cumulative histogram buckets are written in the text format"""
+        registry = metrics.MetricsRegistry()
+        counter = registry.counter("test_requests_total", "Requests")
+        histogram = registry.histogram("test_seconds", "Latency", buckets=(0.1, 1))
+        counter.inc(category="CVE")
+        counter.inc(2, category="CVE")
+        histogram.observe(0.05, category="CVE")
+        histogram.observe(0.5, category="CVE")
+        text = registry.prometheus_text()
+        self.assertIn("# TYPE test_requests_total counter", text)
+        self.assertIn('test_requests_total{category="CVE"} 3', text)
+        self.assertIn('test_seconds_bucket{category="CVE",le="0.1"} 1', text)
+        self.assertIn('test_seconds_bucket{category="CVE",le="+Inf"} 2', text)
+        self.assertIn('test_seconds_count{category="CVE"} 2', text)
+    
+    def test_scrape_records_phases_and_trace(self):
+        """Test a crawl records fetch and extraction timings, page counts and trace spans"""
+        metrics.registry.tracer.enabled = True
+        with FixtureServer() as server:
+            scraper = use_temp_output(DisclosedReportsScraper("http"), self)
+            scraper.graphql_url = f"{server.url}/graphql"
+            scraper.page_size = 2
+            scraper.rate_limiter = RateLimiter(rate=None)
+            for page_index, ids in enumerate([[1, 2], [3]]):
+                server.add({"method": "POST", "url": scraper.graphql_url, "request": scraper.graphql_payload(page_index),
+                            "response": hacktivity_response(ids, 3)})
+            scraper.scrape()
+        labels = {"category": scraper.category_name, "backend": "http"}
+        self.assertEqual(metrics.FETCH_SECONDS.count(**labels), 2)
+        self.assertEqual(metrics.EXTRACT_SECONDS.count(**labels), 2)
+        self.assertEqual(metrics.PAGES.value(category=scraper.category_name), 2)
+        self.assertEqual(metrics.LINKS.value(category=scraper.category_name), 3)
+        self.assertGreater(metrics.phase_summary(scraper.category_name)["fetch"], 0)
+        
+        path = os.path.join(temp_dir(self), "trace.json")
+        metrics.registry.tracer.dump(path)
+        with open(path) as f:
+            names = {event["name"] for event in json.load(f)["traceEvents"]}
+        self.assertEqual(names, {"hackerone_fetch_seconds", "hackerone_extract_seconds"})
+    
+    def test_retries_and_sleep_are_counted(self):
+        """Test the retry helper counts retries and the time slept"""
+        scraper = use_temp_output(CVEScraper(), self)
+        scraper.rate_limiter = RateLimiter(rate=None, backoff_base=0.01)
+        scraper.wait_before_retry(1)
+        self.assertEqual(metrics.RETRIES.value(category="CVE", backend="selenium"), 1)
+        self.assertLessEqual(metrics.SLEEP_SECONDS.value(category="CVE", reason="backoff"), 0.01)
+    
+    def test_exporters(self):
+        """Test the metrics are served over HTTP and written to a text file"""
+        metrics.PAGES.inc(category="CVE")
+        server = metrics.MetricsServer(0).start()
+        try:
+            text = requests.get(f"{server.url}/metrics", timeout=5).text
+            self.assertIn('hackerone_pages_total{category="CVE"} 1', text)
+            snapshot = requests.get(f"{server.url}/metrics.json", timeout=5).json()
+            self.assertEqual(snapshot["hackerone_pages_total"]["values"][0]["value"], 1)
+        finally:
+            server.stop()
+        
+        path = os.path.join(temp_dir(self), "scraper.prom")
+        metrics.PrometheusFileExporter(path, interval=60).start().stop()
+        with open(path) as f:
+            self.assertIn('hackerone_pages_total{category="CVE"} 1', f.read())
+
+class TestReportEnricher(unittest.TestCase):
+    """Test fetching report metadata against a local server"""
+    
+    def setUp(self):
+        """Start a fixture server and seed the link store with disclosed reports"""
+        self.server = FixtureServer().start()
+        self.scraper = use_temp_output(DisclosedReportsScraper("http"), self)
+        self.scraper.link_store.add_many(self.scraper.category_name,
+                                         [self.scraper.build_link(i) for i in ("1", "2", "3")],
+                                         id_from_link=self.scraper.id_from_link)
+        self.reports = ReportStore(os.path.join(os.path.dirname(self.scraper.output_file), "reports.db"))
+        self.enricher = ReportEnricher(self.scraper.link_store, self.reports, concurrency=2, base_url=self.server.url,
+                                       rate_limiter=RateLimiter(rate=None, backoff_base=0))
+    
+    def tearDown(self):
+        """Stop the server and close the stores"""
+        self.enricher.close()
+        self.reports.close()
+        self.server.stop()
+    
+    def add_report(self, report_id, data=None, **recording):
+        """Serve a report document"""
+        self.server.add(dict({
+            "method": "GET",
+            "url": self.enricher.report_url(report_id),
+            "response": data or {"title": f"Report {report_id}"},
+        }, **recording))
+    
+    def test_parse_report(self):
+        """Test the stored fields are picked from a report document"""
+        report = parse_report("5", {
+            "title": "XSS in search", "severity_rating": "high", "bounty_amount": "1,500.0",
+            "weakness": {"id": 60, "name": "Cross-site Scripting (XSS) - Stored", "external_id": "cwe-79"},
+            "team": {"handle": "acme"}, "disclosed_at": "2024-01-02T00:00:00Z",
+        })
+        self.assertEqual(report["cwe"], "CWE-79")
+        self.assertEqual(report["bounty"], 1500.0)
+        self.assertEqual((report["severity"], report["team"]), ("high", "acme"))
+    
+    def test_parse_report_reads_the_weakness_external_id(self):
+        """Test the CWE comes from the weakness external_id, not from text elsewhere in it"""
+        weakness = {"id": 75, "name": "Improper Input Validation", "description": "See also CWE-20", "external_id": 1287}
+        self.assertEqual(parse_report("5", {"weakness": weakness})["cwe"], "CWE-1287")
+        self.assertEqual(parse_report("5", {"weakness": {"name": "Other", "description": "Not CWE-20"}})["cwe"], None)
+
+    def test_fetches_only_unseen_reports(self):
+        """Test reports already in the store are not requested again"""
+        for report_id in ("1", "2"):
+            self.add_report(report_id)
+        self.add_report("3", status=404)
+        counts = self.enricher.run()
+        self.assertEqual(counts, {"updated": 2, "unchanged": 0, "missing": 1, "failed": 0})
+        self.assertEqual(self.reports.get("2")["title"], "Report 2")
+        
+        self.server.requests.clear()
+        self.assertEqual(self.enricher.run()["updated"], 0)
+        self.assertEqual(self.server.requests, [])
+    
+    def test_refresh_uses_conditional_requests(self):
+        """Test a known report with an ETag is revalidated instead of downloaded"""
+        for report_id in ("1", "2", "3"):
+            self.add_report(report_id, headers={"ETag": f'"v{report_id}"'})
+        self.enricher.run()
+        self.assertEqual(self.reports.get("1")["etag"], '"v1"')
+        counts = self.enricher.run(refresh=True)
+        self.assertEqual(counts["unchanged"], 3)
+    
+    def test_transient_errors_are_retried(self):
+        """Test a server error is retried before giving up"""
+        self.add_report("1", fail_first=1)
+        self.add_report("2", fail_first=5)
+        self.add_report("3")
+        counts = self.enricher.run()
+        self.assertEqual((counts["updated"], counts["failed"]), (2, 1))
+        self.assertEqual(self.reports.missing(["1", "2", "3"]), ["2"])
+
+class TestDrilldown(unittest.TestCase):
+    """Test mapping CVEs and CWEs to their reports"""
+    
+    def setUp(self):
+        """Start a fixture server and create a CVE scraper with two stored CVEs"""
+        self.server = FixtureServer().start()
+        self.scraper = use_temp_output(CVEScraper("http"), self)
+        self.scraper.graphql_url = f"{self.server.url}/graphql"
+        self.scraper.rate_limiter = RateLimiter(rate=None)
+        self.scraper.link_store.add_many("CVE", [self.scraper.build_link("CVE-2024-0001"),
+                                                 self.scraper.build_link("CVE-2024-0002")],
+                                         id_from_link=self.scraper.id_from_link)
+        self.edges = EdgeStore(os.path.join(os.path.dirname(self.scraper.output_file), "edges.db"))
+        self.crawler = DrilldownCrawler(self.scraper, self.edges, concurrency=2, page_size=2)
+        
+    def tearDown(self):
+        """Stop the server and close the edge store"""
+        self.server.stop()
+        self.edges.close()
+        
+    def add_search(self, item_id, pages):
+        """Record the search responses of one CVE, replacing earlier ones"""
+        for page_index, response in enumerate(pages):
+            self.server.add({"method": "POST", "url": self.scraper.graphql_url,
+                             "request": self.crawler.search_payload(item_id, page_index), "response": response})
+    
+    def test_reports_are_paged_and_stored_as_edges(self):
+        """Test every page of each identifier's search ends up in the edge table"""
+        self.add_search("CVE-2024-0001", [hacktivity_response([1, 2], 3), hacktivity_response([3], 3)])
+        self.add_search("CVE-2024-0002", [hacktivity_response([], 0)])
+        with mock.patch("builtins.print"):
+            counts = self.crawler.run()
+        self.assertEqual(counts, {"updated": 2, "unchanged": 0, "failed": 0})
+        self.assertEqual(self.edges.reports_for("CVE", "CVE-2024-0001"), ["1", "2", "3"])
+        self.assertEqual(self.edges.report_count("CVE", "CVE-2024-0002"), 0)
+        
+        path = os.path.join(temp_dir(self), "edges.csv")
+        self.assertEqual(self.edges.write_csv(path, "CVE"), 3)
+        with open(path) as f:
+            self.assertEqual(f.readline().strip(), "category,item_id,report_id,first_seen")
+    
+    def test_unchanged_counts_are_skipped(self):
+        """Test a re-run only fetches the first page of identifiers whose count did not change"""
+        self.add_search("CVE-2024-0001", [hacktivity_response([1, 2], 3), hacktivity_response([3], 3)])
+        self.add_search("CVE-2024-0002", [hacktivity_response([4], 1)])
+        with mock.patch("builtins.print"):
+            self.crawler.run()
+        del self.server.requests[:]
+        
+        self.add_search("CVE-2024-0002", [hacktivity_response([5, 4], 2)])
+        with mock.patch("builtins.print"):
+            counts = self.crawler.run()
+        self.assertEqual(counts, {"updated": 1, "unchanged": 1, "failed": 0})
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.edges.reports_for("CVE", "CVE-2024-0002"), ["4", "5"])
+    
+    def test_listed_counts_skip_the_search(self):
+        """Test listed counts are compared with the last listed counts, not with the search totals"""
+        data = {"data": {"cve_discovery": {"total_count": 2, "nodes": [
+            {"cve_id": "CVE-2024-0001", "reports_count": 10}, {"cve_id": "CVE-2024-0002", "reports_count": 20}]}}}
+        page = HttpBackend(self.scraper).page_result(0, data)
+        self.assertEqual(page.report_counts, {"CVE-2024-0001": 10, "CVE-2024-0002": 20})
+        
+        def run(listed_counts):
+            self.scraper.link_store.save_report_counts("CVE", listed_counts)
+            del self.server.requests[:]
+            with mock.patch("builtins.print"):
+                return self.crawler.run(), len(self.server.requests)
+        
+        # The listing counts more reports than the disclosed search finds
+        self.add_search("CVE-2024-0001", [hacktivity_response([1, 2], 3), hacktivity_response([3], 3)])
+        self.add_search("CVE-2024-0002", [hacktivity_response([4], 1)])
+        self.assertEqual(run(page.report_counts)[0], {"updated": 2, "unchanged": 0, "failed": 0})
+        self.assertEqual((self.edges.report_count("CVE", "CVE-2024-0001"),
+                          self.edges.listed_count("CVE", "CVE-2024-0001")), (3, 10))
+        
+        # Only the identifier whose listed count changed is searched
+        self.add_search("CVE-2024-0002", [hacktivity_response([5, 4], 2)])
+        self.assertEqual(run({"CVE-2024-0001": 10, "CVE-2024-0002": 21}),
+                         ({"updated": 1, "unchanged": 1, "failed": 0}, 1))
+        self.assertEqual(self.edges.reports_for("CVE", "CVE-2024-0002"), ["4", "5"])
+        
+        # A listed count that changed while the search total did not costs one request and becomes the baseline
+        self.assertEqual(run({"CVE-2024-0001": 11, "CVE-2024-0002": 21}),
+                         ({"updated": 0, "unchanged": 2, "failed": 0}, 1))
+        self.assertEqual(run({"CVE-2024-0001": 11, "CVE-2024-0002": 21}),
+                         ({"updated": 0, "unchanged": 2, "failed": 0}, 0))
+    
+    def test_failed_identifiers_are_counted(self):
+        """Test a search that fails does not stop the other identifiers"""
+        self.add_search("CVE-2024-0001", [hacktivity_response([1], 1)])
+        with mock.patch("builtins.print"):
+            counts = self.crawler.run()
+        self.assertEqual(counts, {"updated": 1, "unchanged": 0, "failed": 1})
+        self.assertIsNone(self.edges.report_count("CVE", "CVE-2024-0002"))
+
+class TestLinkIndex(unittest.TestCase):
+    """Test looking up and intersecting reports across the stored datasets"""
+    
+    def setUp(self):
+        """Store edges, report metadata and disclosed links in a temporary output directory"""
+        self.directory = temp_dir(self)
+        edges = EdgeStore(os.path.join(self.directory, "edges.db"))
+        edges.replace("CVE", "CVE-2024-0001", [1, 2])
+        edges.replace("CWE", "CWE-79", [2, 3, 4])
+        edges.close()
+        reports = ReportStore(os.path.join(self.directory, "reports.db"))
+        for report_id, severity, team, disclosed_at in [(1, "high", "acme", "2024-05-20T10:00:00.000Z"),
+                                                        (2, "high", "acme", "2024-05-25T10:00:00.000Z"),
+                                                        (3, "low", "other", "2024-01-01T10:00:00.000Z"),
+                                                        (4, "high", "other", "2024-05-30T10:00:00.000Z")]:
+            reports.save({"report_id": str(report_id), "severity": severity, "team": team,
+                          "disclosed_at": disclosed_at, "cwe": "CWE-79" if report_id > 1 else None})
+        reports.close()
+        links = LinkStore(os.path.join(self.directory, "links.db"))
+        links.add_many("Disclosed Reports", ["https://hackerone.com/reports/5", "https://hackerone.com/reports/6"],
+                       id_from_link=lambda link: link.rsplit("/", 1)[-1])
+        links.save_dates("Disclosed Reports", {"6": "2024-05-22T10:00:00.000Z"})
+        links.close()
+        self.index = LinkIndex.load(self.directory)
+        self.now = datetime(2024, 6, 1, tzinfo=timezone.utc)
+    
+    def test_point_lookups(self):
+        """Test identifiers find their reports and reports find their identifiers"""
+        self.assertEqual(self.index.reports_for("cve-2024-0001"), {"1", "2"})
+        self.assertEqual(self.index.reports_for("CWE-79"), {"2", "3", "4"})
+        self.assertEqual(self.index.reports_for("CWE-1"), frozenset())
+        self.assertEqual(self.index.terms_for(2), {"CVE-2024-0001", "CWE-79", "severity:high", "team:acme"})
+        self.assertIn("5", self.index.terms_by_report)
+        self.assertIsNone(self.index.report_date(5))
+    
+    def test_intersections_are_newest_first(self):
+        """Test every term narrows the result and dates filter with since:"""
+        self.assertEqual(self.index.query("CWE-79", "severity:high"), ["4", "2"])
+        self.assertEqual(self.index.query("CWE-79", "since:10d", now=self.now), ["4", "2"])
+        self.assertEqual(self.index.query("CWE-79", "team:ACME", "CVE-2024-0001"), ["2"])
+        # Report 6 is dated by the listing; report 5 has no known date, so since: never matches it
+        self.assertEqual(self.index.query("since:2024-05-21"), ["4", "2", "6"])
+        self.assertEqual(self.index.query()[-1], "5")
+        with self.assertRaises(ValueError):
+            self.index.query("CWE-79", "bounty:100")
+    
+    def test_lookups_are_sub_millisecond(self):
+        """Test point lookups and intersections stay fast on a large index"""
+        index = LinkIndex()
+        for report_id in range(50000):
+            index.add_report(report_id, f"2024-{report_id % 12 + 1:02d}-01T00:00:00")
+            index.add_term(f"CWE-{report_id % 100}", report_id)
+            index.add_term(f"severity:{('low', 'high')[report_id % 2]}", report_id)
+        index.finish()
+        start = time.perf_counter()
+        for cwe in range(100):
+            index.reports_for(f"CWE-{cwe}")
+        self.assertLess((time.perf_counter() - start) / 100, 0.001)
+        start = time.perf_counter()
+        results = index.query("CWE-79", "severity:high", "since:2024-12-01")
+        self.assertLess(time.perf_counter() - start, 0.01)
+        self.assertEqual(len(results), sum(1 for report_id in range(79, 50000, 100) if report_id % 12 == 11))
+    
+    def test_posting_lists_are_sorted_when_built(self):
+        """Test each term's reports are kept newest first so queries do not sort"""
+        self.assertEqual(self.index.postings["CWE-79"], ["4", "2", "3"])
+        with mock.patch("builtins.sorted", side_effect=AssertionError("query sorted its results")):
+            self.assertEqual(self.index.query("CWE-79"), ["4", "2", "3"])
+    
+    def test_query_command(self):
+        """Test the query command prints report URLs without loading the scrapers"""
+        script = ("import sys, json, main; main.main(sys.argv[1:]); "
+                  "print(json.dumps(sorted({name.split('.')[0] for name in sys.modules})))")
+        result = subprocess.run([sys.executable, "-c", script, "query", "CWE-79", "team:acme",
+                                 "--output-dir", self.directory], capture_output=True, text=True,
+                                cwd=os.getcwd(), env=main_environment())
+        self.assertEqual(result.returncode, 0, result.stderr)
+        lines = result.stdout.strip().splitlines()
+        self.assertEqual(lines[:-1], ["https://hackerone.com/reports/2"])
+        self.assertFalse(set(json.loads(lines[-1])) & {"selenium", "requests", "scraper_base"})
+
+class TestParallelRun(unittest.TestCase):
+    """Test running all scrapers from main.py"""
+    
+    def make_scraper_class(self, name, fail=False, duration=0.2):
+        """Build a stand-in scraper class that sleeps until cancelled instead of scraping"""
+        test = self
+        
+        class StubScraper:
+            def __init__(self, backend="auto"):
+                self.output_file = f"test_output/{name}_test.txt"
+                self.category_name = name
+                self.error = None
+                self.elapsed_time = None
+                self.progress_position = None
+                self.link_store = LinkStore(os.path.join(temp_dir(test), "links.db"))
+                self.cancelled = threading.Event()
+                
+            def cancel(self):
+                self.cancelled.set()
+                
+            def run(self):
+                start = time.time()
+                self.cancelled.wait(duration)
+                self.elapsed_time = time.time() - start
+                if fail:
+                    raise RuntimeError(f"{name} broke")
+                return True
+        return StubScraper
+    
+    def test_parallel_run_isolates_failures(self):
+        """Test scrapers run concurrently and one failure does not stop the others"""
+        import main
+        classes = {
+            "cve": self.make_scraper_class("cve"),
+            "cwe": self.make_scraper_class("cwe", fail=True),
+            "disclosed": self.make_scraper_class("disclosed"),
+            "undisclosed": self.make_scraper_class("undisclosed"),
+        }
+        patches = [
+            mock.patch.object(main, "scraper_class", classes.get),
+            mock.patch.object(main, "configure_scraper", lambda scraper, **options: scraper),
+            mock.patch("builtins.print"),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        
+        start = time.time()
+        scrapers = main.run_all_scrapers(parallel=True)
+        # Four 0.2 second scrapers take about as long as the slowest one
+        self.assertLess(time.time() - start, 0.6)
+        self.assertEqual([scraper.error is None for scraper in scrapers], [True, False, True, True])
+    
+    def test_ctrl_c_cancels_parallel_scrapers(self):
+        """Test Ctrl-C in the main thread stops every scraper instead of waiting for them"""
+        import main
+        instances = []
+        def scraper_class(scraper_type):
+            cls = self.make_scraper_class(scraper_type, duration=10)
+            def create(backend="auto"):
+                instances.append(cls(backend))
+                return instances[-1]
+            return create
+        
+        def interrupted(futures):
+            raise KeyboardInterrupt
+            yield
+        with mock.patch.object(main, "scraper_class", scraper_class), \
+                mock.patch.object(main, "configure_scraper", lambda scraper, **options: scraper), \
+                mock.patch("concurrent.futures.as_completed", interrupted), mock.patch("builtins.print"):
+            start = time.time()
+            with self.assertRaises(KeyboardInterrupt):
+                main.run_all_scrapers(parallel=True)
+        self.assertLess(time.time() - start, 1)
+        self.assertTrue(all(scraper.cancelled.is_set() for scraper in instances))
+    
+    def test_cancel_stops_a_crawl_between_pages(self):
+        """Test a cancelled scraper stops before its next page and keeps its journal"""
+        scraper = use_temp_output(DisclosedReportsScraper("http"), self)
+        scraper.rate_limiter = RateLimiter(rate=None)
+        backend = FakeBackend(100)
+        scraper.create_backend = lambda name=None: backend
+        scraper.sinks.append(CallbackSink(lambda records: scraper.cancel()))
+        with mock.patch("builtins.print"):
+            scraper.run()
+        self.assertIsInstance(scraper.error, KeyboardInterrupt)
+        self.assertEqual(backend.fetched, [0, 1])
+        self.assertTrue(os.path.exists(scraper.journal_file))
+
+class TestCommandLine(unittest.TestCase):
+    """Test the commands of main.py that do not crawl"""
+    
+    def run_main(self, *args):
+        """Run main.py in a fresh interpreter and return its output and the modules it loaded"""
+        script = ("import sys, json, main; main.main(sys.argv[1:]); "
+                  "print(json.dumps(sorted({name.split('.')[0] for name in sys.modules})))")
+        result = subprocess.run([sys.executable, "-c", script, *args], capture_output=True, text=True,
+                                cwd=os.getcwd(), env=main_environment())
+        self.assertEqual(result.returncode, 0, result.stderr)
+        lines = result.stdout.strip().splitlines()
+        return "\n".join(lines[:-1]), set(json.loads(lines[-1]))
+    
+    def test_light_commands_skip_heavy_imports(self):
+        """Test count, status and export never load Selenium, requests or the scrapers"""
+        directory = temp_dir(self)
+        store = LinkStore(os.path.join(directory, "links.db"))
+        store.add_many("CVE", ["https://hackerone.com/hacktivity/cve_discovery?id=CVE-2024-0001"])
+        store.close()
+        
+        output, modules = self.run_main("count", "--output-dir", directory)
+        self.assertIn("CVE: 1", output)
+        self.assertIn("Total: 1", output)
+        heavy = {"selenium", "webdriver_manager", "requests", "bs4", "tqdm", "scraper_base"}
+        self.assertFalse(modules & heavy)
+        
+        output, modules = self.run_main("status", "--output-dir", directory)
+        self.assertIn("Undisclosed Reports: 0", output)
+        self.assertFalse(modules & heavy)
+        
+        output, modules = self.run_main("export", "--format", "jsonl", "--output-dir", directory)
+        self.assertEqual(count_rows(os.path.join(directory, "links.jsonl")), 1)
+        self.assertFalse(modules & heavy)
+    
+    def test_status_does_not_create_databases(self):
+        """Test status on an empty directory only reports that nothing is stored"""
+        directory = temp_dir(self)
+        output, _ = self.run_main("count", "--output-dir", directory)
+        self.assertIn("No links stored", output)
+        output, _ = self.run_main("status", "--output-dir", directory)
+        self.assertIn("CVE: 0", output)
+        self.assertEqual(os.listdir(directory), [])
+
+class TestDriverPool(unittest.TestCase):
+    """Test leasing and recycling browsers"""
+    
+    def setUp(self):
+        """Create a pool of fake drivers"""
+        self.drivers = []
+        
+        def factory():
+            self.drivers.append(FakeDriver())
+            return self.drivers[-1]
+        
+        self.pool = DriverPool(factory, max_size=2, max_pages=3)
+        
+    def tearDown(self):
+        """Close the pool"""
+        self.pool.close()
+    
+    def test_released_drivers_are_reused(self):
+        """Test a returned driver is handed out again instead of starting a new one"""
+        driver = self.pool.lease()
+        self.pool.release(driver)
+        self.assertIs(self.pool.lease(), driver)
+        self.assertEqual(len(self.drivers), 1)
+    
+    def test_unhealthy_drivers_are_replaced(self):
+        """Test a driver failing its health check is quit and replaced"""
+        driver = self.pool.lease()
+        self.pool.release(driver)
+        driver.alive = False
+        replacement = self.pool.lease()
+        self.assertIsNot(replacement, driver)
+        self.assertEqual(driver.quit_calls, 1)
+    
+    def test_drivers_are_recycled_after_max_pages(self):
+        """Test a driver is quit once it has served max_pages pages"""
+        driver = self.pool.lease()
+        self.assertFalse(self.pool.page_done(driver))
+        self.assertFalse(self.pool.page_done(driver))
+        self.assertTrue(self.pool.page_done(driver))
+        self.pool.release(driver)
+        self.assertEqual(driver.quit_calls, 1)
+        self.assertIsNot(self.pool.lease(), driver)
+    
+    def test_lease_blocks_when_pool_is_full(self):
+        """Test the pool never starts more than max_size drivers"""
+        first = self.pool.lease()
+        self.pool.lease()
+        with self.assertRaises(TimeoutError):
+            self.pool.lease(timeout=0.05)
+        self.pool.release(first)
+        self.assertIs(self.pool.lease(timeout=0.05), first)
+    
+    def test_close_quits_every_driver(self):
+        """Test closing the pool quits idle and leased drivers"""
+        leased = self.pool.lease()
+        idle = self.pool.lease()
+        self.pool.release(idle)
+        self.pool.close()
+        self.assertEqual((leased.quit_calls, idle.quit_calls), (1, 1))
+    
+    def test_selenium_backend_returns_driver_to_pool(self):
+        """Test scrapers lease from the pool and give the browser back"""
+        scraper = use_temp_output(DisclosedReportsScraper("selenium"), self)
+        scraper.driver_pool = self.pool
+        scraper.rate_limiter = RateLimiter(rate=None)
+        scraper.extract_page_ids = lambda driver: ["1"] if driver.url.endswith("0") else []
+        scraper.check_next_page = lambda driver: True
+        links = collect_links(scraper)
+        scraper.scrape()
+        self.assertEqual(links, ["https://hackerone.com/reports/1"])
+        self.assertEqual(len(self.drivers), 1)
+        self.assertEqual(len(self.pool.idle), 1)
+    
+    def test_health_check_runs_outside_the_lock(self):
+        """Test a slow health check does not hold up leases from other threads"""
+        driver = self.pool.lease()
+        self.pool.release(driver)
+        other = []
+        
+        def slow_check(script):
+            # Another thread leases the free slot while this check is still running
+            thread = threading.Thread(target=lambda: other.append(self.pool.lease(timeout=1)))
+            thread.start()
+            thread.join(0.5)
+            return 1
+        
+        driver.execute_script = slow_check
+        self.assertIs(self.pool.lease(), driver)
+        self.assertEqual(len(other), 1)
+    
+    def test_click_paged_listings_are_not_recycled_mid_crawl(self):
+        """Test a listing walked with the next button keeps its browser instead of clicking back from page 0"""
+        scraper = use_temp_output(CVEScraper("selenium"), self)
+        scraper.driver_pool = self.pool
+        scraper.rate_limiter = RateLimiter(rate=None)
+        clicks = []
+        
+        def go_to_next_page(driver):
+            clicks.append(driver)
+            return True
+        
+        scraper.go_to_next_page = go_to_next_page
+        scraper.extract_page_ids = lambda driver: [f"CVE-2024-{len(clicks):04d}"]
+        scraper.check_next_page = lambda driver: len(clicks) < 7
+        links = collect_links(scraper)
+        scraper.scrape()
+        self.assertEqual(len(links), 8)
+        # One click per page, although the pool recycles after three pages
+        self.assertEqual(len(clicks), 7)
+        self.assertEqual(len(self.drivers), 1)
+        # The recycle happens once the crawl gives the browser back
+        self.assertEqual(self.drivers[0].quit_calls, 1)
+    
+    def test_recycle_check_runs_outside_the_lock(self):
+        """Test releasing a driver reads its memory without holding the pool's lock"""
+        driver = self.pool.lease()
+        held = []
+        
+        def needs_recycle(pooled):
+            # Another thread can only take the lock if this one does not hold it
+            def probe():
+                acquired = self.pool.condition.acquire(blocking=False)
+                held.append(not acquired)
+                if acquired:
+                    self.pool.condition.release()
+            thread = threading.Thread(target=probe)
+            thread.start()
+            thread.join()
+            return False
+        
+        with mock.patch.object(self.pool, "needs_recycle", side_effect=needs_recycle):
+            self.pool.release(driver)
+        self.assertEqual(held, [False])
+        self.assertEqual(len(self.pool.idle), 1)
+    
+    def test_workers_are_capped_at_the_pool_size(self):
+        """Test a browser crawl never runs more workers than the pool has browsers"""
+        pool = self.pool
+        
+        class PooledBackend(FakeBackend):
+            name = "selenium"
+            
+            def __init__(self):
+                super().__init__(10)
+                # Workers keep their browser until the crawl ends
+                self.driver = pool.lease(timeout=2)
+            
+            def close(self):
+                pool.release(self.driver)
+        
+        scraper = use_temp_output(DisclosedReportsScraper("selenium"), self)
+        scraper.driver_pool = pool
+        scraper.workers = 4
+        scraper.rate_limiter = RateLimiter(rate=None)
+        scraper.create_backend = lambda name=None: PooledBackend()
+        links = collect_links(scraper)
+        scraper.scrape()
+        self.assertEqual(len(links), 20)
+        self.assertIsNone(scraper.error)
+
+class TestBrowserProfiles(unittest.TestCase):
+    """Test the lean Chrome profile and choosing a profile per scraper"""
+    
+    def test_lean_profile_copies_the_options(self):
+        """Test the lean profile adds its settings to a copy of the scraper's Chrome options"""
+        scraper = use_temp_output(DisclosedReportsScraper("selenium"), self)
+        options = profile_options(scraper.chrome_options, "lean")
+        self.assertEqual(options.page_load_strategy, "eager")
+        self.assertIn("--disable-background-networking", options.arguments)
+        self.assertIn("--headless", options.arguments)
+        self.assertEqual(options.experimental_options["prefs"]["profile.managed_default_content_settings.images"], 2)
+        self.assertEqual(scraper.chrome_options.page_load_strategy, "normal")
+        self.assertNotIn("--disable-background-networking", scraper.chrome_options.arguments)
+        self.assertIs(profile_options(scraper.chrome_options, "full"), scraper.chrome_options)
+        with self.assertRaises(ValueError):
+            profile_options(scraper.chrome_options, "tiny")
+    
+    def test_requests_are_blocked_through_cdp(self):
+        """Test assets and trackers are blocked on drivers that speak CDP"""
+        driver = FakeDriver()
+        driver.cdp_commands = []
+        driver.execute_cdp_cmd = lambda command, params: driver.cdp_commands.append((command, params))
+        self.assertTrue(block_requests(driver))
+        self.assertEqual(driver.cdp_commands[0], ("Network.enable", {}))
+        blocked = driver.cdp_commands[1][1]["urls"]
+        self.assertIn("*.css", blocked)
+        self.assertIn("*google-analytics.com*", blocked)
+        self.assertFalse(block_requests(FakeDriver()))
+    
+    def test_profiles_are_chosen_per_scraper(self):
+        """Test --browser-profile values map to scrapers and each profile gets its own pool"""
+        import main
+        profiles = main.parse_browser_profiles(["lean", "undisclosed=full"])
+        self.assertEqual(profiles, {None: "lean", "Undisclosed Reports": "full"})
+        with self.assertRaises(ValueError):
+            main.parse_browser_profiles(["disclosed=tiny"])
+        
+        disclosed = main.configure_scraper(use_temp_output(DisclosedReportsScraper("selenium"), self), browser_profiles=profiles)
+        undisclosed = main.configure_scraper(use_temp_output(UndisclosedReportsScraper("selenium"), self), browser_profiles=profiles)
+        self.assertEqual((disclosed.browser_profile, undisclosed.browser_profile), ("lean", "full"))
+        lean_pool, full_pool = disclosed.get_driver_pool(), undisclosed.get_driver_pool()
+        try:
+            self.assertIsNot(lean_pool, full_pool)
+            self.assertIs(shared_driver_pool(None, "lean"), lean_pool)
+        finally:
+            lean_pool.close()
+            full_pool.close()
+    
+    def test_synthetic_pages_reference_assets(self):
+        """Test the benchmark's listing pages load assets a lean browser can skip"""
+        with SyntheticServer(pages=1, page_size=2) as server:
+            page = requests.get(f"{server.url}/hacktivity/overview?queryString=disclosed:true&pageIndex=0").text
+            self.assertIn('href="/assets/site.css"', page)
+            self.assertIn('src="/assets/avatar1.png"', page)
+            response = requests.get(f"{server.url}/assets/site.css")
+        self.assertEqual(response.headers["Content-Type"], "text/css")
+
+class NetworkLogDriver(FakeDriver):
+    """Fake driver whose pages send GraphQL requests that show up in the performance log"""
+    
+    def __init__(self, responses):
+        super().__init__()
+        # Function of the URL returning [(post body, response body)] the page fetches
+        self.responses = responses
+        self.log = []
+        self.bodies = {}
+        self.cdp_commands = []
+        
+    def get(self, url):
+        super().get(url)
+        for post, body in self.responses(url):
+            request_id = str(len(self.bodies))
+            self.bodies[request_id] = body
+            events = [
+                ("Network.requestWillBeSent", {"requestId": request_id, "request": {
+                    "url": "https://hackerone.com/graphql", "method": "POST", "postData": json.dumps(post)}}),
+                ("Network.responseReceived", {"requestId": request_id, "response": {
+                    "status": 200, "mimeType": "application/json"}}),
+                ("Network.loadingFinished", {"requestId": request_id}),
+            ]
+            self.log.extend({"message": json.dumps({"message": {"method": method, "params": params}})}
+                            for method, params in events)
+        
+    def get_log(self, log_type):
+        entries, self.log = self.log, []
+        return entries
+        
+    def execute_cdp_cmd(self, command, params):
+        self.cdp_commands.append(command)
+        if command == "Network.getResponseBody":
+            return {"body": json.dumps(self.bodies[params["requestId"]]), "base64Encoded": False}
+        return {}
+
+class TestHybridBackend(unittest.TestCase):
+    """Test reading listing pages from the GraphQL responses captured in the browser"""
+    
+    def make_scraper(self, responses):
+        """Create a hybrid disclosed reports scraper whose browser serves the given responses"""
+        scraper = use_temp_output(DisclosedReportsScraper("hybrid"), self)
+        scraper.rate_limiter = RateLimiter(rate=None)
+        scraper.page_size = 2
+        self.driver = NetworkLogDriver(responses)
+        scraper.driver_pool = DriverPool(lambda: self.driver)
+        self.addCleanup(scraper.driver_pool.close)
+        return scraper
+    
+    def test_pages_are_read_from_captured_responses(self):
+        """Test IDs, totals and dates come from the page's own query, skipping other operations and pages"""
+        listing = {0: [1, 2], 1: [3]}
+        def responses(url):
+            page_index = int(url.rsplit("=", 1)[1])
+            query = lambda offset: {"operationName": "HacktivitySearchQuery", "variables": {"from": offset, "size": 2}}
+            return [({"operationName": "CurrentUser"}, {"data": {"me": None}}),
+                    (query(page_index * 2 + 2), hacktivity_response([9], 3)),
+                    (query(page_index * 2), hacktivity_response(listing[page_index], 3, "2024-02-01T00:00:00Z"))]
+        scraper = self.make_scraper(responses)
+        scraper.extract_page_ids = mock.Mock(side_effect=AssertionError("the DOM should not be read"))
+        pages = list(scraper.iter_pages())
+        self.assertEqual([(page_index, page.ids) for page_index, page in pages], [(0, ["1", "2"]), (1, ["3"])])
+        self.assertEqual((pages[0][1].total_count, pages[0][1].activity_at), (3, "2024-02-01T00:00:00Z"))
+        self.assertTrue(pages[0][1].has_next)
+        self.assertIn("Network.enable", self.driver.cdp_commands)
+    
+    def test_falls_back_to_the_dom(self):
+        """Test a page whose query is never captured is read from the DOM"""
+        scraper = self.make_scraper(lambda url: [])
+        scraper.extract_page_ids = lambda driver: ["7"]
+        scraper.check_next_page = lambda driver: False
+        backend = scraper.create_backend()
+        backend.capture_timeout = 0
+        try:
+            page = backend.fetch_page(0)
+        finally:
+            backend.close()
+        self.assertEqual(page.ids, ["7"])
+    
+    def test_seek_reads_the_response_of_the_final_click(self):
+        """Test clicking through to a page reads only the query the last click sent"""
+        def page(page_index, first_id):
+            query = {"operationName": "CveDiscoveryQuery", "variables": {"from": page_index * 2, "size": 2}}
+            return query, {"data": {"cve_discovery": {"total_count": 6, "nodes": [
+                {"cve_id": f"CVE-2024-{first_id + i:04d}", "reports_count": 1} for i in range(2)]}}}
+        
+        def responses(url):
+            page_index = int(url.rsplit("=", 1)[1]) if "#page=" in url else 0
+            if page_index == 1:
+                # The page prefetches the next one while it is still being clicked through
+                return [page(1, 2), page(2, 9000)]
+            return [page(page_index, page_index * 2)]
+        
+        scraper = use_temp_output(CVEScraper("hybrid"), self)
+        scraper.rate_limiter = RateLimiter(rate=None)
+        scraper.page_size = 2
+        self.driver = NetworkLogDriver(responses)
+        scraper.driver_pool = DriverPool(lambda: self.driver)
+        self.addCleanup(scraper.driver_pool.close)
+        clicks = []
+        
+        def go_to_next_page(driver):
+            clicks.append(len(clicks) + 1)
+            driver.get(f"{scraper.base_url}#page={clicks[-1]}")
+            return True
+        
+        scraper.go_to_next_page = go_to_next_page
+        backend = scraper.create_backend()
+        backend.capture_timeout = 0
+        try:
+            page = backend.fetch_page(2)
+        finally:
+            backend.close()
+        self.assertEqual(clicks, [1, 2])
+        self.assertEqual(page.ids, ["CVE-2024-0004", "CVE-2024-0005"])
+    
+    def test_responses_without_an_offset_are_rejected(self):
+        """Test a captured query that does not say which page it asked for is not trusted"""
+        query = {"operationName": "HacktivitySearchQuery", "variables": {"size": 2}}
+        scraper = self.make_scraper(lambda url: [(query, hacktivity_response([9], 3))])
+        scraper.extract_page_ids = lambda driver: ["7"]
+        scraper.check_next_page = lambda driver: False
+        backend = scraper.create_backend()
+        backend.capture_timeout = 0
+        try:
+            page = backend.fetch_page(1)
+        finally:
+            backend.close()
+        self.assertEqual(page.ids, ["7"])
+    
+    def test_browsers_log_their_network_traffic(self):
+        """Test hybrid browsers get the performance log and a pool of their own"""
+        options = network_logging_options(Options())
+        self.assertEqual(options.to_capabilities()["goog:loggingPrefs"], {"performance": "ALL"})
+        scraper = use_temp_output(DisclosedReportsScraper("hybrid"), self)
+        pool = scraper.get_driver_pool()
+        try:
+            self.assertIsNot(pool, shared_driver_pool(None, "full"))
+            self.assertIs(pool, shared_driver_pool(None, "full-network"))
+        finally:
+            pool.close()
+            shared_driver_pool(None, "full").close()
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
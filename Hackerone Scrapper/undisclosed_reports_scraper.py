@@ -1,91 +1,127 @@
-import time
-import re
+import math
+import asyncio
 from scraper_base import BaseHackerOneScraper
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
-from tqdm import tqdm
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
+from readiness import wait_until_ready
+from page_parser import parse_content_links
+from fetch_backend import (HACKTIVITY_SEARCH_QUERY, FetchError, PageResult, find_total_count, hacktivity_nodes,
+                           hacktivity_variables, unique)
 
 class UndisclosedReportsScraper(BaseHackerOneScraper):
     """Scraper for HackerOne undisclosed reports links"""
     
-    def __init__(self):
+    def __init__(self, backend="auto"):
         """Initialize the undisclosed reports scraper"""
-        super().__init__("output/undisclosed_links.txt", "Undisclosed Reports")
+        super().__init__("output/undisclosed_links.txt", "Undisclosed Reports", backend)
         self.base_url = "https://hackerone.com/hacktivity/overview"
         self.query_params = "?queryString=disclosed%3Afalse&sortField=latest_disclosable_activity_at&sortDirection=DESC&pageIndex="
+        self.probes = 0  # Pages fetched by the last page count search
+        self.page_count = None  # Known page count, such as the one a distributed crawl planned with
         
-    def scrape(self):
-        """Scrape undisclosed reports links from HackerOne"""
-        driver = self.setup_driver()
+    def page_url(self, page_index):
+        """Return the URL of an undisclosed reports listing page"""
+        return f"{self.base_url}{self.query_params}{page_index}"
+    
+    def graphql_payload(self, page_index):
+        """Return the GraphQL request for a page of undisclosed reports"""
+        return {
+            "operationName": "HacktivitySearchQuery",
+            "query": HACKTIVITY_SEARCH_QUERY,
+            "variables": hacktivity_variables("disclosed:false", page_index, self.page_size),
+        }
+    
+    def parse_graphql(self, data):
+        """Extract hacktivity item IDs and the total count from a GraphQL response"""
+        item_ids = [str(node["_id"]) for node in hacktivity_nodes(data) if node.get("_id")]
+        return unique(item_ids), find_total_count(data)
+    
+    def extract_page_ids(self, driver):
+        """Return the current page URL as the only item if the page has report content"""
+        return [driver.current_url] if self.check_page_has_content(driver) else []
+    
+    def links_for_page(self, page_index, ids):
+        """Undisclosed reports have no public URL, so link to the listing page itself"""
+        return [self.page_url(page_index)] if ids else []
+    
+    def probe(self, backend, page_index):
+        """Fetch one listing page and return whether it has reports"""
+        if not backend.is_cached(page_index):
+            self.rate_limiter.acquire()
+        page = backend.fetch_page(page_index)
+        self.probes += 1
+        return page
+    
+    def search_page_count(self, backend):
+        """Count the non-empty listing pages with O(log N) fetches"""
+        first = self.probe(backend, 0)
+        if not first.ids:
+            return 0
+        if first.total_count is not None:
+            return math.ceil(first.total_count / self.page_size)
+        
+        # Double the page index until a page is empty, then bisect between the last full and the first empty page
+        low, high = 0, 1
+        while True:
+            if self.max_pages is not None and high >= self.max_pages - 1:
+                high = self.max_pages - 1
+                if self.probe(backend, high).ids:
+                    return self.max_pages
+                break
+            if not self.probe(backend, high).ids:
+                break
+            low, high = high, high * 2
+        while high - low > 1:
+            middle = (low + high) // 2
+            if self.probe(backend, middle).ids:
+                low = middle
+            else:
+                high = middle
+        return low + 1
+    
+    def find_page_count(self):
+        """Find how many listing pages have reports, falling back to Selenium like iter_pages"""
+        self.probes = 0
+        backend = self.create_backend("http" if self.backend == "async" else None)
         try:
-            # Start with page 0
-            page_index = 0
-            has_more_pages = True
-            all_page_urls = []
-            
-            with tqdm(desc="Scraping undisclosed report pages", unit="page") as pbar:
-                # Process each page until no more pages are available
-                while has_more_pages:
-                    # Navigate to the current page
-                    current_url = f"{self.base_url}{self.query_params}{page_index}"
-                    driver.get(current_url)
-                    time.sleep(3)  # Wait for page to load
-                    
-                    # Check if the page has content
-                    has_content = self.check_page_has_content(driver)
-                    
-                    if has_content:
-                        all_page_urls.append(current_url)
-                        pbar.set_postfix({"Pages found": len(all_page_urls)})
-                        pbar.update(1)
-                        page_index += 1
-                        
-                        # Check if there's a next page
-                        has_more_pages = self.check_next_page(driver)
-                        
-                        # Add a small delay to avoid overloading the server
-                        time.sleep(1)
-                        
-                        # Add a limit to avoid infinite loops
-                        if page_index >= 1000:  # Arbitrary limit
-                            has_more_pages = False
-                            print("Reached maximum page limit")
-                    else:
-                        has_more_pages = False
-                        print(f"No more content found on page {page_index}")
-            
-            # Save all page URLs
-            total_pages = len(all_page_urls)
-            print(f"Found a total of {total_pages} pages of undisclosed reports")
-            
-            with tqdm(total=total_pages, desc="Generating undisclosed report page links", unit="link") as pbar:
-                for i, url in enumerate(all_page_urls):
-                    self.links.append(url)
-                    pbar.update(1)
-                    pbar.set_postfix({"Current page": i + 1})
-                
-        except Exception as e:
-            print(f"Error during undisclosed reports scraping: {e}")
+            try:
+                page_count = self.search_page_count(backend)
+            except FetchError as e:
+                offline = self.response_cache is not None and self.response_cache.offline
+                if self.backend != "auto" or backend.name != "http" or offline:
+                    raise
+                self.logger.warning(f"HTTP backend failed ({e}), falling back to Selenium")
+                backend.close()
+                backend = self.create_backend("selenium")
+                page_count = self.search_page_count(backend)
         finally:
-            driver.quit()
+            backend.close()
+        if self.max_pages is not None:
+            page_count = min(page_count, self.max_pages)
+        self.logger.info(f"Found {page_count} pages of {self.category_name} with {self.probes} page fetches")
+        return page_count
     
-    def check_next_page(self, driver):
-        """Check if there's a next page button and if it's enabled"""
-        try:
-            # Find the next page button
-            next_button = WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.ID, "pagination-next-page"))
-            )
-            
-            # Check if the button is enabled
-            return next_button.is_enabled() and "disabled" not in next_button.get_attribute("class")
-        except (TimeoutException, NoSuchElementException):
-            return False
-        except Exception as e:
-            print(f"Error checking next page: {e}")
-            return False
+    def listing_pages(self, page_count, start=0, end=None):
+        """Yield a page holding its own URL for every non-empty listing page"""
+        if end is not None:
+            page_count = min(page_count, end)
+        for page_index in range(start, page_count):
+            yield page_index, PageResult([self.page_url(page_index)], has_next=page_index < page_count - 1)
+    
+    def iter_pages(self, start=0, end=None):
+        """The output is one link per listing page, so only the page count has to be fetched"""
+        page_count = self.page_count if self.page_count is not None else self.find_page_count()
+        yield from self.listing_pages(page_count, start, end)
+    
+    async def iter_pages_async(self, start=0):
+        """Find the page count in a thread, since the search is a handful of sequential fetches"""
+        page_count = self.page_count
+        if page_count is None:
+            page_count = await asyncio.to_thread(self.find_page_count)
+        for item in self.listing_pages(page_count, start):
+            yield item
     
     def check_page_has_content(self, driver):
         """Check if the page has report content"""
@@ -99,21 +135,14 @@ class UndisclosedReportsScraper(BaseHackerOneScraper):
                     EC.presence_of_element_located((By.TAG_NAME, "body"))
                 )
                 
-                # Look for program links or report elements
-                program_links = driver.find_elements(By.CSS_SELECTOR, "a[href^='https://hackerone.com/']")
-                
-                # Filter out navigation links
-                content_links = [link for link in program_links if not any(x in link.get_attribute("href") for x in [
-                    "/hacktivity/", "/opportunities/", "/directory/", "/leaderboard", "/users/sign_in"
-                ])]
-                
-                # Check for error messages
-                error_elements = driver.find_elements(By.XPATH, "//*[contains(text(), 'Error')]")
-                if error_elements and len(error_elements) > 0:
+                # Grab the rendered page once and look for report content and error messages locally
+                content_links, has_error = parse_content_links(driver.page_source)
+                if has_error:
                     print("Error message found on page, retrying...")
                     driver.refresh()
                     retries += 1
-                    time.sleep(3)
+                    self.wait_before_retry(retries)
+                    wait_until_ready(driver, self.ready_selector)
                     continue
                 
                 return len(content_links) > 0
@@ -121,7 +150,7 @@ class UndisclosedReportsScraper(BaseHackerOneScraper):
             except (TimeoutException, StaleElementReferenceException) as e:
                 retries += 1
                 print(f"Retry {retries}/{max_retries} due to: {e}")
-                time.sleep(2)
+                self.wait_before_retry(retries)
             except Exception as e:
                 print(f"Error checking page content: {e}")
                 break
@@ -129,5 +158,7 @@ class UndisclosedReportsScraper(BaseHackerOneScraper):
         return False
 
 if __name__ == "__main__":
+    from log_config import configure_logging
+    configure_logging("scraper.log")
     scraper = UndisclosedReportsScraper()
     scraper.run()
\ No newline at end of file
@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger("WorkQueue")
+
+
+class Lease:
+    """A unit of work claimed by one worker until ``expires_at``"""
+
+    def __init__(self, lease_id, kind, category, start, end, items, worker, expires_at, attempts):
+        self.id = lease_id
+        self.kind = kind
+        self.category = category
+        self.start = start
+        self.end = end
+        self.items = items
+        self.worker = worker
+        self.expires_at = expires_at
+        self.attempts = attempts
+
+    def __repr__(self):
+        if self.kind == "pages":
+            return f"Lease({self.id}, {self.category} pages {self.start}-{'end' if self.end is None else self.end - 1})"
+        return f"Lease({self.id}, {len(self.items or [])} {self.category})"
+
+
+class WorkQueue:
+    """Page ranges and report batches shared by the coordinator and workers of a distributed crawl
+
+    The queue is a SQLite file, so every node that can reach it on shared
+    storage can take part. Workers claim a lease for ``lease_seconds`` and
+    renew it with heartbeats while they work; a lease whose worker stopped
+    renewing it goes back to whoever claims next, so a lost node only delays
+    its work. Results go to the link and report stores, which ignore
+    duplicates, so a lease that ends up done twice does no harm. The file uses
+    a rollback journal rather than WAL, which needs memory shared between
+    processes on one host.
+    """
+
+    def __init__(self, path, lease_seconds=300, max_attempts=5):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        # Transactions are opened explicitly so a claim can lock the file before reading
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                category TEXT NOT NULL,
+                start INTEGER,
+                end INTEGER,
+                items TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                expires_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result INTEGER,
+                error TEXT
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS leases_status ON leases (status, expires_at)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def add(self, kind, category, start=None, end=None, items=None):
+        """Queue one unit of work"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO leases (kind, category, start, end, items) VALUES (?, ?, ?, ?, ?)",
+                (kind, category, start, end, json.dumps(items) if items is not None else None),
+            )
+
+    def add_page_ranges(self, category, first_page, last_page=None, pages_per_lease=20):
+        """Split pages ``first_page`` up to ``last_page`` into leases, or queue one open-ended lease"""
+        if last_page is None:
+            self.add("pages", category, first_page, None)
+            return 1
+        count = 0
+        for start in range(first_page, last_page, pages_per_lease):
+            self.add("pages", category, start, min(start + pages_per_lease, last_page))
+            count += 1
+        return count
+
+    def add_batches(self, kind, category, items, batch_size=100):
+        """Split a list of IDs into leases of at most ``batch_size``"""
+        count = 0
+        for start in range(0, len(items), batch_size):
+            self.add(kind, category, items=items[start:start + batch_size])
+            count += 1
+        return count
+
+    def claim(self, worker):
+        """Lease the next pending or expired unit of work to a worker, or return None"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Work that keeps killing its workers would otherwise be retried forever
+                self.conn.execute(
+                    "UPDATE leases SET status = 'failed', error = 'lease expired too often' "
+                    "WHERE status = 'leased' AND expires_at < ? AND attempts >= ?",
+                    (now, self.max_attempts),
+                )
+                row = self.conn.execute(
+                    "SELECT * FROM leases WHERE attempts < ? AND "
+                    "(status = 'pending' OR (status = 'leased' AND expires_at < ?)) ORDER BY id LIMIT 1",
+                    (self.max_attempts, now),
+                ).fetchone()
+                if row is None:
+                    self.conn.execute("COMMIT")
+                    return None
+                if row["status"] == "leased":
+                    logger.warning(f"Lease {row['id']} of {row['worker']} expired, reassigning it to {worker}")
+                expires_at = now + self.lease_seconds
+                self.conn.execute(
+                    "UPDATE leases SET status = 'leased', worker = ?, expires_at = ?, attempts = attempts + 1 WHERE id = ?",
+                    (worker, expires_at, row["id"]),
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        items = json.loads(row["items"]) if row["items"] else None
+        return Lease(row["id"], row["kind"], row["category"], row["start"], row["end"], items,
+                     worker, expires_at, row["attempts"] + 1)
+
+    def heartbeat(self, lease):
+        """Extend a lease, returning False if it expired and another worker has taken it"""
+        expires_at = time.time() + self.lease_seconds
+        with self.lock:
+            cursor = self.conn.execute(
+                "UPDATE leases SET expires_at = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (expires_at, lease.id, lease.worker),
+            )
+        if cursor.rowcount:
+            lease.expires_at = expires_at
+        return bool(cursor.rowcount)
+
+    def complete(self, lease, result=None):
+        """Mark a lease as done"""
+        with self.lock:
+            self.conn.execute(
+                "UPDATE leases SET status = 'done', expires_at = NULL, result = ?, error = NULL WHERE id = ? AND worker = ?",
+                (result, lease.id, lease.worker),
+            )
+
+    def fail(self, lease, error):
+        """Hand a failed lease back to the queue, or give up on it after ``max_attempts``"""
+        status = "failed" if lease.attempts >= self.max_attempts else "pending"
+        with self.lock:
+            self.conn.execute(
+                "UPDATE leases SET status = ?, worker = NULL, expires_at = NULL, error = ? WHERE id = ? AND worker = ?",
+                (status, str(error), lease.id, lease.worker),
+            )
+
+    def counts(self):
+        """Number of leases in each status"""
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM leases GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def unfinished(self):
+        """Number of leases still pending or leased"""
+        counts = self.counts()
+        return counts.get("pending", 0) + counts.get("leased", 0)
+
+    def mark_finished(self):
+        """Tell the workers that the coordinator will not queue any more work"""
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('finished', '1')")
+
+    def mark_unfinished(self):
+        """Tell the workers that more work is coming, undoing the mark left by an earlier crawl"""
+        with self.lock:
+            self.conn.execute("DELETE FROM meta WHERE key = 'finished'")
+
+    def save_page_count(self, category, page_count):
+        """Store the page count of a listing with the plan, so the workers do not measure it again"""
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                              (f"page_count:{category}", str(page_count)))
+
+    def page_count(self, category):
+        """Page count the coordinator stored for a listing, or None"""
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (f"page_count:{category}",)).fetchone()
+        return int(row[0]) if row else None
+
+    def is_finished(self):
+        """Whether the coordinator has queued all of its work and seen it done"""
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'finished'").fetchone()
+        return row is not None
+
+    def clear(self):
+        """Remove every lease to start a new crawl"""
+        with self.lock:
+            self.conn.execute("DELETE FROM leases")
+            self.conn.execute("DELETE FROM meta")
+
+    def close(self):
+        """Close the database connection"""
+        self.conn.close()
+
+
+class Heartbeat:
+    """Renew a lease in the background while its work runs"""
+
+    def __init__(self, queue, lease, interval=None):
+        self.queue = queue
+        self.lease = lease
+        self.interval = interval or max(1.0, queue.lease_seconds / 3)
+        self.stopped = threading.Event()
+        self.thread = None
+        self.lost = False
+
+    def run(self):
+        """Renew the lease until stopped"""
+        while not self.stopped.wait(self.interval):
+            if not self.queue.heartbeat(self.lease):
+                logger.warning(f"{self.lease} was reassigned to another worker")
+                self.lost = True
+                return
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()